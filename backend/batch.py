@@ -0,0 +1,80 @@
+"""
+Offline batch audits over a JSONL file of DecisionInput records.
+
+    python -m backend.batch decisions.jsonl -o reports.jsonl --concurrency 8
+
+Each output line is {"index", "status", "report" | "error"} in completion order.
+Re-running with --resume skips every index already present in the output file.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+from backend.core.env import load_env
+
+# Before the other backend imports: their settings are read from the environment at import
+load_env()
+
+from backend.core.batch_runner import iter_batch, aiter_sync, BATCH_CONCURRENCY
+from backend.core.pipeline import PIPELINE_MODES, DEFAULT_PIPELINE_MODE
+
+
+def completed_indices(path: str) -> set:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Last line may be cut off if the previous run was killed mid-write
+                continue
+            if record.get("status") == "ok":
+                done.add(record["index"])
+    return done
+
+
+async def run(args) -> int:
+    skip = completed_indices(args.output) if args.resume and args.output else set()
+    if skip:
+        print(f"Resuming: {len(skip)} records already completed.", file=sys.stderr)
+
+    out = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    ok = failed = 0
+    started = time.perf_counter()
+    try:
+        with open(args.input, "r", encoding="utf-8") as f:
+            async for result in iter_batch(aiter_sync(f), args.concurrency, args.start_index, skip, args.mode):
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                if result["status"] == "ok":
+                    ok += 1
+                else:
+                    failed += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Done: {ok} ok, {failed} failed in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-audit a JSONL file of decisions.")
+    parser.add_argument("input", help="JSONL file with one DecisionInput per line")
+    parser.add_argument("-o", "--output", help="Output JSONL file (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--mode", choices=PIPELINE_MODES, default=DEFAULT_PIPELINE_MODE, help="Pipeline mode")
+    parser.add_argument("--start-index", type=int, default=0, help="Skip records before this index")
+    parser.add_argument("--resume", action="store_true", help="Skip records already completed in --output")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
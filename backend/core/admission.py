@@ -0,0 +1,177 @@
+"""
+Admission control and request deadlines. A bounded number of audits run at
+once and a bounded number wait; beyond that requests are shed with a
+Retry-After hint instead of queueing without limit. A client deadline is
+kept in a context var so every stage and LLM attempt can stop early.
+"""
+import os
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Awaitable, List, Optional, TypeVar, Union
+
+from .metrics import REQUESTS_SHED
+
+T = TypeVar("T")
+
+ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "16"))
+ADMISSION_MAX_QUEUED = int(os.getenv("ADMISSION_MAX_QUEUED", "32"))
+# Cap on a client-supplied X-Request-Timeout
+MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT_SECONDS", "300"))
+
+
+
+class SharedDeadline:
+    """
+    The deadline of work several requests wait on (see SingleFlight): the
+    latest of their deadlines, or none while any of them has none. Waiters
+    are added and removed as they come and go.
+    """
+
+    def __init__(self):
+        self._waiters: List[Union[None, float, "SharedDeadline"]] = []
+
+    def add(self, deadline: Union[None, float, "SharedDeadline"]) -> None:
+        self._waiters.append(deadline)
+
+    def remove(self, deadline: Union[None, float, "SharedDeadline"]) -> None:
+        if deadline in self._waiters:
+            self._waiters.remove(deadline)
+
+    @property
+    def at(self) -> Optional[float]:
+        latest = None
+        for deadline in self._waiters:
+            at = deadline.at if isinstance(deadline, SharedDeadline) else deadline
+            if at is None:
+                return None
+            latest = at if latest is None else max(latest, at)
+        return latest
+
+
+# time.monotonic() by which the current request must finish; None means no deadline
+request_deadline: ContextVar[Union[None, float, SharedDeadline]] = ContextVar("request_deadline", default=None)
+
+
+class Overloaded(Exception):
+    """Raised when the admission queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server is at capacity, retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request deadline has passed or cannot be met."""
+
+
+def set_deadline(timeout_seconds: Optional[float]) -> None:
+    if timeout_seconds is None or timeout_seconds <= 0:
+        request_deadline.set(None)
+        return
+    request_deadline.set(time.monotonic() + min(timeout_seconds, MAX_REQUEST_TIMEOUT))
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the request deadline, or None without one."""
+    deadline = request_deadline.get()
+    if isinstance(deadline, SharedDeadline):
+        deadline = deadline.at
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bounded_timeout(timeout: float) -> float:
+    """`timeout` shortened to the time left before the deadline."""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded.")
+    return min(timeout, remaining)
+
+
+async def within_deadline(awaitable: Awaitable[T]) -> T:
+    """Awaits `awaitable`, raising DeadlineExceeded if the request deadline passes first."""
+    remaining = remaining_time()
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(0.0, remaining))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Request deadline passed while waiting for capacity.") from None
+
+
+class AdmissionController:
+    def __init__(self, max_active: int = ADMISSION_MAX_ACTIVE, max_queued: int = ADMISSION_MAX_QUEUED):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.active = 0
+        self.queued = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Moving average of admitted request durations, for Retry-After
+        self._average_seconds = 5.0
+
+    def retry_after(self) -> int:
+        """Rough time until a slot frees up: the backlog drained at the current rate."""
+        backlog = self.queued + 1
+        return max(1, math.ceil(self._average_seconds * backlog / max(1, self.max_active)))
+
+    def check(self) -> None:
+        """Sheds the request (Overloaded) if every slot is taken and the queue is full."""
+        if self.active >= self.max_active and self.queued >= self.max_queued:
+            REQUESTS_SHED.inc("queue_full")
+            raise Overloaded(self.retry_after())
+
+    async def acquire(self, shed: bool = True) -> "Ticket":
+        """
+        Waits for a slot; sheds the request if the queue is full or the
+        deadline passes first. With shed=False it always waits (batch records,
+        whose request was already checked and whose concurrency is bounded).
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_active)
+        if shed:
+            self.check()
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=remaining_time())
+        except asyncio.TimeoutError:
+            REQUESTS_SHED.inc("deadline")
+            raise DeadlineExceeded("Request deadline passed while queued.")
+        finally:
+            self.queued -= 1
+        self.active += 1
+        return Ticket(self)
+
+    def _release(self, seconds: float) -> None:
+        self.active -= 1
+        self._semaphore.release()
+        self._average_seconds = 0.8 * self._average_seconds + 0.2 * seconds
+
+    @asynccontextmanager
+    async def slot(self, shed: bool = True):
+        ticket = await self.acquire(shed)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+
+class Ticket:
+    """One admitted request. release() is idempotent so streaming responses can call it from several places."""
+
+    def __init__(self, controller: AdmissionController):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self._started)
+
+
+admission = AdmissionController()
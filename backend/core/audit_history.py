@@ -0,0 +1,293 @@
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from .schemas import DecisionInput, ReportOutput, AuditRecord
+from .near_duplicates import (
+    NEAR_DUPLICATE_MAX_CANDIDATES, signature, partition_key, band_keys, similarity, pack, unpack
+)
+
+# Empty path disables the history
+AUDIT_HISTORY_PATH = os.getenv("AUDIT_HISTORY_PATH", os.path.join(".cache", "audits.sqlite3"))
+AUDIT_HISTORY_PAGE_MAX = int(os.getenv("AUDIT_HISTORY_PAGE_MAX", "200"))
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS audits ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, audit_id TEXT,"
+    " created_at REAL NOT NULL, mode TEXT NOT NULL, domain TEXT NOT NULL, time_horizon TEXT NOT NULL,"
+    " risk_score REAL NOT NULL, bias_score REAL NOT NULL, alignment_score REAL NOT NULL,"
+    " input TEXT NOT NULL, report TEXT NOT NULL)",
+    # One row per detected bias, so bias filters are an index lookup instead of a JSON scan
+    "CREATE TABLE IF NOT EXISTS audit_biases ("
+    " audit_seq INTEGER NOT NULL REFERENCES audits(seq), bias_type TEXT NOT NULL, severity TEXT NOT NULL)",
+    # MinHash signature and LSH band keys of the decision text (near_duplicates)
+    "CREATE TABLE IF NOT EXISTS audit_signatures (audit_seq INTEGER PRIMARY KEY, signature BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS audit_bands (band_key INTEGER NOT NULL, audit_seq INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS audit_bands_key ON audit_bands (band_key, audit_seq)",
+    "CREATE INDEX IF NOT EXISTS audits_domain ON audits (domain, seq)",
+    "CREATE INDEX IF NOT EXISTS audits_created ON audits (created_at)",
+    "CREATE INDEX IF NOT EXISTS audits_risk ON audits (risk_score)",
+    "CREATE INDEX IF NOT EXISTS audits_bias ON audits (bias_score)",
+    "CREATE INDEX IF NOT EXISTS audits_alignment ON audits (alignment_score)",
+    "CREATE INDEX IF NOT EXISTS audits_audit_id ON audits (audit_id)",
+    "CREATE INDEX IF NOT EXISTS audit_biases_type ON audit_biases (bias_type, audit_seq)",
+]
+
+_SUMMARY_COLUMNS = "seq, id, audit_id, created_at, mode, input, risk_score, bias_score, alignment_score"
+
+
+def _bias_key(bias_type: str) -> str:
+    return " ".join(bias_type.lower().replace("_", " ").split())
+
+
+class AuditHistory:
+    """
+    Append-only record of every completed audit (input, report and stage
+    outputs) in SQLite with WAL, indexed by domain, time, scores and bias
+    type. Past audits are listed with keyset pagination: the cursor is the
+    last row's sequence number, so deep pages cost the same as the first.
+    Each entry also gets MinHash LSH band keys for near-duplicate lookup.
+    """
+
+    def __init__(self, path: Optional[str] = AUDIT_HISTORY_PATH):
+        self._lock = threading.Lock()
+        self._db = None
+        # Opened on first use (or by startup), not on construction
+        self.path = path or None
+
+    def open(self) -> Optional[sqlite3.Connection]:
+        """The SQLite connection, opened on the first call. Blocking: call it off the event loop."""
+        with self._lock:
+            if self._db is None and self.path:
+                try:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    db = sqlite3.connect(self.path, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute("PRAGMA synchronous=NORMAL")
+                    for statement in _SCHEMA:
+                        db.execute(statement)
+                    db.commit()
+                    self._db = db
+                except sqlite3.Error as e:
+                    print(f"Warning: audit history unavailable ({self.path}): {e}")
+                    self.path = None
+            return self._db
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def record(self, input_data: DecisionInput, report: ReportOutput, mode: str) -> Optional[str]:
+        """Stores one finished audit; returns its history id. Never raises."""
+        if self.open() is None:
+            return None
+        record_id = uuid.uuid4().hex
+        biases = report.bias_analysis.biases if report.bias_analysis else []
+        try:
+            with self._lock:
+                cursor = self._db.execute(
+                    "INSERT INTO audits (id, audit_id, created_at, mode, domain, time_horizon, risk_score,"
+                    " bias_score, alignment_score, input, report) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record_id, report.audit_id, time.time(), mode,
+                        input_data.domain.strip().lower(), input_data.time_horizon.strip().lower(),
+                        report.risk_score, report.bias_score, report.alignment_score,
+                        input_data.model_dump_json(), report.model_dump_json(),
+                    )
+                )
+                seq = cursor.lastrowid
+                self._db.executemany(
+                    "INSERT INTO audit_biases (audit_seq, bias_type, severity) VALUES (?, ?, ?)",
+                    [(seq, _bias_key(b.bias_type), b.severity.strip().lower()) for b in biases]
+                )
+                # A reused report is already represented by its source audit
+                if report.near_duplicate_of is None:
+                    sig = signature(input_data)
+                    self._db.execute("INSERT INTO audit_signatures (audit_seq, signature) VALUES (?, ?)", (seq, pack(sig)))
+                    self._db.executemany(
+                        "INSERT INTO audit_bands (band_key, audit_seq) VALUES (?, ?)",
+                        [(key, seq) for key in band_keys(partition_key(input_data), sig)]
+                    )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: could not record audit: {e}")
+            return None
+        return record_id
+
+    def _bias_types(self, seqs: Sequence[int]) -> dict:
+        types = {seq: [] for seq in seqs}
+        if seqs:
+            rows = self._db.execute(
+                f"SELECT audit_seq, bias_type FROM audit_biases WHERE audit_seq IN ({','.join('?' * len(seqs))})",
+                list(seqs)
+            )
+            for seq, bias_type in rows:
+                if bias_type not in types[seq]:
+                    types[seq].append(bias_type)
+        return types
+
+    def query(
+        self,
+        domain: Optional[str] = None,
+        time_horizon: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        min_risk: Optional[float] = None,
+        max_risk: Optional[float] = None,
+        min_bias: Optional[float] = None,
+        max_bias: Optional[float] = None,
+        min_alignment: Optional[float] = None,
+        max_alignment: Optional[float] = None,
+        bias_types: Optional[List[str]] = None,
+        severity: Optional[str] = None,
+        audit_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[AuditRecord], Optional[str]]:
+        """
+        Newest first. Returns (records, next_cursor); next_cursor is None on
+        the last page. Records carry input, scores and bias types, not the
+        full report (see get()). Raises ValueError for a malformed cursor.
+        """
+        if self.open() is None:
+            return [], None
+
+        clauses, params = [], []
+
+        def where(clause: str, value) -> None:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        where("domain = ?", domain.strip().lower() if domain else None)
+        where("time_horizon = ?", time_horizon.strip().lower() if time_horizon else None)
+        where("created_at >= ?", since)
+        where("created_at < ?", until)
+        where("risk_score >= ?", min_risk)
+        where("risk_score <= ?", max_risk)
+        where("bias_score >= ?", min_bias)
+        where("bias_score <= ?", max_bias)
+        where("alignment_score >= ?", min_alignment)
+        where("alignment_score <= ?", max_alignment)
+        where("audit_id = ?", audit_id)
+        if cursor:
+            try:
+                where("seq < ?", int(cursor))
+            except ValueError:
+                raise ValueError(f"Invalid cursor '{cursor}'.")
+        if bias_types or severity:
+            bias_clauses, bias_params = [], []
+            if bias_types:
+                bias_clauses.append(f"bias_type IN ({','.join('?' * len(bias_types))})")
+                bias_params += [_bias_key(bias_type) for bias_type in bias_types]
+            if severity:
+                bias_clauses.append("severity = ?")
+                bias_params.append(severity.strip().lower())
+            clauses.append(f"seq IN (SELECT audit_seq FROM audit_biases WHERE {' AND '.join(bias_clauses)})")
+            params += bias_params
+
+        limit = max(1, min(limit, AUDIT_HISTORY_PAGE_MAX))
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM audits"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        # One extra row tells whether there is a next page
+        sql += " ORDER BY seq DESC LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(sql, params + [limit + 1]).fetchall()
+            more = len(rows) > limit
+            rows = rows[:limit]
+            types = self._bias_types([row[0] for row in rows])
+
+        records = [self._summary(row, types[row[0]]) for row in rows]
+        return records, str(rows[-1][0]) if more else None
+
+    def get(self, record_id: str) -> Optional[AuditRecord]:
+        """One audit with its full report."""
+        if self.open() is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_SUMMARY_COLUMNS}, report FROM audits WHERE id = ?", (record_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            types = self._bias_types([row[0]])
+        record = self._summary(row[:-1], types[row[0]])
+        record.report = ReportOutput.model_validate_json(row[-1])
+        return record
+
+    def find_similar(self, input_data: DecisionInput, threshold: float) -> Optional[Tuple[AuditRecord, float]]:
+        """
+        The most similar past audit of the same domain, time horizon and
+        values whose estimated Jaccard similarity is at least `threshold`,
+        with that similarity. Candidates come from the LSH band index, so
+        the cost does not grow with the number of stored audits.
+        """
+        if self.open() is None:
+            return None
+        sig = signature(input_data)
+        keys = band_keys(partition_key(input_data), sig)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT s.audit_seq, s.signature FROM audit_signatures s WHERE s.audit_seq IN ("
+                f" SELECT DISTINCT audit_seq FROM audit_bands WHERE band_key IN ({','.join('?' * len(keys))})"
+                " ORDER BY audit_seq DESC LIMIT ?) ORDER BY s.audit_seq DESC",
+                keys + [NEAR_DUPLICATE_MAX_CANDIDATES]
+            ).fetchall()
+            best_seq, best = None, 0.0
+            # Newest first, so ties go to the most recent audit
+            for seq, blob in rows:
+                score = similarity(sig, unpack(blob))
+                if score > best:
+                    best_seq, best = seq, score
+            if best_seq is None or best < threshold:
+                return None
+            (record_id,) = self._db.execute("SELECT id FROM audits WHERE seq = ?", (best_seq,)).fetchone()
+        record = self.get(record_id)
+        return (record, best) if record is not None else None
+
+    # For the event loop: the SQLite work (and find_similar's MinHash) runs in a worker thread
+
+    async def arecord(self, input_data: DecisionInput, report: ReportOutput, mode: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.record, input_data, report, mode)
+
+    async def aquery(self, **filters) -> Tuple[List[AuditRecord], Optional[str]]:
+        if not self.enabled:
+            return [], None
+        return await asyncio.to_thread(self.query, **filters)
+
+    async def aget(self, record_id: str) -> Optional[AuditRecord]:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.get, record_id)
+
+    async def afind_similar(self, input_data: DecisionInput, threshold: float) -> Optional[Tuple[AuditRecord, float]]:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.find_similar, input_data, threshold)
+
+    @staticmethod
+    def _summary(row: tuple, bias_types: List[str]) -> AuditRecord:
+        _, record_id, audit_id, created_at, mode, input_json, risk, bias, alignment = row
+        return AuditRecord(
+            id=record_id,
+            audit_id=audit_id,
+            created_at=created_at,
+            mode=mode,
+            input=DecisionInput.model_validate_json(input_json),
+            risk_score=risk,
+            bias_score=bias,
+            alignment_score=alignment,
+            bias_types=bias_types,
+        )
+
+
+audit_history = AuditHistory()
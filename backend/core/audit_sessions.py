@@ -0,0 +1,64 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from .schemas import DecisionInput, ReportOutput
+from .pipeline import STAGES, invalidated_stages
+
+AUDIT_SESSION_MAX = int(os.getenv("AUDIT_SESSION_MAX", "1000"))
+AUDIT_SESSION_TTL_SECONDS = float(os.getenv("AUDIT_SESSION_TTL_SECONDS", "3600"))
+
+
+@dataclass
+class AuditSession:
+    input_data: DecisionInput
+    outputs: Dict[str, Any]
+    updated_at: float = field(default_factory=time.time)
+
+    def reusable_outputs(self, input_data: DecisionInput) -> Dict[str, Any]:
+        """Previous stage outputs whose input fields are unchanged."""
+        stale = invalidated_stages(self.input_data, input_data)
+        return {name: output for name, output in self.outputs.items() if name not in stale}
+
+
+class AuditSessionStore:
+    """
+    Keeps the last input and stage outputs per audit id so a follow-up audit
+    of the same decision only recomputes the stages its edits invalidate.
+    Bounded LRU with a TTL; sessions live in process memory only.
+    """
+
+    def __init__(self, max_sessions: int = AUDIT_SESSION_MAX, ttl_seconds: float = AUDIT_SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, AuditSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, audit_id: str) -> Optional[AuditSession]:
+        with self._lock:
+            session = self._sessions.get(audit_id)
+            if session is None:
+                return None
+            if time.time() - session.updated_at > self.ttl_seconds:
+                del self._sessions[audit_id]
+                return None
+            self._sessions.move_to_end(audit_id)
+            return session
+
+    def save(self, audit_id: Optional[str], input_data: DecisionInput, report: ReportOutput) -> str:
+        """Stores the stage outputs attached to `report`; returns the audit id."""
+        audit_id = audit_id or uuid.uuid4().hex
+        outputs = {name: getattr(report, name) for name in STAGES if getattr(report, name) is not None}
+        with self._lock:
+            self._sessions[audit_id] = AuditSession(input_data=input_data, outputs=outputs)
+            self._sessions.move_to_end(audit_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return audit_id
+
+
+audit_sessions = AuditSessionStore()
@@ -0,0 +1,127 @@
+import os
+import asyncio
+from contextlib import nullcontext
+from typing import AbstractSet, AsyncContextManager, AsyncIterable, AsyncIterator, Callable, Container, Iterable, Optional
+
+from pydantic import ValidationError
+from .schemas import DecisionInput
+from .pipeline import run_audit, PipelineError, DEFAULT_PIPELINE_MODE
+from .scheduler import request_priority
+from .audit_history import audit_history
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+
+
+async def aiter_sync(lines: Iterable[str]) -> AsyncIterator[str]:
+    """Adapts a plain iterable (an open file, a list of lines) to iter_batch."""
+    for line in lines:
+        yield line
+
+
+async def audit_record(
+    index: int,
+    line: str,
+    mode: str = DEFAULT_PIPELINE_MODE,
+    include: Optional[AbstractSet[str]] = None
+) -> dict:
+    """
+    Audits one JSONL record. Never raises: failures are returned inline so a
+    bad record cannot abort the batch. `include` limits the report fields.
+    """
+    # Interactive audits go ahead of batch records under rate limits
+    request_priority.set("batch")
+    try:
+        # Parsed and validated in one pass by pydantic's JSON parser
+        input_data = DecisionInput.model_validate_json(line)
+    except ValidationError as e:
+        return {"index": index, "status": "error", "error": f"Invalid record: {e}"}
+
+    if not input_data.decision_text.strip():
+        return {"index": index, "status": "error", "error": "Decision text cannot be empty."}
+
+    try:
+        report = await run_audit(input_data, mode)
+        await audit_history.arecord(input_data, report, mode)
+        return {"index": index, "status": "ok", "report": report.model_dump(include=include)}
+    except PipelineError as e:
+        return {
+            "index": index,
+            "status": "error",
+            "error": str(e),
+            "stages": {name: err.message for name, err in e.errors.items()}
+        }
+    except Exception as e:
+        return {"index": index, "status": "error", "error": str(e)}
+
+
+async def iter_batch(
+    lines: AsyncIterable[str],
+    concurrency: int = BATCH_CONCURRENCY,
+    start_index: int = 0,
+    skip: Container[int] = (),
+    mode: str = DEFAULT_PIPELINE_MODE,
+    include: Optional[AbstractSet[str]] = None,
+    admit: Optional[Callable[[], AsyncContextManager]] = None
+) -> AsyncIterator[dict]:
+    """
+    Audits a stream of JSONL DecisionInput records with at most `concurrency`
+    audits in flight, yielding one result dict per record in completion order.
+
+    Blank lines are ignored and do not count towards the record index.
+    Records before start_index, or whose index is in skip, are not re-run,
+    which lets an interrupted job resume from its previous output.
+    `admit`, if given, is entered around each audit (the server's admission slot).
+    """
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    slots = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+    tasks = set()
+    submitted = 0
+
+    async def run_item(index: int, line: str):
+        try:
+            async with (admit() if admit is not None else nullcontext()):
+                result = await audit_record(index, line, mode, include)
+            await results.put(result)
+        finally:
+            slots.release()
+
+    async def produce():
+        nonlocal submitted
+        index = 0
+        async for line in lines:
+            if not line.strip():
+                continue
+            if index >= start_index and index not in skip:
+                # Acquire before reading further so the input is consumed at audit pace
+                await slots.acquire()
+                task = asyncio.ensure_future(run_item(index, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                submitted += 1
+            index += 1
+
+    producer = asyncio.ensure_future(produce())
+    yielded = 0
+    try:
+        while True:
+            if producer.done():
+                # Surface input errors (e.g. a broken request stream)
+                producer.result()
+                if yielded == submitted:
+                    break
+                result = await results.get()
+            else:
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                result = getter.result()
+            yielded += 1
+            yield result
+    finally:
+        producer.cancel()
+        for task in list(tasks):
+            task.cancel()
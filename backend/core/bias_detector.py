@@ -1,5 +1,15 @@
+import os
+from typing import List
 from .llm_client import get_llm_response
-from .schemas import DecisionInput, BiasOutput
+from .bias_prescreen import prescreen_biases
+from .schemas import DecisionInput, BiasOutput, BiasCandidate
+
+# off:    always run the full LLM detector
+# skip:   no LLM call when the pre-screen finds nothing, full detector otherwise
+# verify: no LLM call when the pre-screen finds nothing, otherwise the LLM only
+#         verifies the flagged sentences
+BIAS_PRESCREEN_POLICY = os.getenv("BIAS_PRESCREEN_POLICY", "off").lower()
+BIAS_PRESCREEN_MIN_CONFIDENCE = float(os.getenv("BIAS_PRESCREEN_MIN_CONFIDENCE", "0.3"))
 
 SYSTEM_PROMPT = """
 You are a Cognitive Bias Detection Engine.
@@ -26,7 +36,53 @@ CONSTRAINT:
 - IMPORTANT: All JSON keys must be in snake_case (lowercase with underscores) exactly as defined in the schema (e.g., "bias_type", "severity"). Do not Capitalize keys.
 """
 
-def detect_biases(input_data: DecisionInput) -> BiasOutput:
+VERIFY_SYSTEM_PROMPT = """
+You are a Cognitive Bias Verification Engine.
+A fast keyword screen flagged possible cognitive biases in sentences from a user's decision text.
+Your task is to confirm or reject each candidate.
+
+For each candidate that is genuinely present, return it with:
+1. 'bias_type' (you may correct the label if another bias fits better).
+2. 'evidence' (exact quote from the flagged sentence).
+3. 'severity' (low, medium, high).
+
+CONSTRAINT:
+- Drop candidates that are not genuinely present. If none are, return an empty list.
+- DO NOT give advice.
+- DO NOT tell the user what they "should" do.
+- Return ONLY JSON matching the Schema.
+- IMPORTANT: All JSON keys must be in snake_case exactly as defined in the schema (e.g., "biases", "bias_type", "severity"). Do not Capitalize keys.
+"""
+
+async def verify_candidates(input_data: DecisionInput, candidates: List[BiasCandidate]) -> BiasOutput:
+    """
+    Sends only the flagged sentences to the LLM instead of the whole text.
+    """
+    flagged = "\n".join(
+        f"- {c.bias_type} (screen confidence {c.confidence:.2f}): \"{c.evidence}\""
+        for c in candidates
+    )
+    user_prompt = f"""
+    Domain: {input_data.domain}
+    
+    Candidates:
+    {flagged}
+    """
+    
+    return await get_llm_response(
+        system_prompt=VERIFY_SYSTEM_PROMPT,
+        user_prompt=user_prompt,
+        response_model=BiasOutput
+    )
+
+async def detect_biases(input_data: DecisionInput) -> BiasOutput:
+    if BIAS_PRESCREEN_POLICY in ("skip", "verify"):
+        candidates = prescreen_biases(input_data.decision_text, BIAS_PRESCREEN_MIN_CONFIDENCE)
+        if not candidates:
+            return BiasOutput(biases=[])
+        if BIAS_PRESCREEN_POLICY == "verify":
+            return await verify_candidates(input_data, candidates)
+
     user_prompt = f"""
     Domain: {input_data.domain}
     
@@ -34,7 +90,7 @@ def detect_biases(input_data: DecisionInput) -> BiasOutput:
     "{input_data.decision_text}"
     """
     
-    return get_llm_response(
+    return await get_llm_response(
         system_prompt=SYSTEM_PROMPT,
         user_prompt=user_prompt,
         response_model=BiasOutput
@@ -0,0 +1,129 @@
+"""
+In-process lexicon pre-screen for the six biases named in the bias
+detector's SYSTEM_PROMPT. Pure regex, no I/O: cheap enough to run on every
+text in a batch before deciding whether the LLM is needed at all.
+"""
+import re
+from typing import List, Dict, Tuple
+
+from .schemas import BiasCandidate
+
+# (pattern, weight) per bias. A weight is the confidence a single hit gives;
+# several hits combine as 1 - prod(1 - weight).
+LEXICON: Dict[str, List[Tuple[str, float]]] = {
+    "Confirmation Bias": [
+        (r"\b(?:proves?|confirms?) (?:that )?(?:i'?m|i am|i was) right\b", 0.7),
+        (r"\bi (?:already )?knew (?:it|that)\b", 0.5),
+        (r"\bonly (?:read|listen(?:ing)? to|follow(?:ing)?|trust(?:ing)?)\b", 0.4),
+        (r"\b(?:everything|everyone) i(?:'ve| have)? (?:read|heard|asked) (?:says|agrees)\b", 0.6),
+        (r"\bignor(?:e|ing) (?:the )?(?:critics|doubters|naysayers|negative)\b", 0.6),
+        (r"\bjust as i (?:thought|expected)\b", 0.5),
+    ],
+    "Loss Aversion": [
+        (r"\bcan'?t (?:afford to )?lose\b", 0.5),
+        (r"\b(?:afraid|scared|terrified) of losing\b", 0.7),
+        (r"\bdon'?t want to lose\b", 0.6),
+        (r"\balready (?:invested|spent|put in|sunk)\b", 0.6),
+        (r"\bsunk cost\b", 0.6),
+        (r"\b(?:break|breaking) even\b", 0.5),
+        (r"\bwin (?:it|my money) back\b", 0.6),
+    ],
+    "Overconfidence": [
+        (r"\b(?:guaranteed?|can'?t (?:fail|lose|go wrong)|no way (?:it|this) (?:can|could|will) fail)\b", 0.7),
+        # No \b after "%": it is not a word character, so "100%" would never match
+        (r"(?:\b(?:definitely|certainly|for sure|sure thing)\b|\b100\s?%)", 0.4),
+        (r"\bi know (?:it|this|that) will\b", 0.6),
+        (r"\b\d+\s?x\b", 0.5),
+        (r"\bwill (?:definitely |surely )?(?:go up|skyrocket|moon|double|triple)\b", 0.6),
+        (r"\b(?:easy|easily|effortless(?:ly)?) (?:money|win|success)\b", 0.5),
+    ],
+    "Herd Mentality": [
+        (r"\beveryone (?:is|else|i know|around me)\b", 0.6),
+        (r"\ball (?:of )?my (?:friends|colleagues|coworkers|peers)\b", 0.6),
+        (r"\b(?:my )?(?:friends?|colleagues?|coworkers?|neighbou?rs?|brother|sister|cousin) (?:said|says|told me|swears?|is doing|are doing)\b", 0.5),
+        (r"\b(?:bandwagon|trending|going viral|fomo)\b", 0.6),
+        (r"\bjump(?:ing)? on (?:the|this)\b", 0.4),
+        (r"\bpeople are (?:making|buying|doing)\b", 0.5),
+    ],
+    "Present Bias": [
+        (r"\b(?:right now|right away|immediately|asap)\b", 0.4),
+        (r"\bcan'?t wait\b", 0.5),
+        (r"\b(?:next|this) (?:week|weekend)\b", 0.3),
+        (r"\bquick (?:money|win|cash|returns?|profit)\b", 0.6),
+        (r"\binstant(?:ly)? (?:gratification|returns?|results?)\b", 0.6),
+        (r"\btreat myself\b", 0.5),
+        (r"\bworry about (?:it|that|the rest) later\b", 0.7),
+    ],
+    "Fear-Based Reasoning": [
+        (r"\b(?:afraid|scared|terrified|panick(?:ed|ing)|anxious|dread)\b", 0.5),
+        (r"\bwhat if\b", 0.3),
+        (r"\bbefore it'?s too late\b", 0.6),
+        (r"\bmiss(?:ing)? out\b", 0.5),
+        (r"\b(?:fear|worried) (?:that|of|about)\b", 0.5),
+        (r"\bor else\b", 0.3),
+    ],
+}
+
+# One alternation per bias; the group index maps a match back to its weight
+_COMPILED = {
+    bias: (
+        re.compile("|".join(f"({pattern})" for pattern, _ in patterns), re.IGNORECASE),
+        [weight for _, weight in patterns],
+    )
+    for bias, patterns in LEXICON.items()
+}
+
+_SENTENCE_END = re.compile(r"[.!?\n]")
+
+
+def _sentence_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Expands a match to the sentence that contains it."""
+    left = start
+    while left > 0 and not _SENTENCE_END.match(text[left - 1]):
+        left -= 1
+    match = _SENTENCE_END.search(text, end)
+    right = match.end() if match else len(text)
+    while left < right and text[left].isspace():
+        left += 1
+    return left, right
+
+
+def _severity(confidence: float) -> str:
+    if confidence >= 0.8:
+        return "high"
+    if confidence >= 0.5:
+        return "medium"
+    return "low"
+
+
+def prescreen_biases(text: str, min_confidence: float = 0.0) -> List[BiasCandidate]:
+    """
+    Returns one candidate per bias whose patterns fire, with the sentence of
+    its strongest hit as evidence. Sorted by confidence, highest first.
+    """
+    candidates = []
+    for bias, (pattern, weights) in _COMPILED.items():
+        miss_probability = 1.0
+        best = None
+        for match in pattern.finditer(text):
+            weight = weights[match.lastindex - 1]
+            miss_probability *= 1.0 - weight
+            if best is None or weight > best[0]:
+                best = (weight, match.start(), match.end())
+        if best is None:
+            continue
+
+        confidence = round(1.0 - miss_probability, 3)
+        if confidence < min_confidence:
+            continue
+        start, end = _sentence_span(text, best[1], best[2])
+        candidates.append(BiasCandidate(
+            bias_type=bias,
+            evidence=text[start:end].strip(),
+            severity=_severity(confidence),
+            confidence=confidence,
+            span=(start, end)
+        ))
+
+    candidates.sort(key=lambda c: c.confidence, reverse=True)
+    return candidates
@@ -0,0 +1,156 @@
+"""
+Record/replay of LLM calls. In record mode every provider response is
+appended to a gzipped JSONL cassette, keyed by the requested model and the
+exact messages sent. In replay mode responses come from the cassette instead
+of a provider, optionally after the recorded latency, so whole audits run
+offline, deterministically and at no provider cost (see backend.regression).
+"""
+import os
+import gzip
+import json
+import asyncio
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from .json_stream import PartialStream, PartialValidator
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", os.path.join("cassettes", "llm.jsonl.gz"))
+# Replayed calls wait this fraction of their recorded latency (0: answer at once)
+LLM_CASSETTE_LATENCY_SCALE = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "0"))
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a call the cassette does not hold."""
+
+
+def cassette_key(model: Optional[str], messages: List[Dict[str, str]]) -> str:
+    payload = json.dumps([model or "", messages], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_entries(path: str) -> Dict[str, dict]:
+    entries: Dict[str, dict] = {}
+    if not os.path.exists(path):
+        return entries
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                # First recording wins, so replays match the original run
+                entries.setdefault(entry["key"], entry)
+    except (EOFError, OSError) as e:
+        # A recorder killed mid-write leaves a truncated last member; keep what was read
+        print(f"Warning: cassette {path} is truncated ({e}); loaded {len(entries)} entries")
+    return entries
+
+
+class Cassette:
+    def __init__(
+        self,
+        mode: str = LLM_CASSETTE_MODE,
+        path: str = LLM_CASSETTE_PATH,
+        latency_scale: float = LLM_CASSETTE_LATENCY_SCALE
+    ):
+        self._lock = threading.Lock()
+        self._file = None
+        self.configure(mode, path, latency_scale)
+
+    def configure(self, mode: str, path: str, latency_scale: float = 0.0) -> None:
+        """Switches mode or cassette file; the regression runner calls this before an audit run."""
+        self.close()
+        if mode not in CASSETTE_MODES:
+            print(f"Warning: unknown LLM_CASSETTE_MODE '{mode}', expected one of {', '.join(CASSETTE_MODES)}")
+            mode = "off"
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self.hits = self.misses = self.recorded = 0
+        # Record mode loads the existing entries too, so re-recording only appends new calls
+        self._entries = load_entries(path) if mode != "off" and path else {}
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    async def replay(
+        self,
+        model: Optional[str],
+        messages: List[Dict[str, str]],
+        response_model: Optional[Type[BaseModel]] = None,
+        on_partial: Optional[PartialStream] = None
+    ) -> Tuple[str, Tuple[str, str]]:
+        """(content, (provider, model)) as recorded. Raises CassetteMiss."""
+        entry = self._entries.get(cassette_key(model, messages))
+        if entry is None:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded response for this call in {self.path}")
+        self.hits += 1
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry["seconds"] * self.latency_scale)
+        if on_partial is not None and response_model is not None:
+            validator = PartialValidator(response_model)
+            with on_partial.attempt() as sink:
+                for path, value in validator.feed(entry["content"]):
+                    sink(path, value)
+        return entry["content"], tuple(entry["target"])
+
+    def record(
+        self,
+        model: Optional[str],
+        messages: List[Dict[str, str]],
+        target: Tuple[str, str],
+        content: str,
+        seconds: float
+    ) -> None:
+        if self.mode != "record":
+            return
+        key = cassette_key(model, messages)
+        with self._lock:
+            if key in self._entries:
+                return
+            # Prompts are not stored: the key identifies them and keeps cassettes small
+            entry = {"key": key, "target": list(target), "seconds": round(seconds, 3), "content": content}
+            self._entries[key] = entry
+            try:
+                if self._file is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._file = gzip.open(self.path, "at", encoding="utf-8")
+                self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                self._file.flush()
+                self.recorded += 1
+            except OSError as e:
+                print(f"Warning: could not write cassette {self.path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
+
+
+cassette = Cassette()
@@ -0,0 +1,68 @@
+"""
+Response compression negotiated from Accept-Encoding: brotli when the
+`brotli` package is installed and the client accepts it, gzip otherwise.
+Streamed NDJSON is flushed per chunk, so events still arrive as they happen.
+"""
+import os
+from typing import Dict
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import brotli
+    from starlette.middleware.gzip import IdentityResponder
+except ImportError:  # optional; gzip covers every client
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() in ("1", "true", "yes")
+# Bodies smaller than this are sent as is; compressing them costs more than it saves
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1000"))
+# Mid levels: most of the size reduction for a fraction of the CPU of the maximum
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """"br;q=0.9, gzip" -> {"br": 0.9, "gzip": 1.0}"""
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings[name.strip().lower()] = quality
+    return encodings
+
+
+if brotli is not None:
+    class BrotliResponder(IdentityResponder):
+        content_encoding = "br"
+
+        def __init__(self, app, minimum_size: int, quality: int = BROTLI_QUALITY):
+            super().__init__(app, minimum_size)
+            self._compressor = None
+            self.quality = quality
+
+        async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+            if self._compressor is None:
+                self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=self.quality)
+            data = self._compressor.process(body)
+            return data + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(self, app, minimum_size: int = RESPONSE_COMPRESSION_MIN_BYTES, compresslevel: int = GZIP_LEVEL):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and brotli is not None:
+            accepted = accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+            if accepted.get("br", 0) > 0:
+                await BrotliResponder(self.app, self.minimum_size)(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
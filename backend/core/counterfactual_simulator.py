@@ -30,7 +30,7 @@ CONSTRAINT:
   }
 """
 
-def simulate_scenarios(input_data: DecisionInput) -> SimulationOutput:
+async def simulate_scenarios(input_data: DecisionInput) -> SimulationOutput:
     user_prompt = f"""
     Domain: {input_data.domain}
     Time Horizon: {input_data.time_horizon}
@@ -39,7 +39,7 @@ def simulate_scenarios(input_data: DecisionInput) -> SimulationOutput:
     "{input_data.decision_text}"
     """
     
-    return get_llm_response(
+    return await get_llm_response(
         system_prompt=SYSTEM_PROMPT,
         user_prompt=user_prompt,
         response_model=SimulationOutput
@@ -20,7 +20,7 @@ CONSTRAINT:
 - IMPORTANT: All JSON keys must be in snake_case (lowercase with underscores) exactly as defined in the schema (e.g., "objective", "risk_tolerance"). Do not Capitalize keys.
 """
 
-def decompose_decision(input_data: DecisionInput) -> DecompositionOutput:
+async def decompose_decision(input_data: DecisionInput) -> DecompositionOutput:
     user_prompt = f"""
     Domain: {input_data.domain}
     Time Horizon: {input_data.time_horizon}
@@ -30,7 +30,7 @@ def decompose_decision(input_data: DecisionInput) -> DecompositionOutput:
     "{input_data.decision_text}"
     """
     
-    return get_llm_response(
+    return await get_llm_response(
         system_prompt=SYSTEM_PROMPT,
         user_prompt=user_prompt,
         response_model=DecompositionOutput
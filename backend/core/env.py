@@ -0,0 +1,25 @@
+"""
+.env loading. Settings are read from the environment when each module is
+imported, so entry points (backend.main, the CLIs) call load_env() before
+importing anything else from backend.core; importing the modules themselves
+never touches the filesystem.
+"""
+import os
+from typing import Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_env(override: bool = False) -> Optional[str]:
+    """
+    Loads the first .env found in the working directory, the project root or
+    backend/ (fixed paths, no directory walk); returns the path used.
+    """
+    from dotenv import load_dotenv
+
+    candidates = (os.path.join(os.getcwd(), ".env"), os.path.join(ROOT_DIR, ".env"), os.path.join(ROOT_DIR, "backend", ".env"))
+    for path in candidates:
+        if os.path.isfile(path):
+            load_dotenv(path, override=override)
+            return path
+    return None
@@ -0,0 +1,125 @@
+from .llm_client import get_llm_response
+from .schemas import DecisionInput, FusedAnalysisOutput, FusedReportOutput, ReportOutput
+from .report_generator import build_report
+
+# Same instructions as the four stage modules, answered in one structured call
+ANALYSIS_INSTRUCTIONS = """
+Produce these analyses of the user's decision:
+
+1. decomposition:
+   - objective: The core goal.
+   - constraints: External or internal limitations.
+   - assumptions: Hidden beliefs the user holds.
+   - emotional_signals: Implicit feelings detected in the text (e.g., anxiety, excitement).
+   - risk_tolerance: Infer 'low', 'medium', or 'high' based on the text.
+   - irreversible_factors: Elements that cannot be undone.
+
+2. bias_analysis: Detect Confirmation Bias, Loss Aversion, Overconfidence, Herd Mentality,
+   Present Bias and Fear-Based Reasoning (and others if clear). For each bias give 'bias_type',
+   'evidence' (exact quote or specific signal from text) and 'severity' (low, medium, high).
+   If no biases are strongly present, return an empty list.
+
+3. simulation: best_case, worst_case, most_likely and long_term scenarios, plus 'uncertainties'
+   (key factors that could swing the outcome). Use probabilistic language
+   (e.g., "could lead to", "might result in") and avoid numerical guarantees.
+
+4. integrity_analysis: 'alignment_score' (0.0-100.0, 100 = perfect alignment with the user's values)
+   and 'conflicts' (values the decision might conflict with, and why). If values are not provided,
+   mark as neutral (100) with no conflicts.
+"""
+
+ANALYSIS_STRUCTURE = """
+    "decomposition": {
+      "objective": "...",
+      "constraints": ["..."],
+      "assumptions": ["..."],
+      "emotional_signals": ["..."],
+      "risk_tolerance": "medium",
+      "irreversible_factors": ["..."]
+    },
+    "bias_analysis": {
+      "biases": [{"bias_type": "...", "evidence": "...", "severity": "low"}]
+    },
+    "simulation": {
+      "scenarios": {"best_case": "...", "worst_case": "...", "most_likely": "...", "long_term": "..."},
+      "uncertainties": ["..."]
+    },
+    "integrity_analysis": {
+      "alignment_score": 85.0,
+      "conflicts": [{"value": "...", "conflict_reason": "..."}]
+    }"""
+
+CONSTRAINTS = """
+CONSTRAINT:
+- Maintain a neutral, analytical tone.
+- DO NOT give advice or recommendations.
+- DO NOT say "I recommend" or "You should".
+- DO NOT judge the user's morality.
+- Return ONLY JSON matching the Schema.
+- IMPORTANT: All JSON keys must be in snake_case exactly as shown. Do not Capitalize keys.
+"""
+
+SYSTEM_PROMPT = f"""
+You are a Decision Integrity Analysis Engine.
+Your task is to analyze a decision in a single pass, without offering advice.
+{ANALYSIS_INSTRUCTIONS}{CONSTRAINTS}
+Structure the response exactly like this:
+  {{{ANALYSIS_STRUCTURE}
+  }}
+"""
+
+SINGLE_CALL_SYSTEM_PROMPT = f"""
+You are a Decision Integrity Audit Engine.
+Your task is to analyze a decision and synthesize a final audit report in a single pass, without offering advice.
+{ANALYSIS_INSTRUCTIONS}
+5. Report, synthesized from the analyses above:
+   - key_assumptions: Top 3 critical assumptions.
+   - missing_information: What crucial data is the user not seeing?
+   - reflection_questions: 3-5 deep questions to prompt self-reflection. They MUST be questions,
+     e.g. "Have you considered...?", never "You should focus on...".
+{CONSTRAINTS}
+Structure the response exactly like this:
+  {{{ANALYSIS_STRUCTURE},
+    "key_assumptions": ["..."],
+    "missing_information": ["..."],
+    "reflection_questions": ["...?"]
+  }}
+"""
+
+def build_user_prompt(input_data: DecisionInput) -> str:
+    return f"""
+    Domain: {input_data.domain}
+    Time Horizon: {input_data.time_horizon}
+    User Values: {', '.join(input_data.values) if input_data.values else 'Not provided'}
+    
+    Decision Text:
+    "{input_data.decision_text}"
+    """
+
+async def analyze_decision(input_data: DecisionInput) -> FusedAnalysisOutput:
+    """
+    Decomposition, bias detection, simulation and integrity check in one LLM call.
+    """
+    return await get_llm_response(
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=build_user_prompt(input_data),
+        response_model=FusedAnalysisOutput
+    )
+
+async def audit_in_single_call(input_data: DecisionInput) -> ReportOutput:
+    """
+    The whole audit, analyses and report narrative, in one LLM call.
+    Scores are computed locally as in the staged pipeline.
+    """
+    result = await get_llm_response(
+        system_prompt=SINGLE_CALL_SYSTEM_PROMPT,
+        user_prompt=build_user_prompt(input_data),
+        response_model=FusedReportOutput
+    )
+    return build_report(
+        result.decomposition,
+        result.bias_analysis,
+        result.simulation,
+        result.integrity_analysis,
+        result
+    )
@@ -27,7 +27,14 @@ CONSTRAINT:
   }
 """
 
-def check_integrity(input_data: DecisionInput) -> IntegrityOutput:
+# Documented neutral result for when the user states no values (see SYSTEM_PROMPT)
+NEUTRAL_RESULT = IntegrityOutput(alignment_score=100.0, conflicts=[])
+
+async def check_integrity(input_data: DecisionInput) -> IntegrityOutput:
+    if not input_data.values:
+        # Nothing to compare against: skip the LLM call
+        return NEUTRAL_RESULT.model_copy(deep=True)
+
     user_prompt = f"""
     Domain: {input_data.domain}
     
@@ -38,7 +45,7 @@ def check_integrity(input_data: DecisionInput) -> IntegrityOutput:
     "{', '.join(input_data.values) if input_data.values else 'Not provided'}"
     """
     
-    return get_llm_response(
+    return await get_llm_response(
         system_prompt=SYSTEM_PROMPT,
         user_prompt=user_prompt,
         response_model=IntegrityOutput
@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from .schemas import DecisionInput, AuditJobStatus
+from .pipeline import iter_audit, PipelineError, DEFAULT_PIPELINE_MODE
+from .llm_cache import cache_bypass
+from .scheduler import request_priority, current_tenant
+from .audit_history import audit_history
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+# Empty path keeps jobs in memory only
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(".cache", "jobs.sqlite3"))
+# Finished jobs are kept this long for polling, then dropped
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at JOB_QUEUE_MAX."""
+
+
+class JobStore:
+    """Job records in memory, optionally mirrored to SQLite so they survive restarts."""
+
+    def __init__(self, path: Optional[str] = JOB_STORE_PATH):
+        self._jobs: Dict[str, dict] = {}
+        # The job dict is used from the event loop; its lock is never held during SQLite I/O
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        # Opened (and its jobs loaded) by JobQueue.start or the first write, not on construction
+        self.path = path or None
+
+    def open(self) -> None:
+        """Connects and loads the stored jobs once. Blocking: call it off the event loop."""
+        with self._db_lock:
+            if self._db is not None or not self.path:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                    "updated_at REAL NOT NULL, record TEXT NOT NULL)"
+                )
+                db.commit()
+                self._load(db)
+                self._db = db
+            except sqlite3.Error as e:
+                print(f"Warning: job store unavailable ({self.path}): {e}")
+                self.path = None
+
+    def _load(self, db: sqlite3.Connection) -> None:
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        db.execute("DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?", (cutoff,))
+        db.commit()
+        jobs = [json.loads(record) for (record,) in db.execute("SELECT record FROM jobs")]
+        with self._lock:
+            for job in jobs:
+                self._jobs.setdefault(job["job_id"], job)
+
+    def _remember(self, job: dict) -> None:
+        job["updated_at"] = time.time()
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+
+    def _write(self, job: dict) -> None:
+        self.open()
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO jobs (id, status, updated_at, record) VALUES (?, ?, ?, ?)",
+                    (job["job_id"], job["status"], job["updated_at"], json.dumps(job))
+                )
+                self._db.commit()
+
+    def _delete(self, job_ids: List[str]) -> None:
+        with self._db_lock:
+            if self._db is not None and job_ids:
+                self._db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+                self._db.commit()
+
+    def put(self, job: dict) -> None:
+        self._remember(job)
+        self._write(job)
+
+    async def aput(self, job: dict) -> None:
+        """put() for the event loop: the job is visible at once, the SQLite write runs in a worker thread."""
+        self._remember(job)
+        if self.path is not None:
+            # Awaited, so the caller does not change the job while it is serialized
+            await asyncio.to_thread(self._write, job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def unfinished(self) -> List[dict]:
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job["status"] in ("queued", "running")]
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def _forget_expired(self) -> List[str]:
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in ("completed", "failed") and job["updated_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return expired
+
+    def prune(self) -> None:
+        self._delete(self._forget_expired())
+
+    async def aprune(self) -> None:
+        expired = self._forget_expired()
+        if expired and self.path is not None:
+            await asyncio.to_thread(self._delete, expired)
+
+
+class JobQueue:
+    """
+    In-process worker pool that runs audits in the background. Submitting
+    returns immediately; callers poll the job record for partial stage
+    results and the final report.
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS, max_queued: int = JOB_QUEUE_MAX):
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        await asyncio.to_thread(self.store.open)
+        # Jobs interrupted by a restart run again from the start
+        for job in self.store.unfinished():
+            job["status"] = "queued"
+            job["stages"] = {}
+            await self.store.aput(job)
+            self._queue.put_nowait(job["job_id"])
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self,
+        input_data: DecisionInput,
+        mode: str = DEFAULT_PIPELINE_MODE,
+        no_cache: bool = False,
+        tenant: str = "default"
+    ) -> dict:
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running.")
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFullError(f"Job queue is full ({self.max_queued} queued).")
+
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": now,
+            "updated_at": now,
+            "mode": mode,
+            "no_cache": no_cache,
+            "tenant": tenant,
+            "input": input_data.model_dump(),
+            "stages": {},
+            "report": None,
+            "error": None,
+        }
+        await self.store.aput(job)
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    def status(self, job_id: str) -> Optional[AuditJobStatus]:
+        job = self.store.get(job_id)
+        return AuditJobStatus(**job) if job else None
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self.store.get(job_id)
+                if job is not None and job["status"] == "queued":
+                    await self._run(job)
+                await self.store.aprune()
+            except Exception as e:
+                print(f"Job worker error ({job_id}): {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: dict) -> None:
+        cache_bypass.set(job["no_cache"])
+        request_priority.set("background")
+        current_tenant.set(job.get("tenant", "default"))
+        job["status"] = "running"
+        await self.store.aput(job)
+        input_data = DecisionInput(**job["input"])
+        try:
+            async for name, output in iter_audit(input_data, job["mode"]):
+                if name == "report":
+                    await audit_history.arecord(input_data, output, job["mode"])
+                    job["report"] = output.model_dump()
+                else:
+                    job["stages"][name] = output.model_dump()
+                await self.store.aput(job)
+            job["status"] = "completed"
+        except PipelineError as e:
+            job["status"] = "failed"
+            job["error"] = {"detail": str(e), "stages": {name: err.message for name, err in e.errors.items()}}
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = {"detail": str(e)}
+        await self.store.aput(job)
+
+
+job_queue = JobQueue(JobStore())
@@ -0,0 +1,213 @@
+"""
+Tolerant parsing of LLM JSON. Before a response is rejected, common drift is
+repaired locally: truncated output, markdown fences, key case ("RiskTolerance",
+"risk-tolerance"), known aliases ("type" for "bias_type") and shapes that are
+one wrapper off from the schema (a missing "scenarios" object, an extra
+{"analysis": {...}} envelope, a bare list). No LLM call is involved.
+"""
+import re
+import json
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+# Alternative names seen in responses -> schema field. Only applied when the
+# target model has that field and the response did not already use it.
+ALIASES: Dict[str, str] = {
+    "type": "bias_type",
+    "bias": "bias_type",
+    "bias_name": "bias_type",
+    "quote": "evidence",
+    "reason": "conflict_reason",
+    "conflict": "conflict_reason",
+    "score": "alignment_score",
+    "alignment": "alignment_score",
+    "goal": "objective",
+    "best": "best_case",
+    "best_case_scenario": "best_case",
+    "worst": "worst_case",
+    "worst_case_scenario": "worst_case",
+    "most_likely_scenario": "most_likely",
+    "most_likely_case": "most_likely",
+    "long_term_implication": "long_term",
+    "long_term_implications": "long_term",
+    "questions": "reflection_questions",
+    "missing_info": "missing_information",
+    "emotions": "emotional_signals",
+    "irreversible": "irreversible_factors",
+}
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_NON_WORD = re.compile(r"[^0-9a-zA-Z]+")
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def snake_case(key: str) -> str:
+    key = _CAMEL_BOUNDARY.sub("_", key.strip())
+    return _NON_WORD.sub("_", key).strip("_").lower()
+
+
+def close_truncated(text: str) -> str:
+    """
+    Completes JSON that was cut off mid-stream: closes an open string, drops a
+    dangling key or trailing comma, then closes every open array/object.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+
+    if in_string:
+        text += "\\" if escaped else ""
+        text += '"'
+    text = text.rstrip()
+    if stack and stack[-1] == "}" and _ends_with_key(text):
+        # {"a": 1, "b"   or   {"a": 1, "b":   -> drop the key that has no value
+        text = re.sub(r',?\s*"(?:[^"\\]|\\.)*"\s*:?$', "", text)
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def _ends_with_key(text: str) -> bool:
+    """True when the last token is an object key with no value yet."""
+    if text.endswith(":"):
+        return True
+    # A string directly after "{" or "," inside an object is a key
+    return re.search(r'[{,]\s*"(?:[^"\\]|\\.)*"$', text) is not None
+
+
+def load_lenient(content: str) -> Any:
+    """json.loads, falling back to fence stripping and truncation repair."""
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as error:
+        text = _FENCE.sub("", content.strip())
+        start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+        if start < 0:
+            raise error
+        text = text[start:]
+        for candidate in (text, close_truncated(text)):
+            try:
+                return json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+        raise error
+
+
+def _model_type(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """(nested model class or None, whether the field is a list) for a field annotation."""
+    is_list = False
+    while True:
+        origin = typing.get_origin(annotation)
+        if origin is typing.Union:
+            args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+            annotation = args[0] if len(args) == 1 else Any
+        elif origin in (list, List):
+            is_list = True
+            annotation = (typing.get_args(annotation) or (Any,))[0]
+        else:
+            break
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, is_list
+
+
+def _field_name(key: str, fields: Dict[str, Any]) -> str:
+    """The schema field `key` most likely stands for (or its snake_case form)."""
+    if key in fields:
+        return key
+    name = snake_case(key)
+    if name not in fields and ALIASES.get(name) in fields:
+        return ALIASES[name]
+    return name
+
+
+def _rename_keys(data: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    renamed = {}
+    for key, value in data.items():
+        name = _field_name(key, fields)
+        # An exact match wins over a repaired one
+        if name not in renamed or key == name:
+            renamed[name] = value
+    return renamed
+
+
+def normalize(data: Any, model: Type[BaseModel]) -> Any:
+    """Reshapes `data` towards `model`'s schema; fields it cannot place are left alone."""
+    fields = model.model_fields
+
+    # A bare list for a model with exactly one list field: {"biases": [...]}
+    if isinstance(data, list):
+        list_fields = [name for name, field in fields.items() if _model_type(field.annotation)[1]]
+        if len(list_fields) != 1:
+            return data
+        data = {list_fields[0]: data}
+    if not isinstance(data, dict):
+        return data
+
+    data = _rename_keys(data, fields)
+
+    # One envelope around the real payload: {"analysis": {...}}
+    if not set(data) & set(fields) and len(data) == 1:
+        inner = next(iter(data.values()))
+        if isinstance(inner, (dict, list)):
+            return normalize(inner, model)
+
+    for name, field in fields.items():
+        nested, is_list = _model_type(field.annotation)
+        value = data.get(name)
+
+        if nested is not None and not is_list and value is None:
+            # Missing wrapper: the nested fields were returned at the top level
+            inner_fields = nested.model_fields
+            moved = [key for key in data if key not in fields and _field_name(key, inner_fields) in inner_fields]
+            if moved:
+                data[name] = value = {_field_name(key, inner_fields): data.pop(key) for key in moved}
+
+        if value is None:
+            continue
+        if is_list and not isinstance(value, list):
+            value = [value]
+        if nested is not None:
+            value = [normalize(item, nested) for item in value] if is_list else normalize(value, nested)
+        elif is_list:
+            # List[str] fields sometimes come back as objects with one text field
+            value = [_as_text(item) for item in value]
+        data[name] = value
+    return data
+
+
+def _as_text(item: Any) -> Any:
+    if isinstance(item, dict) and len(item) == 1:
+        inner = next(iter(item.values()))
+        if isinstance(inner, str):
+            return inner
+    return item
+
+
+def parse_model(content: str, response_model: Type[BaseModel]) -> Tuple[BaseModel, bool]:
+    """
+    Validates `content` against `response_model`, repairing it if needed.
+    Returns (result, repaired). Raises json.JSONDecodeError or
+    ValidationError when the response cannot be salvaged.
+    """
+    try:
+        return response_model.model_validate_json(content), False
+    except ValidationError:
+        pass
+
+    data = load_lenient(content)
+    return response_model.model_validate(normalize(data, response_model)), True
@@ -0,0 +1,251 @@
+"""
+Incremental JSON parsing for streamed completions. The parser is fed text
+chunks as tokens arrive and reports every value that has been closed so far,
+with its path; PartialValidator keeps the ones that validate against the
+matching part of the response model, so e.g. scenarios.best_case can be shown
+before worst_case has been generated.
+"""
+import json
+import typing
+from functools import lru_cache
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from .json_repair import normalize, _field_name, _model_type
+
+Path = Tuple[Union[str, int], ...]
+
+_WHITESPACE = " \t\r\n"
+_LITERAL_END = _WHITESPACE + ",]}"
+
+
+class _Container:
+    __slots__ = ("value", "key", "expect_key")
+
+    def __init__(self, value: Union[dict, list]):
+        self.value = value
+        self.key: Optional[str] = None
+        self.expect_key = isinstance(value, dict)
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for a single JSON document. feed() returns the (path, value)
+    pairs completed by the chunk, innermost first; a container is reported
+    when its closing bracket arrives. Text before the first "{" or "[" (a
+    markdown fence, say) is ignored. Malformed input stops the parser
+    quietly; the caller still validates the complete text at the end.
+    """
+
+    def __init__(self):
+        self._stack: List[_Container] = []
+        self._started = False
+        self._done = False
+        self._failed = False
+        self._string: Optional[List[str]] = None
+        self._escaped = False
+        self._literal: Optional[List[str]] = None
+
+    def _path(self) -> Path:
+        path = []
+        for container in self._stack:
+            if isinstance(container.value, dict):
+                path.append(container.key)
+            else:
+                path.append(len(container.value))
+        return tuple(path)
+
+    def _complete(self, value: Any, completed: List[Tuple[Path, Any]]) -> None:
+        if not self._stack:
+            self._done = True
+            completed.append(((), value))
+            return
+        parent = self._stack[-1]
+        completed.append((self._path(), value))
+        if isinstance(parent.value, dict):
+            parent.value[parent.key] = value
+            parent.key = None
+        else:
+            parent.value.append(value)
+
+    def _end_literal(self, completed: List[Tuple[Path, Any]]) -> None:
+        text = "".join(self._literal)
+        self._literal = None
+        self._complete(json.loads(text), completed)
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        completed: List[Tuple[Path, Any]] = []
+        if self._done or self._failed:
+            return completed
+        try:
+            for char in chunk:
+                if self._done:
+                    break
+                if self._string is not None:
+                    if self._escaped:
+                        self._escaped = False
+                    elif char == "\\":
+                        self._escaped = True
+                    elif char == '"':
+                        text = json.loads('"' + "".join(self._string) + '"')
+                        self._string = None
+                        parent = self._stack[-1] if self._stack else None
+                        if parent is not None and isinstance(parent.value, dict) and parent.expect_key:
+                            parent.key = text
+                            parent.expect_key = False
+                        else:
+                            self._complete(text, completed)
+                        continue
+                    self._string.append(char)
+                    continue
+
+                if self._literal is not None:
+                    if char not in _LITERAL_END:
+                        self._literal.append(char)
+                        continue
+                    self._end_literal(completed)
+
+                if not self._started:
+                    if char in "{[":
+                        self._started = True
+                    else:
+                        continue
+
+                if char in _WHITESPACE or char == ":":
+                    continue
+                if char == '"':
+                    self._string = []
+                elif char in "{[":
+                    self._stack.append(_Container({} if char == "{" else []))
+                elif char in "}]":
+                    container = self._stack.pop()
+                    self._complete(container.value, completed)
+                elif char == ",":
+                    if isinstance(self._stack[-1].value, dict):
+                        self._stack[-1].expect_key = True
+                else:
+                    self._literal = [char]
+        except (json.JSONDecodeError, IndexError, TypeError):
+            self._failed = True
+        return completed
+
+
+@lru_cache(maxsize=256)
+def _adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+class PartialValidator:
+    """
+    Maps values completed by IncrementalJSONParser onto `response_model` and
+    validates them. Reports scalar fields (at any depth, including items of
+    string lists) and whole items of model lists; containers whose parts were
+    already reported are skipped. Keys are matched leniently, as in json_repair.
+    """
+
+    def __init__(self, response_model: Type[BaseModel]):
+        self.response_model = response_model
+        self.parser = IncrementalJSONParser()
+
+    def _resolve(self, path: Path) -> Optional[Tuple[Path, Any]]:
+        """(canonical path, annotation) if `path` is a field worth reporting on its own."""
+        model: Optional[Type[BaseModel]] = self.response_model
+        annotation: Any = None
+        canonical: List[Union[str, int]] = []
+        for depth, part in enumerate(path):
+            if isinstance(part, str):
+                if model is None:
+                    return None
+                name = _field_name(part, model.model_fields)
+                if name not in model.model_fields:
+                    return None
+                annotation = model.model_fields[name].annotation
+                canonical.append(name)
+            else:
+                nested, is_list = _model_type(annotation)
+                if not is_list:
+                    return None
+                if nested is not None and depth < len(path) - 1:
+                    # Inside a list item model: reported whole when the item closes
+                    return None
+                annotation = nested if nested is not None else _list_item(annotation)
+                canonical.append(part)
+            nested, is_list = _model_type(annotation)
+            model = nested if nested is not None and not is_list else None
+
+        if not canonical:
+            return None
+        nested, is_list = _model_type(annotation)
+        if is_list or (nested is not None and isinstance(canonical[-1], str)):
+            # Lists and nested objects are covered by their parts
+            return None
+        return tuple(canonical), annotation
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """Validated (path, value) pairs completed by `chunk`, in completion order."""
+        updates = []
+        for path, value in self.parser.feed(chunk):
+            resolved = self._resolve(path)
+            if resolved is None:
+                continue
+            canonical, annotation = resolved
+            if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+                value = normalize(value, annotation)
+            try:
+                validated = _adapter(annotation).validate_python(value)
+            except ValidationError:
+                continue
+            if isinstance(validated, BaseModel):
+                validated = validated.model_dump()
+            updates.append((canonical, validated))
+        return updates
+
+
+class PartialStream:
+    """
+    Forwards the validated fields of one LLM call to a listener while the
+    call may take several attempts (retries, hedged duplicates, fallbacks,
+    corrections). One attempt owns the stream at a time: the first to
+    produce a field. Fields of other attempts are held back; if the owner
+    fails and another attempt takes over, `reset` is sent first, then that
+    attempt's fields so far, so the listener never mixes two responses.
+    """
+
+    def __init__(self, emit: Callable[[Path, Any], None], reset: Callable[[], None]):
+        self._emit = emit
+        self._reset = reset
+        self._owner: Optional[object] = None
+        self._emitted = False
+
+    @contextmanager
+    def attempt(self) -> Iterator[Callable[[Path, Any], None]]:
+        """The on_partial sink for one attempt; the attempt releases the stream when it ends."""
+        token = object()
+        fields: List[Tuple[Path, Any]] = []
+
+        def sink(path: Path, value: Any) -> None:
+            fields.append((path, value))
+            if self._owner is None:
+                self._owner = token
+                if self._emitted:
+                    self._reset()
+                for held in fields:
+                    self._emit(*held)
+                self._emitted = True
+            elif self._owner is token:
+                self._emit(path, value)
+
+        try:
+            yield sink
+        finally:
+            if self._owner is token:
+                self._owner = None
+
+
+def _list_item(annotation: Any) -> Any:
+    """Item type of a (possibly Optional) List annotation."""
+    while typing.get_origin(annotation) is typing.Union:
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+    return (typing.get_args(annotation) or (Any,))[0]
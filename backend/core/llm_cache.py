@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from contextvars import ContextVar
+from typing import Optional, Type
+from pydantic import BaseModel
+
+# Set per request (e.g. ?no_cache=true) to skip lookups and writes for every
+# LLM call made while handling it.
+cache_bypass: ContextVar[bool] = ContextVar("cache_bypass", default=False)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+# Empty path disables the on-disk tier
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "10000"))
+
+
+@lru_cache(maxsize=None)
+def schema_digest(response_model: Type[BaseModel]) -> str:
+    # Building the JSON schema costs milliseconds; models are fixed for the process
+    schema = json.dumps(response_model.model_json_schema(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(model: str, system_prompt: str, user_prompt: str, response_model: Type[BaseModel]) -> str:
+    """
+    Content address of one structured call. The response model's JSON schema is
+    part of the key so a schema change never serves stale shapes.
+    """
+    payload = json.dumps(
+        [model, system_prompt, user_prompt, schema_digest(response_model)],
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache of raw LLM JSON responses: a bounded in-memory LRU in front
+    of an optional SQLite store. Both tiers honour the same TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        path: Optional[str] = LLM_CACHE_PATH,
+        disk_max_entries: int = LLM_CACHE_DISK_MAX_ENTRIES
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        # The memory tier is used from the event loop; its lock is never held during SQLite I/O
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # The SQLite tier is opened on first use (or by startup), not on construction
+        self.path = path or None
+
+    def open(self) -> Optional[sqlite3.Connection]:
+        """The SQLite connection, opened on the first call. Blocking: call it off the event loop."""
+        with self._db_lock:
+            if self._db is None and self.path:
+                try:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    db = sqlite3.connect(self.path, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS llm_cache ("
+                        "key TEXT PRIMARY KEY, content TEXT NOT NULL, "
+                        "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache(created_at)")
+                    db.commit()
+                    self._db = db
+                except sqlite3.Error as e:
+                    print(f"Warning: LLM disk cache unavailable ({self.path}): {e}")
+                    self.path = None
+            return self._db
+
+    def _memory_get(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, content = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return content
+            del self._memory[key]
+            return None
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        content = None
+        row = None
+        if self.open() is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT content, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] <= now:
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    row = None
+            if row is not None:
+                content, expires_at = row
+                with self._lock:
+                    self._remember(key, expires_at, content)
+                    self.disk_hits += 1
+        if content is None:
+            with self._lock:
+                self.misses += 1
+        return content
+
+    def _disk_set(self, key: str, content: str, now: float, expires_at: float) -> None:
+        if self.open() is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, content, now, expires_at)
+            )
+            self._evict_disk(now)
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        content = self._memory_get(key, now)
+        return content if content is not None else self._disk_get(key, now)
+
+    def set(self, key: str, content: str) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, content)
+        self._disk_set(key, content, now, expires_at)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() for the event loop: memory hits answer inline, SQLite runs in a worker thread."""
+        now = time.time()
+        content = self._memory_get(key, now)
+        if content is not None:
+            return content
+        if self.path is None:
+            return self._disk_get(key, now)
+        return await asyncio.to_thread(self._disk_get, key, now)
+
+    async def aset(self, key: str, content: str) -> None:
+        """set() for the event loop; the SQLite write runs in a worker thread."""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, content)
+        if self.path is not None:
+            await asyncio.to_thread(self._disk_set, key, content, now, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.open() is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        disk_entries = None
+        if self.open() is not None:
+            with self._db_lock:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: str, expires_at: float, content: str) -> None:
+        self._memory[key] = (expires_at, content)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self, now: float) -> None:
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        overflow = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.disk_max_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY created_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            with self._lock:
+                self.evictions += overflow
+
+
+llm_cache = LLMCache() if LLM_CACHE_ENABLED else None
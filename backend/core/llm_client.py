@@ -1,82 +1,527 @@
 import os
 import json
-from typing import Type, TypeVar, Optional
-from pydantic import BaseModel
-from openai import OpenAI
-from dotenv import load_dotenv, find_dotenv
-
-# Try to find .env file
-dotenv_path = find_dotenv(usecwd=True)
-if not dotenv_path:
-    # Fallback: looks like we are in backend/core, try 2 levels up
-    potential_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), ".env")
-    if os.path.exists(potential_path):
-        dotenv_path = potential_path
-
-print(f"DEBUG: Loading .env from: {dotenv_path}")
-load_dotenv(dotenv_path)
+import time
+import asyncio
+import threading
+import importlib.util
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Collection, Type, TypeVar, Optional, Dict, List, Set, Tuple
+from pydantic import BaseModel, ValidationError
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+from .env import load_env
+from .llm_cache import llm_cache, cache_bypass, make_cache_key
+from .admission import DeadlineExceeded, within_deadline
+from .resilience import CircuitOpenError, get_breaker, get_latency_tracker, reset_provider_health, with_retries
+from .singleflight import SingleFlight
+from .json_repair import parse_model
+from .json_stream import PartialStream, PartialValidator
+from .scheduler import admit, settle, estimate_tokens, current_tenant, request_priority, reset_rate_limits
+from .model_router import model_router
+from .cassette import cassette
+from .metrics import (
+    current_stage, record_timing, LLM_CALL_DURATION, LLM_QUEUE_WAIT,
+    LLM_TOKENS, LLM_REQUESTS, LLM_RETRIES, LLM_PARSE_FAILURES, LLM_REPAIRS, PROMPT_TOKENS
+)
 
 T = TypeVar('T', bound=BaseModel)
 
-# Mock OpenAI client if key is missing (for safety/testing without key)
-class MockOpenAI:
-    def __init__(self, api_key=None):
-        self.api_key = api_key
-
-    def chat(self, *args, **kwargs):
-        raise ValueError("OpenAI API Key not found. Please set OPENAI_API_KEY in .env")
-
-# Initialize Client
-api_key = os.getenv("OPENAI_API_KEY")
-print(f"DEBUG: API Key loaded: {'Yes' if api_key else 'No'} (starts with {api_key[:5] if api_key else 'None'})")
-
-is_groq = api_key and api_key.startswith("gsk_")
-
-try:
-    if is_groq:
-        print("DEBUG: Detected Groq API Key. Using Groq base_url.")
-        client = OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
-    elif api_key:
-         client = OpenAI(api_key=api_key)
-    else:
-         client = None # Handle gracefully in calls
-except Exception as e:
-    print(f"Warning: OpenAI client failed to init: {e}")
-    client = None
-
-def get_llm_response(
+# Set by streaming endpoints: receives (stage, field path, value) for each field
+# of a response as soon as it is complete and valid, and (stage, None, None) when
+# a retry or fallback replaces the fields sent so far. Calls stream when it is set.
+partial_listener: ContextVar[Optional[Callable[[str, Tuple, Any], None]]] = ContextVar("partial_listener", default=None)
+
+LLM_FALLBACK_ENABLED = os.getenv("LLM_FALLBACK_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Re-requests with a corrective message when a response cannot be repaired locally
+LLM_REPAIR_RETRIES = int(os.getenv("LLM_REPAIR_RETRIES", "1"))
+
+# Shared keep-alive pool for every LLM call in the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes")
+
+def read_concurrency() -> Dict[str, int]:
+    # Max in-flight requests per provider; Groq's free tier rate-limits far earlier than OpenAI
+    return {
+        "groq": int(os.getenv("GROQ_MAX_CONCURRENCY", "4")),
+        "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    }
+
+
+PROVIDER_CONCURRENCY = read_concurrency()
+
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_semaphore(provider_name: str) -> asyncio.Semaphore:
+    """Per-provider concurrency limit, created on first use."""
+    if provider_name not in _semaphores:
+        _semaphores[provider_name] = asyncio.Semaphore(PROVIDER_CONCURRENCY[provider_name])
+    return _semaphores[provider_name]
+
+
+def build_http_client() -> "httpx.AsyncClient":
+    import httpx
+    from openai import DefaultAsyncHttpxClient
+
+    http2 = LLM_HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("Warning: LLM_HTTP2 is set but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+        http2 = False
+    return DefaultAsyncHttpxClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    )
+
+
+class Providers:
+    """
+    Provider keys, endpoints and default models from the environment, and one
+    AsyncOpenAI client per provider. The clients, and the openai SDK import,
+    are built on first use, normally during the app lifespan (see startup),
+    so importing the backend stays cheap. reload() re-reads .env and the
+    environment and replaces the clients (see there for what else it resets).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Optional[Dict[str, "AsyncOpenAI"]] = None
+        self.configure()
+
+    def configure(self) -> None:
+        # OPENAI_API_KEY may hold an OpenAI or a Groq (gsk_) key; GROQ_API_KEY adds Groq
+        # as a second provider so calls can fail over between the two.
+        api_key = os.getenv("OPENAI_API_KEY")
+        groq_api_key = os.getenv("GROQ_API_KEY")
+        keys = {}
+        if api_key:
+            keys["groq" if api_key.startswith("gsk_") else "openai"] = api_key
+        if groq_api_key and "groq" not in keys:
+            keys["groq"] = groq_api_key
+        self.keys: Dict[str, str] = keys
+        self.base_urls = {
+            "groq": os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+            # None lets the SDK apply OPENAI_BASE_URL or its default
+            "openai": os.getenv("OPENAI_BASE_URL") or None,
+        }
+        self.default_models = {
+            "groq": os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
+            "openai": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        }
+        # The provider OPENAI_API_KEY points at is primary; the other one is the fallback
+        self.primary: Optional[str] = next(iter(keys), None)
+
+    @property
+    def names(self) -> List[str]:
+        """Configured providers, primary first. Does not build the clients."""
+        return list(self.keys)
+
+    @property
+    def clients(self) -> Dict[str, "AsyncOpenAI"]:
+        if self._clients is None:
+            with self._lock:
+                if self._clients is None:
+                    self._clients = self._build()
+        return self._clients
+
+    def _build(self) -> Dict[str, "AsyncOpenAI"]:
+        from openai import AsyncOpenAI
+
+        clients = {}
+        for name, key in self.keys.items():
+            try:
+                # Retries and timeouts are handled per attempt in resilience.py
+                clients[name] = AsyncOpenAI(
+                    api_key=key, base_url=self.base_urls[name], http_client=build_http_client(), max_retries=0
+                )
+            except Exception as e:
+                print(f"Warning: {name} client failed to init: {e}")
+        return clients
+
+    async def connect(self, connections: int, timeout: float) -> Dict[str, str]:
+        """
+        Opens up to `connections` keep-alive connections per provider (DNS,
+        TCP and TLS) with cheap model-list requests, so the first audit does
+        not pay for them. Returns errors by provider.
+        """
+        from openai import APIStatusError
+
+        async def touch(client) -> None:
+            try:
+                await client.with_options(timeout=timeout).models.list()
+            except APIStatusError:
+                pass  # any HTTP answer means the connection is open
+
+        errors = {}
+        for name, client in (await asyncio.to_thread(lambda: self.clients)).items():
+            outcomes = await asyncio.gather(*(touch(client) for _ in range(connections)), return_exceptions=True)
+            failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+            if failures:
+                errors[name] = f"{type(failures[0]).__name__}: {failures[0]}"
+        return errors
+
+    async def warm_up(self, timeout: float) -> Dict[str, str]:
+        """One minimal JSON completion per provider's default model. Returns errors by provider."""
+        errors = {}
+        for name, client in (await asyncio.to_thread(lambda: self.clients)).items():
+            try:
+                await client.with_options(timeout=timeout).chat.completions.create(
+                    model=self.default_models[name],
+                    messages=[{"role": "user", "content": 'Reply with the JSON object {"ok": true}.'}],
+                    response_format={"type": "json_object"},
+                    temperature=0.0,
+                    max_tokens=10
+                )
+            except Exception as e:
+                errors[name] = f"{type(e).__name__}: {e}"
+        return errors
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, None
+        for client in (clients or {}).values():
+            await client.close()
+
+    async def reload(self) -> None:
+        """
+        Re-reads .env and the environment. Keys, endpoints, default models,
+        per-provider concurrency and rate limits take the new values; clients,
+        semaphores, rate-limit buckets, circuit breakers and latency trackers
+        start over. Calls already in flight finish on the old ones. Other
+        settings (timeouts, retries, cache, admission, stage routes) are read
+        once at import and need a restart.
+        """
+        load_env(override=True)
+        await self.aclose()
+        self.configure()
+        PROVIDER_CONCURRENCY.update(read_concurrency())
+        _semaphores.clear()
+        reset_rate_limits()
+        reset_provider_health()
+
+
+providers = Providers()
+
+
+def call_targets(
+    model: Optional[str],
+    stage: Optional[str] = None,
+    rejected: Collection[Tuple[str, str]] = ()
+) -> List[Tuple[str, str]]:
+    """
+    (provider, model) pairs to try in order: the primary provider with the
+    requested model, then the other provider with its default model. Without
+    an explicit model, a stage with a route (STAGE_MODELS_<STAGE>) tries its
+    candidates first, best first (see model_router), minus those `rejected`
+    for unusable output earlier in this call.
+    """
+    routed = model_router.route(stage, providers.names) if model is None and stage else []
+    routed = [target for target in routed if target not in rejected]
+    targets = routed + [
+        (name, model or providers.default_models[name]) for name in providers.names
+        if name == providers.primary and (name, model or providers.default_models[name]) not in routed
+    ]
+    if LLM_FALLBACK_ENABLED or not targets:
+        targets += [
+            (name, providers.default_models[name]) for name in providers.names
+            if name != providers.primary and (name, providers.default_models[name]) not in routed
+        ]
+    return targets
+
+
+async def stream_completion(
+    provider_name: str,
+    model: str,
+    messages: List[dict],
+    response_model: Type[BaseModel],
+    on_partial: Callable[[Tuple, Any], None]
+) -> Tuple[str, Any]:
+    """
+    Token-streamed completion. Fields of `response_model` are passed to
+    on_partial as they complete; returns (content, usage) like a plain call.
+    """
+    # OpenAI only reports usage on a stream when asked to
+    extra = {"stream_options": {"include_usage": True}} if provider_name == "openai" else {}
+    stream = await providers.clients[provider_name].chat.completions.create(
+        model=model,
+        messages=messages,
+        response_format={"type": "json_object"},
+        temperature=0.0,
+        stream=True,
+        **extra
+    )
+    validator = PartialValidator(response_model)
+    parts: List[str] = []
+    usage = None
+    async for chunk in stream:
+        usage = getattr(chunk, "usage", None) or usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            for path, value in validator.feed(delta):
+                on_partial(path, value)
+    return "".join(parts), usage
+
+
+async def create_completion(
+    provider_name: str,
+    model: str,
+    messages: List[dict],
+    response_model: Optional[Type[BaseModel]] = None,
+    on_partial: Optional[PartialStream] = None
+) -> str:
+    """
+    One provider/model with retries, optional hedging and its circuit breaker.
+    Returns the raw message content. With on_partial the completion is
+    streamed and validated fields of response_model are reported early.
+    """
+    stage = current_stage.get()
+    breaker = get_breaker(provider_name, model)
+    if not breaker.allow():
+        LLM_REQUESTS.inc(stage, provider_name, model, "circuit_open")
+        raise CircuitOpenError(f"Circuit open for {provider_name}/{model}")
+
+    prompt_tokens, estimated = estimate_tokens(messages, model)
+    PROMPT_TOKENS.observe(prompt_tokens, stage)
+
+    @asynccontextmanager
+    async def capacity():
+        # Every attempt (retries, hedges) counts against the RPM/TPM limits and
+        # the provider's concurrency; the wait ends at the request deadline
+        await within_deadline(admit(provider_name, model, estimated))
+        semaphore = get_semaphore(provider_name)
+        queued = time.perf_counter()
+        await within_deadline(semaphore.acquire())
+        try:
+            waited = time.perf_counter() - queued
+            LLM_QUEUE_WAIT.observe(waited, provider_name)
+            record_timing("queue_wait", waited)
+            yield
+        finally:
+            semaphore.release()
+
+    # Time the provider took on the winning attempt, without any capacity waits
+    provider_seconds = 0.0
+
+    async def attempt():
+        nonlocal provider_seconds
+        sent = time.perf_counter()
+        if on_partial is not None:
+            with on_partial.attempt() as sink:
+                result = await stream_completion(provider_name, model, messages, response_model, sink)
+        else:
+            completion = await providers.clients[provider_name].chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                temperature=0.0  # Deterministic
+            )
+            result = completion.choices[0].message.content, getattr(completion, "usage", None)
+        provider_seconds = time.perf_counter() - sent
+        return result
+
+    def on_retry(error: BaseException):
+        LLM_RETRIES.inc(provider_name, model)
+
+    started = time.perf_counter()
+    try:
+        content, usage = await with_retries(attempt, get_latency_tracker(provider_name, model), on_retry, capacity)
+    except (asyncio.CancelledError, DeadlineExceeded) as e:
+        # A cancelled call, or one cut off by the client's own deadline, says
+        # nothing about provider health; free a half-open probe
+        breaker.probing = False
+        LLM_REQUESTS.inc(stage, provider_name, model, "deadline" if isinstance(e, DeadlineExceeded) else "cancelled")
+        raise
+    except Exception:
+        breaker.record_failure()
+        LLM_REQUESTS.inc(stage, provider_name, model, "error")
+        raise
+    finally:
+        LLM_CALL_DURATION.observe(time.perf_counter() - started, stage, provider_name, model)
+    breaker.record_success()
+    LLM_REQUESTS.inc(stage, provider_name, model, "ok")
+    model_router.record_latency(stage, (provider_name, model), provider_seconds)
+
+    if usage is not None:
+        LLM_TOKENS.inc(stage, provider_name, model, "prompt", amount=usage.prompt_tokens or 0)
+        LLM_TOKENS.inc(stage, provider_name, model, "completion", amount=usage.completion_tokens or 0)
+    settle(provider_name, model, estimated, (usage.prompt_tokens or 0) + (usage.completion_tokens or 0) if usage else None)
+
+    if not content:
+        raise ValueError("Empty response from LLM")
+    return content
+
+
+# Identical calls already in flight (same model, prompts, schema and priority) share one provider request
+llm_flight = SingleFlight("llm_call", inherit=(current_stage, request_priority, current_tenant))
+
+
+async def complete_with_fallback(
+    model: Optional[str],
+    messages: List[Dict[str, str]],
+    response_model: Optional[Type[BaseModel]] = None,
+    on_partial: Optional[PartialStream] = None,
+    rejected: Collection[Tuple[str, str]] = (),
+    targets: Optional[List[Tuple[str, str]]] = None
+) -> Tuple[str, Tuple[str, str]]:
+    """
+    Content of the first target that answers, and that (provider, model).
+    `targets` are those already chosen by call_targets for this call, if any.
+    """
+    if cassette.replaying:
+        return await cassette.replay(model, messages, response_model, on_partial)
+    stage = current_stage.get()
+    if targets is None:
+        targets = call_targets(model, stage, rejected)
+    error: Optional[Exception] = None
+    for target in (target for target in targets if target not in rejected):
+        started = time.perf_counter()
+        try:
+            content = await create_completion(*target, messages, response_model, on_partial)
+        except DeadlineExceeded:
+            # No time left for a fallback either
+            raise
+        except Exception as e:
+            print(f"LLM Call Error ({target[0]}/{target[1]}): {e}")
+            error = e
+            continue
+        elapsed = time.perf_counter() - started
+        cassette.record(model, messages, target, content, elapsed)
+        return content, target
+    raise error
+
+
+def correction_message(error: Exception, response_model: Type[BaseModel]) -> str:
+    return (
+        f"Your previous response could not be used: {type(error).__name__}: {str(error)[:500]}\n"
+        "Reply again with ONLY a complete JSON object that matches this JSON schema exactly "
+        "(snake_case keys, no extra wrapper objects):\n"
+        f"{json.dumps(response_model.model_json_schema())}"
+    )
+
+
+async def fetch_validated(
     system_prompt: str,
     user_prompt: str,
     response_model: Type[T],
-    model: str = "llama-3.3-70b-versatile" if is_groq else "gpt-4o-mini"
+    model: Optional[str],
+    targets: List[Tuple[str, str]],
+    use_cache: bool,
+    on_partial: Optional[PartialStream] = None
+) -> T:
+    """
+    Provider call with fallback, then validation. Malformed responses are
+    repaired locally where possible (see json_repair). Otherwise a routed
+    stage moves on to its next candidate model; failing that, only this
+    call is retried, with the validation error fed back to the model.
+    With use_cache the result is cached under the model that produced it.
+    """
+    stage = current_stage.get()
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+    rejected: Set[Tuple[str, str]] = set()
+    attempt = 0
+    while True:
+        content, target = await complete_with_fallback(model, messages, response_model, on_partial, rejected, targets)
+        try:
+            result, repaired = parse_model(content, response_model)
+            model_router.record_outcome(stage, target, True)
+            break
+        except (json.JSONDecodeError, ValidationError) as e:
+            model_router.record_outcome(stage, target, False)
+            LLM_PARSE_FAILURES.inc(stage, "json" if isinstance(e, json.JSONDecodeError) else "validation")
+            if model is None and model_router.has_alternative(stage, providers.names, rejected | {target}):
+                print(f"Unusable LLM response from {target[0]}/{target[1]}, trying the next model")
+                rejected.add(target)
+                messages = messages[:2]
+                continue
+            if attempt == LLM_REPAIR_RETRIES:
+                raise
+            attempt += 1
+            LLM_REPAIRS.inc(stage, "retried")
+            print(f"Unusable LLM response ({type(e).__name__}), retrying with a correction")
+            messages = messages[:2] + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": correction_message(e, response_model)},
+            ]
+
+    if repaired:
+        LLM_REPAIRS.inc(stage, "repaired")
+        content = result.model_dump_json()
+    if use_cache:
+        await llm_cache.aset(make_cache_key(target[1], system_prompt, user_prompt, response_model), content)
+    return result
+
+
+async def get_llm_response(
+    system_prompt: str,
+    user_prompt: str,
+    response_model: Type[T],
+    model: Optional[str] = None,
+    use_cache: bool = True,
+    stream: Optional[bool] = None
 ) -> T:
     """
     Generic wrapper for structured LLM calls.
     Enforces JSON mode and Pydantic validation.
+    Calls are deterministic (temperature 0), so validated responses are cached
+    unless use_cache is False or the request set cache_bypass, and concurrent
+    identical calls are coalesced into one.
+    model defaults to the primary provider's model; if the primary provider
+    fails or its circuit is open, the other configured provider is tried.
+    stream=True (the default while a partial_listener is set) streams tokens
+    and reports each completed, valid field to the listener before the whole
+    response has arrived.
     """
-    if not client:
+    if not providers.names and not cassette.replaying:
         # Return a dummy response for testing if no client (OR RAISE ERROR)
         # For production readiness, we should probably raise an error
         raise ValueError("OpenAI API Key is missing. Please set OPENAI_API_KEY environment variable.")
 
+    # Routed once per call: the cache key is for the model that will be asked first
+    targets = call_targets(model, current_stage.get())
+    key = make_cache_key(targets[0][1] if targets else model, system_prompt, user_prompt, response_model)
+    # Recording has to reach the provider, and a replay must only serve the cassette
+    cacheable = use_cache and llm_cache is not None and not cache_bypass.get() and not cassette.active
+    if cacheable:
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            return response_model.model_validate_json(cached)
+
+    listener = partial_listener.get()
+    on_partial = None
+    if stream or (stream is None and listener is not None):
+        stage = current_stage.get()
+        on_partial = PartialStream(
+            lambda path, value: listener(stage, path, value), lambda: listener(stage, None, None)
+        ) if listener is not None else PartialStream(lambda path, value: None, lambda: None)
+
     try:
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.0  # Deterministic
+        if listener is not None and on_partial is not None:
+            # Partial fields go to this caller's listener only, so a streamed call is not shared
+            return await fetch_validated(system_prompt, user_prompt, response_model, model, targets, cacheable, on_partial)
+        # Calls are only shared within one tenant (its rate budget pays for them) and priority
+        result = await llm_flight.do(
+            f"{key}:{request_priority.get()}:{current_tenant.get()}:{cacheable}", lambda: fetch_validated(
+                system_prompt, user_prompt, response_model, model, targets, cacheable, on_partial
+            )
         )
-        
-        content = completion.choices[0].message.content
-        if not content:
-            raise ValueError("Empty response from LLM")
-            
-        data = json.loads(content)
-        return response_model(**data)
-        
+        # Every waiter gets its own copy of the shared result
+        return result.model_copy(deep=True)
+
     except Exception as e:
         print(f"LLM Call Error: {e}")
         raise e
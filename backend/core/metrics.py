@@ -0,0 +1,180 @@
+"""
+Minimal in-process metrics with Prometheus text exposition, so /metrics
+works without extra dependencies.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Name of the pipeline stage the current task is running, for labelling LLM calls
+current_stage: ContextVar[str] = ContextVar("current_stage", default="none")
+
+# Per-request breakdown of stage -> seconds; None unless the request asked for it
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {bucket_count}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+AUDIT_DURATION = Histogram(
+    "secondbrain_audit_duration_seconds", "End-to-end audit wall time.", ["mode", "status"]
+)
+STAGE_DURATION = Histogram(
+    "secondbrain_stage_duration_seconds", "Wall time of one pipeline stage.", ["stage"]
+)
+STAGE_ERRORS = Counter(
+    "secondbrain_stage_errors_total", "Pipeline stages that failed or timed out.", ["stage", "reason"]
+)
+LLM_CALL_DURATION = Histogram(
+    "secondbrain_llm_call_duration_seconds", "Wall time of one provider call including retries.", ["stage", "provider", "model"]
+)
+LLM_QUEUE_WAIT = Histogram(
+    "secondbrain_llm_queue_wait_seconds", "Time spent waiting for a provider concurrency slot.", ["provider"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+LLM_RATE_LIMIT_WAIT = Histogram(
+    "secondbrain_llm_rate_limit_wait_seconds", "Time spent waiting for RPM/TPM capacity.", ["provider", "priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+LLM_TOKENS = Counter(
+    "secondbrain_llm_tokens_total", "Tokens reported by the provider.", ["stage", "provider", "model", "kind"]
+)
+LLM_REQUESTS = Counter(
+    "secondbrain_llm_requests_total", "Provider calls by outcome.", ["stage", "provider", "model", "outcome"]
+)
+LLM_RETRIES = Counter(
+    "secondbrain_llm_retries_total", "Retried provider attempts.", ["provider", "model"]
+)
+LLM_PARSE_FAILURES = Counter(
+    "secondbrain_llm_parse_failures_total", "Responses that were not valid JSON or failed schema validation.", ["stage", "kind"]
+)
+LLM_REPAIRS = Counter(
+    "secondbrain_llm_repairs_total", "Malformed responses fixed locally (repaired) or re-requested with a correction (retried).", ["stage", "kind"]
+)
+TENANT_TOKENS = Counter(
+    "secondbrain_tenant_tokens_total", "Tokens spent per tenant (X-Tenant-ID).", ["tenant"]
+)
+REQUESTS_SHED = Counter(
+    "secondbrain_requests_shed_total", "Audits rejected or abandoned before completion.", ["reason"]
+)
+PROMPT_TOKENS = Histogram(
+    "secondbrain_prompt_tokens", "Prompt tokens per call, counted locally before dispatch.", ["stage"],
+    buckets=(100, 250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+)
+INPUTS_COMPACTED = Counter(
+    "secondbrain_inputs_compacted_total", "Decision texts cut down to the prompt token budget.", ["model"]
+)
+NEAR_DUPLICATE_REUSES = Counter(
+    "secondbrain_near_duplicate_reuses_total", "Audits answered partly (cheap) or fully (all) from a near-duplicate past audit.", ["scope"]
+)
+MODEL_ROUTES = Counter(
+    "secondbrain_model_routes_total", "First-choice model per routed call and why it was chosen.", ["stage", "target", "reason"]
+)
+COALESCED_CALLS = Counter(
+    "secondbrain_coalesced_calls_total", "Calls that joined an identical in-flight call instead of starting one.", ["scope"]
+)
+
+REGISTRY = [
+    AUDIT_DURATION, STAGE_DURATION, STAGE_ERRORS,
+    LLM_CALL_DURATION, LLM_QUEUE_WAIT, LLM_RATE_LIMIT_WAIT, LLM_TOKENS, LLM_REQUESTS, LLM_RETRIES, LLM_PARSE_FAILURES,
+    LLM_REPAIRS, TENANT_TOKENS, PROMPT_TOKENS, INPUTS_COMPACTED, COALESCED_CALLS, REQUESTS_SHED,
+    NEAR_DUPLICATE_REUSES, MODEL_ROUTES,
+]
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Adds to the per-request breakdown if the current request asked for one."""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Formats a breakdown as a Server-Timing header (durations in ms)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def render_metrics(extra_lines: Sequence[str] = ()) -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,133 @@
+"""
+Per-stage model routing. A stage can list candidate provider/models, e.g.
+STAGE_MODELS_DECOMPOSITION=groq/llama-3.1-8b-instant,groq/llama-3.3-70b-versatile.
+The router learns each candidate's latency and schema-validation success rate
+for that stage and sends calls to the fastest candidate that meets
+MODEL_QUALITY_FLOOR; the other candidates follow as fallbacks. Stages
+without a list use the default model.
+"""
+import os
+import random
+from collections import deque
+from typing import Collection, Dict, List, Optional, Tuple
+
+from .metrics import MODEL_ROUTES
+
+# Minimum share of a candidate's responses that must validate (after local repair)
+MODEL_QUALITY_FLOOR = float(os.getenv("MODEL_QUALITY_FLOOR", "0.9"))
+# Calls observed before a candidate's latency and success rate are trusted
+MODEL_ROUTER_MIN_SAMPLES = int(os.getenv("MODEL_ROUTER_MIN_SAMPLES", "10"))
+# Share of calls sent to another candidate to keep its numbers current
+MODEL_ROUTER_EXPLORE = float(os.getenv("MODEL_ROUTER_EXPLORE", "0.05"))
+MODEL_ROUTER_WINDOW = 100
+
+Target = Tuple[str, str]
+
+
+def parse_targets(value: str) -> List[Target]:
+    """"groq/llama-3.1-8b-instant, openai/gpt-4o-mini" -> [(provider, model), ...]"""
+    targets = []
+    for item in value.split(","):
+        provider, _, model = item.strip().partition("/")
+        if not model:
+            if provider:
+                print(f"Warning: ignoring model route '{item.strip()}' (expected provider/model)")
+            continue
+        targets.append((provider.lower(), model))
+    return targets
+
+
+STAGE_MODELS: Dict[str, List[Target]] = {
+    key[len("STAGE_MODELS_"):].lower(): parse_targets(value)
+    for key, value in os.environ.items() if key.startswith("STAGE_MODELS_")
+}
+
+
+class ModelStats:
+    """Rolling latency and validation outcomes of one model on one stage."""
+
+    def __init__(self, window: int = MODEL_ROUTER_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        if len(self.outcomes) < MODEL_ROUTER_MIN_SAMPLES:
+            return None
+        return sum(self.outcomes) / len(self.outcomes)
+
+    @property
+    def p50(self) -> Optional[float]:
+        if len(self.latencies) < MODEL_ROUTER_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[len(ordered) // 2]
+
+
+class ModelRouter:
+    def __init__(self, routes: Dict[str, List[Target]] = STAGE_MODELS):
+        self.routes = routes
+        self._stats: Dict[Tuple[str, str, str], ModelStats] = {}
+
+    def stats(self, stage: str, target: Target) -> ModelStats:
+        key = (stage, *target)
+        if key not in self._stats:
+            self._stats[key] = ModelStats()
+        return self._stats[key]
+
+    def record_latency(self, stage: str, target: Target, seconds: float) -> None:
+        if stage in self.routes:
+            self.stats(stage, target).latencies.append(seconds)
+
+    def record_outcome(self, stage: str, target: Target, valid: bool) -> None:
+        if stage in self.routes:
+            self.stats(stage, target).outcomes.append(valid)
+
+    def has_alternative(self, stage: str, providers: Collection[str], rejected: Collection[Target]) -> bool:
+        return any(
+            target[0] in providers and target not in rejected for target in self.routes.get(stage, [])
+        )
+
+    def route(self, stage: str, providers: Collection[str]) -> List[Target]:
+        """
+        Candidates for `stage` among the configured `providers`, best first:
+        unmeasured ones in configured order (so each gets samples), then the
+        rest fastest first, then those below the quality floor, best rate
+        first. Empty when the stage has no route.
+        """
+        candidates = [target for target in self.routes.get(stage, []) if target[0] in providers]
+        if not candidates:
+            return []
+
+        eligible, below = [], []
+        for target in candidates:
+            rate = self.stats(stage, target).success_rate
+            if rate is not None and rate < MODEL_QUALITY_FLOOR:
+                below.append(target)
+            else:
+                eligible.append(target)
+
+        def speed(target: Target) -> Tuple[int, float]:
+            p50 = self.stats(stage, target).p50
+            return (0, 0.0) if p50 is None else (1, p50)
+
+        eligible.sort(key=speed)
+        below.sort(key=lambda target: -self.stats(stage, target).success_rate)
+        ordered = eligible + below
+        reason = "fastest" if eligible else "below_floor"
+        if len(ordered) > 1 and random.random() < MODEL_ROUTER_EXPLORE:
+            # Occasionally lead with another candidate, so a slow or failing one can recover
+            ordered.insert(0, ordered.pop(random.randrange(1, len(ordered))))
+            reason = "explore"
+        MODEL_ROUTES.inc(stage, "/".join(ordered[0]), reason)
+        return ordered
+
+    def state(self) -> Dict[Tuple[str, str], Dict[str, Optional[float]]]:
+        """Success rate and median latency per (stage, provider/model), for /metrics."""
+        return {
+            (stage, f"{provider}/{model}"): {"success_rate": stats.success_rate, "p50": stats.p50}
+            for (stage, provider, model), stats in self._stats.items()
+        }
+
+
+model_router = ModelRouter()
@@ -0,0 +1,107 @@
+"""
+MinHash signatures and LSH band keys for near-duplicate decision texts. A
+fixed typo or reordered sentences leave most character shingles unchanged,
+so the estimated Jaccard similarity stays high where an exact cache key
+would miss. The index itself lives in the audit history database (see
+audit_history.find_similar); this module only does the hashing.
+"""
+import os
+import re
+import zlib
+import hashlib
+from array import array
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from .schemas import DecisionInput
+
+# off: never reuse; cheap: reuse the stages that do not quote the text; all: reuse the whole report
+NEAR_DUPLICATE_REUSE = os.getenv("NEAR_DUPLICATE_REUSE", "off").lower()
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+# Candidates checked per lookup; templated batches can fill one bucket with many audits
+NEAR_DUPLICATE_MAX_CANDIDATES = int(os.getenv("NEAR_DUPLICATE_MAX_CANDIDATES", "200"))
+
+# Bias evidence quotes the text and the report narrative builds on it, so
+# "cheap" reuse keeps only the stages whose output survives small edits
+CHEAP_STAGES = ("decomposition", "simulation", "integrity_analysis")
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+# 16 bands of 4 rows: a pair at Jaccard 0.85 shares a band with probability
+# ~1.0, a pair at 0.5 with ~0.64 (then rejected by the signature estimate)
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# One-permutation hashing: each shingle hash picks one of NUM_PERM bins by
+# its top bits and the bin keeps the smallest remainder. One pass over the
+# shingles instead of NUM_PERM, which keeps long texts to about a millisecond.
+_BIN_BITS = (NUM_PERM - 1).bit_length()
+_VALUE_BITS = 64 - _BIN_BITS
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+_MIX = 0x9E3779B97F4A7C15  # Fibonacci hashing spreads crc32 over 64 bits
+_MASK_64 = (1 << 64) - 1
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def partition_key(input_data: DecisionInput) -> str:
+    """Only audits with the same domain, time horizon and values may reuse each other."""
+    values = sorted({value.strip().lower() for value in input_data.values or [] if value.strip()})
+    return "|".join([input_data.domain.strip().lower(), input_data.time_horizon.strip().lower(), *values])
+
+
+@lru_cache(maxsize=256)
+def _signature(text: str) -> Tuple[int, ...]:
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    bins: List[Optional[int]] = [None] * NUM_PERM
+    for shingle in shingles:
+        h = (zlib.crc32(shingle.encode("utf-8")) * _MIX) & _MASK_64
+        index, value = h >> _VALUE_BITS, h & _VALUE_MASK
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    if all(value is None for value in bins):
+        return (0,) * NUM_PERM
+
+    # Empty bins (short texts) borrow from the next filled bin, offset by the
+    # distance so they only match a bin that borrowed the same way
+    sig = []
+    for index in range(NUM_PERM):
+        distance = 0
+        while bins[(index + distance) % NUM_PERM] is None:
+            distance += 1
+        sig.append((bins[(index + distance) % NUM_PERM] + (distance << _VALUE_BITS)) & _MASK_64)
+    return tuple(sig)
+
+
+def signature(input_data: DecisionInput) -> Tuple[int, ...]:
+    """MinHash of the normalized decision text (cached, as lookup and insert hash the same text)."""
+    return _signature(normalize_text(input_data.decision_text))
+
+
+def band_keys(partition: str, sig: Tuple[int, ...]) -> List[int]:
+    """One 63-bit key per band, scoped to the partition; equal keys make two audits candidates."""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(f"{partition}|{band}|{rows}".encode("utf-8"), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big") >> 1)
+    return keys
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity: the share of matching MinHash values."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def pack(sig: Tuple[int, ...]) -> bytes:
+    return array("Q", sig).tobytes()
+
+
+def unpack(blob: bytes) -> Tuple[int, ...]:
+    return tuple(array("Q", blob))
@@ -0,0 +1,411 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from typing import Dict, Any, AsyncIterator, Optional, Set, Tuple
+
+from .schemas import DecisionInput, ReportOutput, AuditRecord
+from .decision_decomposer import decompose_decision
+from .bias_detector import detect_biases
+from .counterfactual_simulator import simulate_scenarios
+from .integrity_checker import check_integrity
+from .report_generator import generate_report
+from .fused_analyzer import analyze_decision, audit_in_single_call
+from .metrics import (
+    current_stage, record_timing, STAGE_DURATION, STAGE_ERRORS, AUDIT_DURATION, INPUTS_COMPACTED,
+    NEAR_DUPLICATE_REUSES
+)
+from .llm_cache import cache_bypass
+from .singleflight import SingleFlight
+from .scheduler import current_tenant, request_priority
+from .admission import bounded_timeout, remaining_time, DeadlineExceeded
+from .resilience import LatencyTracker
+from .llm_client import providers
+from .token_budget import compact_input
+from .audit_history import audit_history
+from .near_duplicates import NEAR_DUPLICATE_REUSE, NEAR_DUPLICATE_THRESHOLD, CHEAP_STAGES
+
+# The four analysis stages only read the DecisionInput, never each other's
+# output, so they are fanned out concurrently and joined by the report.
+# Keys match the detail fields on ReportOutput.
+STAGES = {
+    "decomposition": decompose_decision,
+    "bias_analysis": detect_biases,
+    "simulation": simulate_scenarios,
+    "integrity_analysis": check_integrity,
+}
+
+# DecisionInput fields each stage's prompt reads; a stage only has to be
+# recomputed when one of these changes
+STAGE_DEPENDENCIES = {
+    "decomposition": {"decision_text", "domain", "time_horizon", "values"},
+    "bias_analysis": {"decision_text", "domain"},
+    "simulation": {"decision_text", "domain", "time_horizon"},
+    "integrity_analysis": {"decision_text", "domain", "values"},
+}
+
+
+def invalidated_stages(previous: DecisionInput, current: DecisionInput) -> Set[str]:
+    changed = {
+        field for field in DecisionInput.model_fields
+        if getattr(previous, field) != getattr(current, field)
+    }
+    return {name for name, fields in STAGE_DEPENDENCIES.items() if fields & changed}
+
+# staged: one LLM call per stage plus the report (5 calls)
+# fused:  one combined analysis call plus the report (2 calls)
+# single: analyses and report in one call
+PIPELINE_MODES = ("staged", "fused", "single")
+DEFAULT_PIPELINE_MODE = os.getenv("PIPELINE_MODE", "staged")
+
+DEFAULT_STAGE_TIMEOUT = float(os.getenv("STAGE_TIMEOUT_SECONDS", "60"))
+
+# Per-stage override, e.g. STAGE_TIMEOUT_SIMULATION=90
+STAGE_TIMEOUTS = {
+    name: float(os.getenv(f"STAGE_TIMEOUT_{name.upper()}", DEFAULT_STAGE_TIMEOUT))
+    for name in list(STAGES) + ["report", "fused", "single"]
+}
+
+
+class StageError(Exception):
+    """Raised when a single pipeline stage fails or times out."""
+
+    def __init__(self, stage: str, message: str, timed_out: bool = False):
+        self.stage = stage
+        self.message = message
+        self.timed_out = timed_out
+        super().__init__(f"{stage}: {message}")
+
+
+class PipelineError(Exception):
+    """Collects the errors of every stage that failed in one audit."""
+
+    def __init__(self, errors: Dict[str, StageError]):
+        self.errors = errors
+        super().__init__("; ".join(str(e) for e in errors.values()))
+
+
+# Recent successful durations per stage, to tell when a deadline cannot be met
+_stage_latencies: Dict[str, LatencyTracker] = {}
+
+
+def check_deadline(name: str) -> float:
+    """The stage's timeout bounded by the request deadline; fails fast when too little time is left."""
+    try:
+        timeout = bounded_timeout(STAGE_TIMEOUTS[name])
+    except DeadlineExceeded:
+        raise StageError(name, "request deadline exceeded", timed_out=True)
+    remaining = remaining_time()
+    tracker = _stage_latencies.get(name)
+    typical = tracker.percentile(0.5) if tracker is not None else None
+    if remaining is not None and typical is not None and remaining < typical:
+        raise StageError(name, f"deadline cannot be met ({remaining:.1f}s left, stage usually takes {typical:.1f}s)", timed_out=True)
+    return timeout
+
+
+async def run_stage(name: str, func, *args) -> Any:
+    """
+    Awaits one stage coroutine under its own timeout (shortened to the request
+    deadline, if any), recording its wall time.
+    """
+    try:
+        timeout = check_deadline(name)
+    except StageError:
+        STAGE_ERRORS.inc(name, "deadline")
+        raise
+    token = current_stage.set(name)
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(func(*args), timeout=timeout)
+        _stage_latencies.setdefault(name, LatencyTracker()).record(time.perf_counter() - started)
+        return result
+    except asyncio.TimeoutError:
+        STAGE_ERRORS.inc(name, "timeout")
+        raise StageError(name, f"timed out after {timeout:.1f}s", timed_out=True)
+    except DeadlineExceeded:
+        STAGE_ERRORS.inc(name, "deadline")
+        raise StageError(name, "request deadline exceeded", timed_out=True)
+    except Exception as e:
+        STAGE_ERRORS.inc(name, "error")
+        raise StageError(name, str(e)) from e
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, name)
+        record_timing(name, elapsed)
+        current_stage.reset(token)
+
+
+async def iter_fused_analysis(input_data: DecisionInput) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Fused mode: one combined call, split back into the per-stage outputs.
+    """
+    try:
+        fused = await run_stage("fused", analyze_decision, input_data)
+    except StageError as e:
+        raise PipelineError({"fused": e})
+    for name in STAGES:
+        yield name, getattr(fused, name)
+
+
+def reusable(mode: str, reuse: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The outputs in `reuse` that `mode` takes instead of recomputing. Fused
+    mode only reuses when all four stages are still valid, since they come
+    from one call; single mode produces everything in one call and never does.
+    """
+    reuse = reuse or {}
+    if mode == "single" or (mode == "fused" and len(reuse) < len(STAGES)):
+        return {}
+    return reuse
+
+
+async def iter_analysis(
+    input_data: DecisionInput,
+    mode: str = "staged",
+    reuse: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Runs the independent analysis stages concurrently and yields
+    (stage name, output) pairs in completion order. Stages keep running when
+    a sibling fails; once all have settled, raises PipelineError naming
+    every stage that failed.
+
+    Outputs in `reuse` (from a previous audit whose inputs for that stage are
+    unchanged) are yielded first and not recomputed, as far as the mode
+    allows (see reusable).
+    """
+    reuse = reusable(mode, reuse)
+    if mode == "fused" and not reuse:
+        async for name, output in iter_fused_analysis(input_data):
+            yield name, output
+        return
+
+    for name in STAGES:
+        if name in reuse:
+            yield name, reuse[name]
+
+    tasks = {
+        asyncio.ensure_future(run_stage(name, func, input_data)): name
+        for name, func in STAGES.items() if name not in reuse
+    }
+    errors = {}
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                error = task.exception()
+                if error is None:
+                    yield name, task.result()
+                elif isinstance(error, StageError):
+                    errors[name] = error
+                else:
+                    errors[name] = StageError(name, str(error))
+    finally:
+        # Consumer went away (e.g. client disconnected): stop paying for the rest
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    if errors:
+        raise PipelineError(errors)
+
+
+async def run_analysis(
+    input_data: DecisionInput,
+    mode: str = "staged",
+    reuse: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Runs the independent analysis stages concurrently.
+    Returns a dict of stage name -> output, or raises PipelineError
+    naming every stage that failed.
+    """
+    return {name: output async for name, output in iter_analysis(input_data, mode, reuse)}
+
+
+async def run_report(input_data: DecisionInput, outputs: Dict[str, Any]) -> ReportOutput:
+    """
+    Join step: builds the final report from the analysis outputs.
+    """
+    try:
+        return await run_stage(
+            "report",
+            generate_report,
+            input_data,
+            outputs["decomposition"],
+            outputs["bias_analysis"],
+            outputs["simulation"],
+            outputs["integrity_analysis"]
+        )
+    except StageError as e:
+        raise PipelineError({"report": e})
+
+
+async def run_single_call(input_data: DecisionInput) -> ReportOutput:
+    try:
+        return await run_stage("single", audit_in_single_call, input_data)
+    except StageError as e:
+        raise PipelineError({"single": e})
+
+
+audit_flight = SingleFlight("audit", inherit=(cache_bypass, request_priority, current_tenant))
+
+
+def audit_key(input_data: DecisionInput, mode: str) -> str:
+    """Coalescing key: the input with whitespace and case differences normalized away."""
+    normalized = {
+        "decision_text": " ".join(input_data.decision_text.split()),
+        "domain": input_data.domain.strip().lower(),
+        "time_horizon": input_data.time_horizon.strip().lower(),
+        "values": [value.strip() for value in input_data.values or []],
+        "mode": mode,
+        # A no-cache request must not be answered by a run that reads the cache,
+        # nor an interactive one wait behind a batch run's priority, nor one
+        # tenant's audit be charged to another's budget
+        "no_cache": cache_bypass.get(),
+        "priority": request_priority.get(),
+        "tenant": current_tenant.get(),
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def prepare_input(input_data: DecisionInput) -> DecisionInput:
+    """
+    input_data with an over-budget decision text compacted, once per audit, so
+    every stage prompt carries the same relevant sentences instead of each
+    stage trimming (or overflowing) on its own.
+    """
+    model = providers.default_models.get(providers.primary)
+    compacted = compact_input(input_data, model)
+    if compacted is not input_data:
+        INPUTS_COMPACTED.inc(model or "default")
+    return compacted
+
+
+class NearDuplicate:
+    """A past audit similar enough to answer this one (see near_duplicates)."""
+
+    def __init__(self, record: AuditRecord, similarity: float):
+        self.record = record
+        self.similarity = similarity
+
+    @property
+    def full(self) -> bool:
+        return NEAR_DUPLICATE_REUSE == "all"
+
+    def outputs(self) -> Dict[str, Any]:
+        stages = STAGES if self.full else CHEAP_STAGES
+        report = self.record.report
+        return {name: getattr(report, name) for name in stages if getattr(report, name) is not None}
+
+    def mark(self, report: ReportOutput, reused) -> ReportOutput:
+        report.near_duplicate_of = self.record.id
+        report.near_duplicate_similarity = round(self.similarity, 3)
+        report.reused_stages = sorted(set(report.reused_stages) | set(reused))
+        NEAR_DUPLICATE_REUSES.inc("all" if self.full else "cheap")
+        return report
+
+    def report(self) -> ReportOutput:
+        """The past report as this audit's answer (NEAR_DUPLICATE_REUSE=all)."""
+        report = self.record.report.model_copy(deep=True, update={"audit_id": None, "reused_stages": []})
+        return self.mark(report, [*STAGES, "report"])
+
+
+async def find_near_duplicate(input_data: DecisionInput, mode: str, reuse: Optional[Dict[str, Any]]) -> Optional[NearDuplicate]:
+    # An audit_id follow-up already reuses its own outputs, and no-cache means fresh
+    if NEAR_DUPLICATE_REUSE not in ("cheap", "all") or reuse or cache_bypass.get():
+        return None
+    # Fused and single calls produce all stages at once: only a full reuse saves anything
+    if mode != "staged" and NEAR_DUPLICATE_REUSE != "all":
+        return None
+    match = await audit_history.afind_similar(input_data, NEAR_DUPLICATE_THRESHOLD)
+    return NearDuplicate(*match) if match else None
+
+
+async def run_stages(
+    input_data: DecisionInput,
+    mode: str,
+    reuse: Optional[Dict[str, Any]] = None
+) -> ReportOutput:
+    near = await find_near_duplicate(input_data, mode, reuse)
+    if near is not None and near.full:
+        return near.report()
+    input_data = prepare_input(input_data)
+    if mode == "single":
+        return await run_single_call(input_data)
+    if near is not None:
+        reuse = near.outputs()
+    reuse = reusable(mode, reuse)
+    outputs = await run_analysis(input_data, mode, reuse)
+    report = await run_report(input_data, outputs)
+    # Only the stages actually taken from `reuse`
+    report.reused_stages = sorted(reuse)
+    return near.mark(report, reuse) if near is not None else report
+
+
+async def run_audit(
+    input_data: DecisionInput,
+    mode: str = DEFAULT_PIPELINE_MODE,
+    reuse: Optional[Dict[str, Any]] = None
+) -> ReportOutput:
+    """
+    Full audit: the analysis stages (concurrent fan-out in staged mode), then
+    the report as the join step. Every mode returns the same ReportOutput shape.
+    `reuse` carries still-valid stage outputs of a previous audit (see iter_analysis).
+    """
+    started = time.perf_counter()
+    status = "error"
+    try:
+        if reuse:
+            report = await run_stages(input_data, mode, reuse)
+        else:
+            # Identical audits already in flight (double submits, duplicate
+            # batch records) share one pipeline run
+            report = await audit_flight.do(audit_key(input_data, mode), lambda: run_stages(input_data, mode))
+            report = report.model_copy(deep=True)
+        status = "ok"
+        return report
+    finally:
+        elapsed = time.perf_counter() - started
+        AUDIT_DURATION.observe(elapsed, mode, status)
+        record_timing("total", elapsed)
+
+
+async def iter_audit(
+    input_data: DecisionInput,
+    mode: str = DEFAULT_PIPELINE_MODE,
+    reuse: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of run_audit: yields each analysis stage as soon as it
+    finishes, then ("report", ReportOutput).
+    """
+    near = await find_near_duplicate(input_data, mode, reuse)
+    if near is not None and near.full:
+        report = near.report()
+        for name in STAGES:
+            yield name, getattr(report, name)
+        yield "report", report
+        return
+
+    input_data = prepare_input(input_data)
+    if mode == "single":
+        report = await run_single_call(input_data)
+        for name in STAGES:
+            yield name, getattr(report, name)
+        yield "report", report
+        return
+
+    if near is not None:
+        reuse = near.outputs()
+    reuse = reusable(mode, reuse)
+    outputs = {}
+    async for name, output in iter_analysis(input_data, mode, reuse):
+        outputs[name] = output
+        yield name, output
+    report = await run_report(input_data, outputs)
+    report.reused_stages = sorted(reuse)
+    yield "report", near.mark(report, reuse) if near is not None else report
@@ -1,64 +1,105 @@
-from typing import Optional
+from typing import List
 from .llm_client import get_llm_response
+from .scoring import compute_scores
+from .token_budget import top_items
 from .schemas import (
     DecisionInput, DecompositionOutput, BiasOutput, 
-    SimulationOutput, IntegrityOutput, ReportOutput
+    SimulationOutput, IntegrityOutput, ReportOutput, ReportNarrative
 )
 
 SYSTEM_PROMPT = """
 You are a Decision Integrity Report Generator.
-Your task is to synthesize the analysis from other modules into a final audit report.
+Your task is to synthesize a compact digest of the analysis from other modules into the written part of a final audit report.
 
 Inputs:
-- Decomposition
-- Bias Analysis
-- Scenarios
-- Integrity Check
+- Decision and its objective
+- Assumptions and irreversible factors
+- Biases detected
+- Scenarios and uncertainties
+- Value conflicts
 
 Outputs:
-1. Risk Score (0-100): Composite risk based on irreversible factors, worst-case scenarios, and biases.
-2. Bias Score (0-100): Representing the level of cognitive distortion (100 = clean, 0 = heavily biased). note: this is inverse of bias severity.
-3. Alignment Score (0-100): Directly from Integrity Check.
-4. Key Assumptions: Summarize top 3 critical assumptions.
-5. Missing Information: What crucial data is the user not seeing?
-6. Reflection Questions: 3-5 deep questions to prompt user self-reflection.
+1. Key Assumptions: Summarize top 3 critical assumptions.
+2. Missing Information: What crucial data is the user not seeing?
+3. Reflection Questions: 3-5 deep questions to prompt user self-reflection.
 
 CONSTRAINT:
 - The Reflection Questions MUST be questions. 
 - NO statements of advice.
 - NO "You should focus on...". instead ask "Have you considered...?"
 - Return ONLY JSON matching the Schema.
-- IMPORTANT: All JSON keys must be in snake_case (lowercase with underscores) exactly as defined in the schema (e.g., "risk_score", "key_assumptions"). Do not Capitalize keys.
+- IMPORTANT: All JSON keys must be in snake_case (lowercase with underscores) exactly as defined in the schema (e.g., "key_assumptions", "reflection_questions"). Do not Capitalize keys.
 """
 
-def generate_report(
+_SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+def _bullets(items: List[str]) -> str:
+    return "; ".join(items) if items else "none"
+
+def build_digest(
     input_data: DecisionInput,
     decomposition: DecompositionOutput,
     bias: BiasOutput,
     simulation: SimulationOutput,
     integrity: IntegrityOutput
-) -> ReportOutput:
-    
-    # We pass the full context to the LLM to synthesize the final scores and questions
-    user_prompt = f"""
+) -> str:
+    """
+    Plain-text summary of the stage outputs for the report prompt.
+    Much smaller than the full model dumps and carries only what the
+    narrative needs; long lists are cut to their first few items, with
+    biases ordered most severe first.
+    """
+    ranked = sorted(bias.biases, key=lambda b: _SEVERITY_ORDER.get(b.severity.lower(), len(_SEVERITY_ORDER)))
+    biases = [f"{b.bias_type} ({b.severity}): {b.evidence}" for b in ranked]
+    conflicts = [f"{c.value}: {c.conflict_reason}" for c in integrity.conflicts]
+    return f"""
     Decision: "{input_data.decision_text}"
-    
-    Decomposition: {decomposition.model_dump_json()}
-    Biases Detected: {bias.model_dump_json()}
-    Simulation: {simulation.model_dump_json()}
-    Integrity: {integrity.model_dump_json()}
+    Objective: {decomposition.objective}
+    Assumptions: {_bullets(top_items(decomposition.assumptions))}
+    Constraints: {_bullets(top_items(decomposition.constraints))}
+    Irreversible factors: {_bullets(top_items(decomposition.irreversible_factors))}
+    Biases: {_bullets(top_items(biases))}
+    Worst case: {simulation.scenarios.worst_case}
+    Most likely: {simulation.scenarios.most_likely}
+    Uncertainties: {_bullets(top_items(simulation.uncertainties))}
+    Value conflicts: {_bullets(top_items(conflicts))}
     """
+
+def build_report(
+    decomposition: DecompositionOutput,
+    bias: BiasOutput,
+    simulation: SimulationOutput,
+    integrity: IntegrityOutput,
+    narrative: ReportNarrative
+) -> ReportOutput:
+    """
+    Assembles the final report: locally computed scores, the LLM narrative,
+    and the detailed module outputs for the frontend to render.
+    """
+    return ReportOutput(
+        **compute_scores(decomposition, bias, simulation, integrity),
+        key_assumptions=narrative.key_assumptions,
+        missing_information=narrative.missing_information,
+        reflection_questions=narrative.reflection_questions,
+        decomposition=decomposition,
+        bias_analysis=bias,
+        simulation=simulation,
+        integrity_analysis=integrity
+    )
+
+async def generate_report(
+    input_data: DecisionInput,
+    decomposition: DecompositionOutput,
+    bias: BiasOutput,
+    simulation: SimulationOutput,
+    integrity: IntegrityOutput
+) -> ReportOutput:
     
-    report = get_llm_response(
+    # Scores are deterministic (see scoring.py); the LLM only writes the narrative
+    narrative = await get_llm_response(
         system_prompt=SYSTEM_PROMPT,
-        user_prompt=user_prompt,
-        response_model=ReportOutput
+        user_prompt=build_digest(input_data, decomposition, bias, simulation, integrity),
+        response_model=ReportNarrative
     )
     
-    # Attach detailed parts for the frontend to render if needed (optional)
-    report.decomposition = decomposition
-    report.bias_analysis = bias
-    report.simulation = simulation
-    report.integrity_analysis = integrity
-    
-    return report
+    return build_report(decomposition, bias, simulation, integrity, narrative)
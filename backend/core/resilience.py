@@ -0,0 +1,243 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from contextlib import nullcontext
+from typing import AsyncContextManager, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .admission import DeadlineExceeded, bounded_timeout, remaining_time
+
+R = TypeVar("R")
+
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+# Hedge only once enough latencies are known for the p95 to mean something
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider/model whose breaker is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    429s, 5xx, timeouts and connection failures are worth another attempt.
+    An expired request deadline (DeadlineExceeded) is not.
+    """
+    import openai  # deferred with the client itself (see llm_client.Providers)
+
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.RateLimitError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, error: Optional[BaseException] = None) -> float:
+    """
+    Full-jitter exponential backoff. A provider's Retry-After, when present,
+    is used as the lower bound.
+    """
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+    hint = retry_after_seconds(error) if error is not None else None
+    if hint is not None:
+        delay = max(delay, min(hint, LLM_BACKOFF_MAX))
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and fails fast until
+    `reset_seconds` have passed; then lets one probe call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_latencies: Dict[Tuple[str, str], LatencyTracker] = {}
+
+
+def get_breaker(provider: str, model: str) -> CircuitBreaker:
+    key = (provider, model)
+    if key not in _breakers:
+        _breakers[key] = CircuitBreaker()
+    return _breakers[key]
+
+
+def get_latency_tracker(provider: str, model: str) -> LatencyTracker:
+    key = (provider, model)
+    if key not in _latencies:
+        _latencies[key] = LatencyTracker()
+    return _latencies[key]
+
+
+def reset_provider_health() -> None:
+    """Drops every breaker and latency tracker (Providers.reload); they are recreated on use."""
+    _breakers.clear()
+    _latencies.clear()
+
+
+def breaker_states() -> Dict[str, str]:
+    return {f"{provider}/{model}": breaker.state for (provider, model), breaker in _breakers.items()}
+
+
+async def _timed_attempt(
+    call: Callable[[], Awaitable[R]],
+    tracker: LatencyTracker,
+    slot: Optional[Callable[[], AsyncContextManager]] = None,
+    sent: Optional[asyncio.Event] = None
+) -> R:
+    """
+    One attempt. `slot` reserves rate-limit and concurrency capacity first;
+    only `call` itself is timed, so waiting for capacity can neither time an
+    attempt out nor skew the latencies hedging and the breaker rely on.
+    """
+    async with (slot() if slot is not None else nullcontext()):
+        if sent is not None:
+            sent.set()
+        timeout = bounded_timeout(LLM_ATTEMPT_TIMEOUT)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call(), timeout=timeout)
+        except asyncio.TimeoutError:
+            if timeout < LLM_ATTEMPT_TIMEOUT:
+                # Cut short by the client's deadline: not a slow provider, and not worth a retry
+                raise DeadlineExceeded("Request deadline exceeded.") from None
+            raise
+        tracker.record(time.perf_counter() - started)
+    return result
+
+
+async def hedged(
+    call: Callable[[], Awaitable[R]],
+    tracker: LatencyTracker,
+    slot: Optional[Callable[[], AsyncContextManager]] = None
+) -> R:
+    """
+    Runs `call` under the per-attempt timeout. With hedging on, a duplicate
+    is fired if the first attempt is still running at the observed p95, and
+    whichever succeeds first wins; the loser is cancelled.
+    """
+    hedge_after = tracker.percentile(0.95) if LLM_HEDGE_ENABLED else None
+    if hedge_after is None:
+        return await _timed_attempt(call, tracker, slot)
+
+    sent = asyncio.Event()
+    first = asyncio.ensure_future(_timed_attempt(call, tracker, slot, sent))
+    attempts = [first]
+    try:
+        # The p95 is of provider time, so count from when the request went out
+        sending = asyncio.ensure_future(sent.wait())
+        await asyncio.wait([first, sending], return_when=asyncio.FIRST_COMPLETED)
+        sending.cancel()
+        done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+        if not done:
+            attempts.append(asyncio.ensure_future(_timed_attempt(call, tracker, slot)))
+
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+    finally:
+        for attempt in attempts:
+            if not attempt.done():
+                attempt.cancel()
+
+
+async def with_retries(
+    call: Callable[[], Awaitable[R]],
+    tracker: LatencyTracker,
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+    slot: Optional[Callable[[], AsyncContextManager]] = None
+) -> R:
+    """Retries retryable failures with jittered exponential backoff."""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            return await hedged(call, tracker, slot)
+        except Exception as e:
+            if attempt == LLM_MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                # No time left for another attempt before the request deadline
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            print(f"LLM attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
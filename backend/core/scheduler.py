@@ -0,0 +1,250 @@
+"""
+Client-side rate limiting in front of every provider call. Each
+provider/model has token buckets for requests and tokens per minute; calls
+wait in one priority queue per bucket pair, so interactive audits are served
+before batch and background work and we stay under the limit instead of
+bouncing off 429s.
+"""
+import os
+import json
+import time
+import asyncio
+import itertools
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import record_timing, LLM_RATE_LIMIT_WAIT, TENANT_TOKENS
+from .token_budget import count_message_tokens
+
+# Lower value is served first
+PRIORITIES = {"interactive": 0, "batch": 1, "background": 2}
+
+# Set per request / job; copied into every stage task with the context
+request_priority: ContextVar[str] = ContextVar("request_priority", default="interactive")
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default="default")
+
+
+def read_limits() -> Tuple[Dict[str, Tuple[int, int]], Dict[str, Dict[str, int]]]:
+    """(RPM/TPM per provider, per-model overrides) from the environment."""
+    # 0 disables a limit. Defaults are unlimited because limits depend on the account tier.
+    defaults = {
+        "groq": (int(os.getenv("GROQ_RPM", "0")), int(os.getenv("GROQ_TPM", "0"))),
+        "openai": (int(os.getenv("OPENAI_RPM", "0")), int(os.getenv("OPENAI_TPM", "0"))),
+    }
+    # Per-model overrides, e.g. {"groq/llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000}}
+    return defaults, json.loads(os.getenv("LLM_RATE_LIMITS", "{}") or "{}")
+
+
+DEFAULT_LIMITS, MODEL_LIMITS = read_limits()
+
+# Tokens per minute each tenant (X-Tenant-ID) may spend; 0 is unlimited
+TENANT_TPM = int(os.getenv("TENANT_TPM", "0"))
+# Completion budget added to the prompt estimate before dispatch
+EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "600"))
+
+
+def estimate_tokens(messages: List[dict], model: Optional[str] = None) -> Tuple[int, int]:
+    """(prompt tokens counted with the local tokenizer, prompt plus expected completion)."""
+    prompt_tokens = count_message_tokens(messages, model)
+    return prompt_tokens, prompt_tokens + EXPECTED_COMPLETION_TOKENS
+
+
+class TokenBucket:
+    """Refills `per_minute` units continuously up to one minute's worth. May go into debt."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.per_minute <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if now). Requests above capacity only need a full bucket."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        needed = min(amount, self.capacity) - self.level
+        return 0.0 if needed <= 0 else needed * 60.0 / self.per_minute
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        """Corrects an estimate once the real usage is known (negative to charge more)."""
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+
+class Waiter:
+    def __init__(self, priority: int, seq: int, tokens: int, tenant: str):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.tenant = tenant
+        self.future = asyncio.get_running_loop().create_future()
+
+    def __lt__(self, other: "Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+_tenant_buckets: Dict[str, TokenBucket] = {}
+
+
+def tenant_bucket(tenant: str) -> TokenBucket:
+    if tenant not in _tenant_buckets:
+        _tenant_buckets[tenant] = TokenBucket(TENANT_TPM)
+    return _tenant_buckets[tenant]
+
+
+class RateLimiter:
+    """
+    RPM and TPM buckets for one provider/model with a priority queue of
+    waiting calls. A single dispatcher task admits waiters in priority order
+    (FIFO within a class) whenever both buckets allow. A waiter whose tenant
+    is over budget is passed over rather than blocking everyone behind it.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._queue: List[Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def unlimited(self) -> bool:
+        return self.requests.unlimited and self.tokens.unlimited and TENANT_TPM <= 0
+
+    def queued(self) -> Dict[str, int]:
+        counts = {name: 0 for name in PRIORITIES}
+        by_value = {value: name for name, value in PRIORITIES.items()}
+        for waiter in self._queue:
+            if not waiter.future.done():
+                counts[by_value[waiter.priority]] += 1
+        return counts
+
+    async def acquire(self, tokens: int, priority: str, tenant: str) -> None:
+        if self.unlimited:
+            return
+        waiter = Waiter(PRIORITIES.get(priority, PRIORITIES["interactive"]), next(self._seq), tokens, tenant)
+        self._queue.append(waiter)
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not asyncio.get_running_loop():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        self._wakeup.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Leave the queue entry; the dispatcher skips finished futures
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as we were cancelled: return what it took
+                self.release(tokens, tenant)
+            raise
+
+    def release(self, tokens: int, tenant: str) -> None:
+        self.requests.give_back(1)
+        self.tokens.give_back(tokens)
+        tenant_bucket(tenant).give_back(tokens)
+
+    def settle(self, estimated: int, actual: int, tenant: str) -> None:
+        """Replaces the pre-dispatch estimate with the provider-reported usage."""
+        self.tokens.give_back(estimated - actual)
+        tenant_bucket(tenant).give_back(estimated - actual)
+
+    def _next_admissible(self) -> Tuple[Optional[Waiter], float]:
+        """The first waiter in priority order whose tenant has budget, and how long until one does."""
+        tenant_wait = float("inf")
+        for waiter in sorted(self._queue):
+            if waiter.future.done():
+                continue
+            wait = tenant_bucket(waiter.tenant).wait_time(waiter.tokens)
+            if wait == 0:
+                return waiter, 0.0
+            tenant_wait = min(tenant_wait, wait)
+        return None, tenant_wait
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._queue = [waiter for waiter in self._queue if not waiter.future.done()]
+            if not self._queue:
+                return
+
+            waiter, wait = self._next_admissible()
+            if waiter is not None:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(waiter.tokens))
+                if wait == 0:
+                    self.requests.take(1)
+                    self.tokens.take(waiter.tokens)
+                    tenant_bucket(waiter.tenant).take(waiter.tokens)
+                    waiter.future.set_result(None)
+                    continue
+
+            # Sleep until a bucket refills or a new (possibly higher priority) call arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(wait, 5.0))
+            except asyncio.TimeoutError:
+                pass
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str, model: str) -> RateLimiter:
+    key = (provider, model)
+    if key not in _limiters:
+        rpm, tpm = DEFAULT_LIMITS.get(provider, (0, 0))
+        override = MODEL_LIMITS.get(f"{provider}/{model}", {})
+        _limiters[key] = RateLimiter(override.get("rpm", rpm), override.get("tpm", tpm))
+    return _limiters[key]
+
+
+def reset_rate_limits() -> None:
+    """Re-reads the provider limits (Providers.reload); buckets start over, full."""
+    defaults, overrides = read_limits()
+    DEFAULT_LIMITS.update(defaults)
+    MODEL_LIMITS.clear()
+    MODEL_LIMITS.update(overrides)
+    _limiters.clear()
+
+
+async def admit(provider: str, model: str, tokens: int) -> None:
+    """Waits for rate-limit capacity for one attempt at the current priority and tenant."""
+    priority = request_priority.get()
+    started = time.perf_counter()
+    await get_rate_limiter(provider, model).acquire(tokens, priority, current_tenant.get())
+    waited = time.perf_counter() - started
+    LLM_RATE_LIMIT_WAIT.observe(waited, provider, priority)
+    record_timing("rate_limit_wait", waited)
+
+
+def settle(provider: str, model: str, estimated: int, actual: Optional[int]) -> None:
+    tenant = current_tenant.get()
+    if actual is not None:
+        get_rate_limiter(provider, model).settle(estimated, actual, tenant)
+    TENANT_TOKENS.inc(tenant, amount=actual if actual is not None else estimated)
+
+
+def scheduler_state() -> Dict[str, Dict[str, object]]:
+    """Bucket levels and queue depth per provider/model, for /metrics."""
+    return {
+        f"{provider}/{model}": {
+            "queued": limiter.queued(),
+            "requests_available": None if limiter.requests.unlimited else round(limiter.requests.level, 1),
+            "tokens_available": None if limiter.tokens.unlimited else round(limiter.tokens.level, 1),
+        }
+        for (provider, model), limiter in _limiters.items()
+    }
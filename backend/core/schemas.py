@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel, Field
 
 class DecisionInput(BaseModel):
@@ -20,6 +20,11 @@ class BiasEvidence(BaseModel):
     evidence: str
     severity: str = Field(..., description="low|medium|high")
 
+class BiasCandidate(BiasEvidence):
+    """A bias flagged by the local pre-screen, before any LLM verification."""
+    confidence: float = Field(..., ge=0, le=1)
+    span: Tuple[int, int] = Field(..., description="Character offsets of the evidence in decision_text")
+
 class BiasOutput(BaseModel):
     biases: List[BiasEvidence]
 
@@ -41,6 +46,12 @@ class IntegrityOutput(BaseModel):
     alignment_score: float = Field(..., ge=0, le=100)
     conflicts: List[IntegrityConflict]
 
+class ReportNarrative(BaseModel):
+    """The part of the report written by the LLM; scores are computed locally."""
+    key_assumptions: List[str]
+    missing_information: List[str]
+    reflection_questions: List[str]
+
 class ReportOutput(BaseModel):
     risk_score: float = Field(..., ge=0, le=100)
     bias_score: float = Field(..., ge=0, le=100)
@@ -53,3 +64,51 @@ class ReportOutput(BaseModel):
     bias_analysis: Optional[BiasOutput] = None
     simulation: Optional[SimulationOutput] = None
     integrity_analysis: Optional[IntegrityOutput] = None
+    # Pass audit_id back on a follow-up audit to reuse unaffected stages
+    audit_id: Optional[str] = None
+    reused_stages: List[str] = Field(default_factory=list)
+    # History id (GET /audits/{id}) and estimated similarity of the
+    # near-duplicate decision whose outputs were reused, if any
+    near_duplicate_of: Optional[str] = None
+    near_duplicate_similarity: Optional[float] = None
+
+# Fused pipeline modes: several modules answered by one LLM call
+class FusedAnalysisOutput(BaseModel):
+    decomposition: DecompositionOutput
+    bias_analysis: BiasOutput
+    simulation: SimulationOutput
+    integrity_analysis: IntegrityOutput
+
+class FusedReportOutput(FusedAnalysisOutput, ReportNarrative):
+    pass
+
+class AuditJobStatus(BaseModel):
+    """A background audit submitted via POST /audit/jobs."""
+    job_id: str
+    status: str = Field(..., description="queued|running|completed|failed")
+    mode: str
+    created_at: float
+    updated_at: float
+    # Module outputs completed so far, keyed by ReportOutput field name
+    stages: Dict[str, dict] = Field(default_factory=dict)
+    report: Optional[ReportOutput] = None
+    error: Optional[dict] = None
+
+class AuditRecord(BaseModel):
+    """A past audit from the history store (GET /audits)."""
+    id: str
+    audit_id: Optional[str] = None
+    created_at: float
+    mode: str
+    input: DecisionInput
+    risk_score: float
+    bias_score: float
+    alignment_score: float
+    bias_types: List[str] = Field(default_factory=list)
+    # Only on GET /audits/{id}; listings leave it out to stay small
+    report: Optional[ReportOutput] = None
+
+class AuditHistoryPage(BaseModel):
+    items: List[AuditRecord]
+    # Pass as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,66 @@
+"""
+Deterministic report scores, computed from the stage outputs instead of
+asked of the LLM, so the same analysis always gets the same scores.
+
+bias_score (100 = clean, 0 = heavily biased)
+    100 minus a penalty per detected bias by severity
+    (low 10, medium 20, high 35), floored at 0.
+
+risk_score (0 = low exposure, 100 = high exposure), sum of four capped parts:
+    irreversibility  10 per irreversible factor, max 40
+    distortion       25% of (100 - bias_score), max 25
+    risk tolerance   low 5, medium 10, high 20 (unknown counts as medium)
+    uncertainty      3 per scenario uncertainty, max 15
+
+alignment_score
+    taken directly from the integrity check.
+"""
+from .schemas import DecompositionOutput, BiasOutput, SimulationOutput, IntegrityOutput
+
+SEVERITY_PENALTY = {"low": 10.0, "medium": 20.0, "high": 35.0}
+RISK_TOLERANCE_POINTS = {"low": 5.0, "medium": 10.0, "high": 20.0}
+
+IRREVERSIBLE_POINTS, IRREVERSIBLE_MAX = 10.0, 40.0
+DISTORTION_WEIGHT = 0.25
+UNCERTAINTY_POINTS, UNCERTAINTY_MAX = 3.0, 15.0
+
+
+def _clamp(score: float) -> float:
+    return round(max(0.0, min(100.0, score)), 1)
+
+
+def compute_bias_score(bias: BiasOutput) -> float:
+    penalty = sum(
+        SEVERITY_PENALTY.get(b.severity.strip().lower(), SEVERITY_PENALTY["medium"])
+        for b in bias.biases
+    )
+    return _clamp(100.0 - penalty)
+
+
+def compute_risk_score(
+    decomposition: DecompositionOutput,
+    simulation: SimulationOutput,
+    bias_score: float
+) -> float:
+    irreversibility = min(len(decomposition.irreversible_factors) * IRREVERSIBLE_POINTS, IRREVERSIBLE_MAX)
+    distortion = (100.0 - bias_score) * DISTORTION_WEIGHT
+    tolerance = RISK_TOLERANCE_POINTS.get(
+        decomposition.risk_tolerance.strip().lower(), RISK_TOLERANCE_POINTS["medium"]
+    )
+    uncertainty = min(len(simulation.uncertainties) * UNCERTAINTY_POINTS, UNCERTAINTY_MAX)
+    return _clamp(irreversibility + distortion + tolerance + uncertainty)
+
+
+def compute_scores(
+    decomposition: DecompositionOutput,
+    bias: BiasOutput,
+    simulation: SimulationOutput,
+    integrity: IntegrityOutput
+) -> dict:
+    """Returns risk_score, bias_score and alignment_score for a ReportOutput."""
+    bias_score = compute_bias_score(bias)
+    return {
+        "risk_score": compute_risk_score(decomposition, simulation, bias_score),
+        "bias_score": bias_score,
+        "alignment_score": _clamp(integrity.alignment_score),
+    }
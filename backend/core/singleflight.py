@@ -0,0 +1,89 @@
+import os
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, Iterable, Tuple, TypeVar
+
+from .admission import SharedDeadline, request_deadline, within_deadline
+from .metrics import COALESCED_CALLS, request_timings
+
+R = TypeVar("R")
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one in-flight task;
+    every caller receives its result (or exception). A caller that is
+    cancelled, or whose deadline passes, just stops waiting. The shared task
+    is only cancelled once its last waiter has gone, so one disconnect never
+    fails the others.
+
+    The shared task runs in a fresh context, not the first caller's, so no
+    listener or setting of one request leaks into the others. The `inherit`
+    vars are carried over; callers that differ in them must differ in the
+    key as well. The task runs under the latest deadline of its waiters, and
+    its timing breakdown is added to each waiter's.
+    """
+
+    def __init__(self, scope: str, inherit: Iterable[contextvars.ContextVar] = ()):
+        self.scope = scope
+        self.inherit = tuple(inherit)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._deadlines: Dict[str, SharedDeadline] = {}
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            del self._waiters[key]
+            del self._deadlines[key]
+
+    @staticmethod
+    async def _timed(call: Callable[[], Awaitable[R]]) -> Tuple[R, Dict[str, float]]:
+        timings: Dict[str, float] = {}
+        request_timings.set(timings)
+        return await call(), timings
+
+    def _start(self, key: str, call: Callable[[], Awaitable[R]]) -> asyncio.Task:
+        context = contextvars.Context()
+        for var in self.inherit:
+            context.run(var.set, var.get())
+        self._deadlines[key] = SharedDeadline()
+        context.run(request_deadline.set, self._deadlines[key])
+        return asyncio.get_running_loop().create_task(self._timed(call), context=context)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[R]]) -> R:
+        if not SINGLEFLIGHT_ENABLED:
+            return await call()
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._start(key, call)
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._release(key, done))
+        else:
+            COALESCED_CALLS.inc(self.scope)
+
+        deadline = request_deadline.get()
+        self._waiters[key] += 1
+        self._deadlines[key].add(deadline)
+        try:
+            # Each caller waits only as long as its own deadline allows
+            result, timings = await within_deadline(asyncio.shield(task))
+            mine = request_timings.get()
+            if mine is not None:
+                for name, seconds in timings.items():
+                    mine[name] = mine.get(name, 0.0) + seconds
+            return result
+        finally:
+            if self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+                self._deadlines[key].remove(deadline)
+                if self._waiters[key] == 0 and not task.done():
+                    task.cancel()
+                    self._release(key, task)
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
@@ -0,0 +1,101 @@
+"""
+Work done once in the app lifespan instead of on the first audit: building
+the provider clients, pre-opening their connections, opening the SQLite
+stores, preparing the JSON schemas and tokenizers the LLM path uses, and
+optionally one real LLM call.
+GET /ready answers 503 until it has finished.
+"""
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+from .schemas import (
+    DecompositionOutput, BiasOutput, SimulationOutput, IntegrityOutput,
+    ReportNarrative, FusedAnalysisOutput, FusedReportOutput, ReportOutput
+)
+from .llm_cache import llm_cache, schema_digest
+from .llm_client import providers
+from .audit_history import audit_history
+from .token_budget import count_tokens
+
+# Keep-alive connections opened per provider at startup (0 disables)
+STARTUP_PREOPEN_CONNECTIONS = int(os.getenv("STARTUP_PREOPEN_CONNECTIONS", "2"))
+# Sends one small completion per provider; costs a few tokens per worker start
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "false").lower() in ("1", "true", "yes")
+STARTUP_TIMEOUT_SECONDS = float(os.getenv("STARTUP_TIMEOUT_SECONDS", "10"))
+
+RESPONSE_MODELS = (
+    DecompositionOutput, BiasOutput, SimulationOutput, IntegrityOutput,
+    ReportNarrative, FusedAnalysisOutput, FusedReportOutput, ReportOutput,
+)
+
+
+def prepare_validation() -> None:
+    """
+    JSON schemas (part of every LLM cache key) and tokenizers are built
+    lazily; pydantic's validators and serializers already exist per class.
+    """
+    for model in RESPONSE_MODELS:
+        schema_digest(model)
+    for model in {None, *providers.default_models.values()}:
+        count_tokens("warm up", model)
+
+
+def build_clients() -> None:
+    providers.clients  # built by the property; here off the event loop
+
+
+def open_stores() -> None:
+    """The LLM disk cache and audit history open on first use otherwise."""
+    if llm_cache is not None:
+        llm_cache.open()
+    audit_history.open()
+
+
+class Startup:
+    def __init__(self):
+        self.ready = False
+        self.durations: Dict[str, float] = {}
+        self.errors: Dict[str, Dict[str, str]] = {}
+
+    async def _step(self, name: str, work: Callable[[], Awaitable[Optional[Dict[str, str]]]]) -> None:
+        started = time.perf_counter()
+        try:
+            errors = await work()
+        except Exception as e:
+            errors = {"error": f"{type(e).__name__}: {e}"}
+        self.durations[name] = time.perf_counter() - started
+        if errors:
+            self.errors[name] = errors
+            print(f"Warning: startup step '{name}' failed: {errors}")
+
+    async def run(self) -> None:
+        """
+        Runs every step, then reports ready. Provider errors are listed by
+        /ready but do not hold readiness back: the circuit breakers and
+        fallback provider handle an unreachable provider per call.
+        """
+        started = time.perf_counter()
+        # Blocking work (the SDK import, tokenizer files) runs off the event loop
+        await self._step("validation", lambda: asyncio.to_thread(prepare_validation))
+        await self._step("clients", lambda: asyncio.to_thread(build_clients))
+        await self._step("stores", lambda: asyncio.to_thread(open_stores))
+        if STARTUP_PREOPEN_CONNECTIONS > 0:
+            await self._step(
+                "connections", lambda: providers.connect(STARTUP_PREOPEN_CONNECTIONS, STARTUP_TIMEOUT_SECONDS)
+            )
+        if STARTUP_WARMUP:
+            await self._step("warmup", lambda: providers.warm_up(STARTUP_TIMEOUT_SECONDS))
+        self.ready = True
+        self.durations["total"] = time.perf_counter() - started
+
+    def state(self) -> dict:
+        return {
+            "ready": self.ready,
+            "steps_ms": {name: round(seconds * 1000, 1) for name, seconds in self.durations.items()},
+            "errors": self.errors,
+        }
+
+
+startup = Startup()
@@ -0,0 +1,158 @@
+"""
+Prompt token accounting and compaction. Tokens are counted locally (with
+tiktoken when it is installed, otherwise a close word/punctuation estimate).
+A decision text over budget is reduced once per audit to its most relevant
+sentences, and that compacted input is shared by every stage.
+"""
+import os
+import re
+import json
+from functools import lru_cache
+from typing import List, Optional
+
+from .schemas import DecisionInput
+from .bias_prescreen import prescreen_biases
+
+try:
+    import tiktoken
+except ImportError:  # optional; the estimate below is within ~10% for English prose
+    tiktoken = None
+
+# Max tokens of decision text sent in each prompt; PROMPT_TOKEN_BUDGETS
+# overrides it per model, e.g. {"llama-3.1-8b-instant": 1000}
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+PROMPT_TOKEN_BUDGETS = json.loads(os.getenv("PROMPT_TOKEN_BUDGETS", "{}") or "{}")
+# Items kept per list (assumptions, biases, uncertainties...) in the report digest
+REPORT_DIGEST_MAX_ITEMS = int(os.getenv("REPORT_DIGEST_MAX_ITEMS", "5"))
+
+OMISSION_MARKER = "[...]"
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|\n|$)")
+
+# Phrases that carry the decision itself rather than background
+DECISION_CUES = re.compile(
+    r"\b(?:should i|i want|i(?:'m| am) (?:considering|thinking|planning)|decid\w*|choose|choice|option|"
+    r"because|so that|risk\w*|afford|worried|afraid|goal|plan\w*|invest\w*|quit\w*|move|buy|sell)\b",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: Optional[str]):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model or "")
+    except KeyError:
+        # Non-OpenAI models (Llama on Groq) are close enough to cl100k for budgeting
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Long words split into several tokens; roughly one per 4 characters
+    return sum(max(1, round(len(token) / 4)) for token in _TOKEN_PATTERN.findall(text))
+
+
+def count_message_tokens(messages: List[dict], model: Optional[str] = None) -> int:
+    """Prompt tokens of a chat request, including the few per-message framing tokens."""
+    return sum(count_tokens(message["content"], model) + 4 for message in messages) + 2
+
+
+def decision_budget(model: Optional[str] = None) -> int:
+    return int(PROMPT_TOKEN_BUDGETS.get(model, PROMPT_TOKEN_BUDGET)) if model else PROMPT_TOKEN_BUDGET
+
+
+def _score_sentence(sentence: str, index: int, count: int, keywords: List[str], flagged: bool) -> float:
+    lowered = sentence.lower()
+    score = 0.0
+    # The opening usually states the decision, the end often the question
+    if index == 0:
+        score += 3.0
+    elif index == count - 1:
+        score += 1.5
+    score += 1.0 * len(DECISION_CUES.findall(sentence))
+    score += 2.0 * sum(1 for keyword in keywords if keyword and keyword in lowered)
+    # Evidence the bias stage needs
+    if flagged:
+        score += 3.0
+    if "?" in sentence:
+        score += 1.0
+    return score
+
+
+def compact_text(text: str, budget: int, keywords: List[str] = (), model: Optional[str] = None) -> str:
+    """
+    The highest-scoring sentences of `text` that fit in `budget` tokens, in
+    their original order, with gaps marked by OMISSION_MARKER.
+    """
+    if count_tokens(text, model) <= budget:
+        return text
+
+    matches = [match for match in _SENTENCE.finditer(text) if match.group(0).strip()]
+    sentences = [match.group(0).strip() for match in matches]
+    evidence = [candidate.span for candidate in prescreen_biases(text)]
+    flagged = [
+        any(start < match.end() and match.start() < end for start, end in evidence)
+        for match in matches
+    ]
+    keywords = [keyword.lower().strip() for keyword in keywords]
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: _score_sentence(sentences[i], i, len(sentences), keywords, flagged[i]),
+        reverse=True,
+    )
+
+    chosen = set()
+    seen = set()
+    used = 0
+    for i in ranked:
+        # Pasted text often repeats itself; one copy is enough
+        if sentences[i].lower() in seen:
+            continue
+        cost = count_tokens(sentences[i], model) + 1
+        if used + cost > budget:
+            continue
+        chosen.add(i)
+        seen.add(sentences[i].lower())
+        used += cost
+
+    if not chosen:
+        # A single sentence larger than the budget: keep its start
+        words = text.split()
+        return " ".join(words[:max(1, budget * 3 // 4)]) + " " + OMISSION_MARKER
+
+    parts = []
+    previous = -1
+    for i in sorted(chosen):
+        if i != previous + 1:
+            parts.append(OMISSION_MARKER)
+        parts.append(sentences[i])
+        previous = i
+    if previous != len(sentences) - 1:
+        parts.append(OMISSION_MARKER)
+    return " ".join(parts)
+
+
+def compact_input(input_data: DecisionInput, model: Optional[str] = None) -> DecisionInput:
+    """
+    input_data with decision_text cut down to the model's budget. Returns the
+    same object when it already fits, so the common case costs one count.
+    """
+    budget = decision_budget(model)
+    compacted = compact_text(
+        input_data.decision_text, budget, [input_data.domain, *(input_data.values or [])], model
+    )
+    if compacted == input_data.decision_text:
+        return input_data
+    return input_data.model_copy(update={"decision_text": compacted})
+
+
+def top_items(items: List[str], limit: int = REPORT_DIGEST_MAX_ITEMS) -> List[str]:
+    """The first `limit` items, noting how many were left out."""
+    if len(items) <= limit:
+        return list(items)
+    return list(items[:limit]) + [f"(+{len(items) - limit} more)"]
@@ -1,49 +1,518 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import ValidationError
-from backend.core.schemas import DecisionInput, ReportOutput
-from backend.core.decision_decomposer import decompose_decision
-from backend.core.bias_detector import detect_biases
-from backend.core.counterfactual_simulator import simulate_scenarios
-from backend.core.integrity_checker import check_integrity
-from backend.core.report_generator import generate_report
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional, Set
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, ValidationError
+from backend.core.env import load_env
+
+# Before the other backend imports: their settings are read from the environment at import
+load_env()
+
+from backend.core.schemas import DecisionInput, ReportOutput, AuditJobStatus, AuditRecord, AuditHistoryPage
+from backend.core.pipeline import run_audit, iter_audit, PipelineError, PIPELINE_MODES, DEFAULT_PIPELINE_MODE, STAGES
+from backend.core.llm_cache import llm_cache, cache_bypass
+from backend.core.llm_client import partial_listener, providers
+from backend.core.batch_runner import iter_batch, aiter_sync, BATCH_CONCURRENCY
+from backend.core.metrics import render_metrics, request_timings, server_timing_header
+from backend.core.resilience import breaker_states
+from backend.core.audit_sessions import audit_sessions
+from backend.core.audit_history import audit_history
+from backend.core.jobs import job_queue, QueueFullError
+from backend.core.scheduler import current_tenant, scheduler_state
+from backend.core.admission import admission, set_deadline, Overloaded, DeadlineExceeded
+from backend.core.model_router import model_router
+from backend.core.metrics import REQUESTS_SHED
+from backend.core.compression import CompressionMiddleware, RESPONSE_COMPRESSION
+from backend.core.cassette import cassette
+from backend.core.startup import startup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_queue.start()
+    # Clients, connections and schemas are prepared in the background: the
+    # port opens at once and GET /ready turns 200 when they are done
+    warming = asyncio.ensure_future(startup.run())
+    yield
+    warming.cancel()
+    await job_queue.stop()
+    cassette.close()
+    await providers.aclose()
+
+
+app = FastAPI(title="SecondBrain OS API", version="1.0.0", lifespan=lifespan)
+if RESPONSE_COMPRESSION:
+    # gzip/brotli by Accept-Encoding; reports and batch exports are mostly repetitive text
+    app.add_middleware(CompressionMiddleware)
+
+
+def pipeline_http_error(e: PipelineError) -> HTTPException:
+    # 504 only when every failing stage timed out; any real error is a 500
+    all_timeouts = all(err.timed_out for err in e.errors.values())
+    return HTTPException(
+        status_code=504 if all_timeouts else 500,
+        detail={
+            "error": "Audit pipeline failed.",
+            "stages": {name: err.message for name, err in e.errors.items()}
+        }
+    )
+
+
+def apply_cache_policy(no_cache: bool, cache_control: Optional[str]) -> None:
+    # Context vars are copied into every stage task, so this covers all LLM calls of the request
+    cache_bypass.set(no_cache or "no-cache" in (cache_control or "").lower())
+
+
+def apply_tenant(tenant_id: Optional[str]) -> str:
+    # Rate-limit budgets and token accounting are kept per tenant
+    tenant = (tenant_id or "").strip() or "default"
+    current_tenant.set(tenant)
+    return tenant
+
+
+def overloaded_error(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def cancel_on_disconnect(request: Request, awaitable):
+    """
+    Awaits `awaitable`, cancelling it as soon as the client disconnects.
+    Returns None in that case.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=0.5)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                REQUESTS_SHED.inc("disconnected")
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def partial_event(stage: str, path: Optional[tuple], value) -> dict:
+    if path is None:
+        # Another attempt took over the call: fields sent so far for these stages are void
+        stages = list(STAGES) if stage == "fused" else [*STAGES, "report"] if stage == "single" else [stage]
+        return {"event": "partial_reset", "stages": stages}
+    # Fused and single-call responses carry several sections; address them like staged output
+    if stage in ("fused", "single") and path and path[0] in STAGES:
+        stage, path = path[0], path[1:]
+    elif stage == "single":
+        stage = "report"
+    return {"event": "partial", "stage": stage, "path": list(path), "data": value}
+
+
+async def merged_events(input_data: DecisionInput, mode: str, reuse: dict, partial: bool):
+    """
+    iter_audit, with ("partial", event) items interleaved when partial is set.
+    Partial fields arrive from inside the stage tasks, so both sources feed one queue.
+    """
+    if not partial:
+        async for item in iter_audit(input_data, mode, reuse):
+            yield item
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    partial_listener.set(lambda stage, path, value: queue.put_nowait(("partial", partial_event(stage, path, value))))
+
+    async def pump():
+        try:
+            async for item in iter_audit(input_data, mode, reuse):
+                queue.put_nowait(item)
+        except Exception as e:
+            queue.put_nowait(("error", e))
+        finally:
+            queue.put_nowait((finished, None))
+
+    task = asyncio.ensure_future(pump())
+    try:
+        while True:
+            name, item = await queue.get()
+            if name is finished:
+                break
+            if name == "error":
+                raise item
+            yield name, item
+    finally:
+        partial_listener.set(None)
+        if not task.done():
+            task.cancel()
+
+
+def reusable_stages(audit_id: Optional[str], input_data: DecisionInput) -> dict:
+    # Unknown or expired ids just run a full audit under that id
+    session = audit_sessions.get(audit_id) if audit_id else None
+    return session.reusable_outputs(input_data) if session else {}
+
+
+def report_fields(fields: Optional[str], compact: bool) -> Optional[Set[str]]:
+    """
+    Top-level ReportOutput fields to send, or None for all. ?fields= names
+    them (comma-separated); ?compact=true drops the embedded module outputs.
+    """
+    if not fields and not compact:
+        return None
+    selected = set(ReportOutput.model_fields)
+    if fields:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - selected
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown report field(s): {', '.join(sorted(unknown))}.")
+        selected = requested
+    if compact:
+        selected -= set(STAGES)
+    return selected
+
+
+def json_response(model: BaseModel, include: Optional[Set[str]] = None, headers: Optional[dict] = None) -> Response:
+    # Serialized once by pydantic, skipping FastAPI's response-model validation and encoding pass
+    return Response(content=model.model_dump_json(include=include), media_type="application/json", headers=headers)
+
+
+def ndjson_event(event: str, data: BaseModel, include: Optional[Set[str]] = None, **fields) -> str:
+    """One NDJSON line with `data` serialized by pydantic directly rather than via model_dump + json.dumps."""
+    head = json.dumps({"event": event, **fields})
+    return f'{head[:-1]}, "data": {data.model_dump_json(include=include)}}}\n'
+
+
+def check_mode(mode: str) -> None:
+    if mode not in PIPELINE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}'. Expected one of: {', '.join(PIPELINE_MODES)}.")
 
-app = FastAPI(title="SecondBrain OS API", version="1.0.0")
 
 @app.post("/audit", response_model=ReportOutput)
-async def audit_decision(input_data: DecisionInput):
+async def audit_decision(
+    input_data: DecisionInput,
+    request: Request,
+    mode: str = DEFAULT_PIPELINE_MODE,
+    audit_id: Optional[str] = None,
+    timings: bool = False,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    no_cache: bool = False,
+    cache_control: Optional[str] = Header(default=None),
+    x_tenant_id: Optional[str] = Header(default=None),
+    x_request_timeout: Optional[float] = Header(default=None)
+):
+    # Check for empty decision
+    if not input_data.decision_text.strip():
+        raise HTTPException(status_code=400, detail="Decision text cannot be empty.")
+
+    check_mode(mode)
+    # ?fields=risk_score,reflection_questions or ?compact=true trims the response
+    include = report_fields(fields, compact)
+    apply_cache_policy(no_cache, cache_control)
+    apply_tenant(x_tenant_id)
+    # X-Request-Timeout (seconds) bounds every stage and LLM attempt of this request
+    set_deadline(x_request_timeout)
+
+    # ?timings=true returns a per-stage breakdown in a Server-Timing header
+    breakdown = {} if timings else None
+    request_timings.set(breakdown)
+
     try:
-        # Check for empty decision
-        if not input_data.decision_text.strip():
-            raise HTTPException(status_code=400, detail="Decision text cannot be empty.")
-
-        # 1. Decompose
-        decomposition = decompose_decision(input_data)
-        
-        # 2. Detect Biases
-        biases = detect_biases(input_data)
-        
-        # 3. Simulate
-        simulation = simulate_scenarios(input_data)
-        
-        # 4. Check Integrity
-        integrity = check_integrity(input_data)
-        
-        # 5. Generate Final Report
-        report = generate_report(
-            input_data, 
-            decomposition, 
-            biases, 
-            simulation, 
-            integrity
-        )
-        
-        return report
+        async with admission.slot():
+            # Decompose, detect biases, simulate and check integrity concurrently,
+            # then generate the final report from their outputs.
+            # A follow-up audit (same audit_id) only reruns stages whose inputs changed
+            reuse = reusable_stages(audit_id, input_data)
+            report = await cancel_on_disconnect(request, run_audit(input_data, mode, reuse))
+        if report is None:
+            # Client went away; nobody reads this (499 is the conventional log code)
+            return Response(status_code=499)
+        report.audit_id = audit_sessions.save(audit_id, input_data, report)
+        await audit_history.arecord(input_data, report, mode)
+        headers = {"Server-Timing": server_timing_header(breakdown)} if breakdown else None
+        return json_response(report, include, headers)
 
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PipelineError as e:
+        print(f"Error processing decision: {e}")
+        raise pipeline_http_error(e)
     except Exception as e:
         # In production, log the full error
         print(f"Error processing decision: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/audit/stream")
+async def audit_decision_stream(
+    input_data: DecisionInput,
+    mode: str = DEFAULT_PIPELINE_MODE,
+    audit_id: Optional[str] = None,
+    partial: bool = False,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    no_cache: bool = False,
+    cache_control: Optional[str] = Header(default=None),
+    x_tenant_id: Optional[str] = Header(default=None),
+    x_request_timeout: Optional[float] = Header(default=None)
+):
+    """
+    NDJSON stream of the audit: one {"event": "stage"} line per analysis module
+    as it completes, then {"event": "report"} with the final ReportOutput.
+    Failures arrive as a final {"event": "error"} line. The stream, and any
+    LLM calls still running, stop when the client disconnects.
+
+    With ?partial=true the LLM output is streamed token by token and each
+    field is sent as {"event": "partial", "stage", "path", "data"} as soon as
+    it is complete and valid, ahead of its stage event. If a retry or fallback
+    replaces an LLM response midway, {"event": "partial_reset", "stages"} says
+    to discard the partial fields received so far for those stages. ?fields= and
+    ?compact=true trim the report event as they do for /audit.
+    """
+    if not input_data.decision_text.strip():
+        raise HTTPException(status_code=400, detail="Decision text cannot be empty.")
+
+    check_mode(mode)
+    include = report_fields(fields, compact)
+    apply_cache_policy(no_cache, cache_control)
+    apply_tenant(x_tenant_id)
+    set_deadline(x_request_timeout)
+
+    # Admitted before the response starts so an overload is still a plain 503
+    try:
+        ticket = await admission.acquire()
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    reuse = reusable_stages(audit_id, input_data)
+
+    async def events():
+        try:
+            async for name, output in merged_events(input_data, mode, reuse, partial):
+                if name == "partial":
+                    yield json.dumps(output) + "\n"
+                elif name == "report":
+                    output.audit_id = audit_sessions.save(audit_id, input_data, output)
+                    await audit_history.arecord(input_data, output, mode)
+                    yield ndjson_event("report", output, include)
+                else:
+                    yield ndjson_event("stage", output, stage=name)
+        except PipelineError as e:
+            print(f"Error processing decision: {e}")
+            yield json.dumps({
+                "event": "error",
+                "stages": {name: err.message for name, err in e.errors.items()}
+            }) + "\n"
+        except Exception as e:
+            print(f"Error processing decision: {e}")
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+        finally:
+            ticket.release()
+
+    # The background task also frees the slot if the client leaves before the stream starts
+    return StreamingResponse(events(), media_type="application/x-ndjson", background=BackgroundTask(ticket.release))
+
+@app.post("/audit/batch")
+async def audit_batch(
+    request: Request,
+    concurrency: int = BATCH_CONCURRENCY,
+    start_index: int = 0,
+    mode: str = DEFAULT_PIPELINE_MODE,
+    fields: Optional[str] = None,
+    compact: bool = False,
+    no_cache: bool = False,
+    cache_control: Optional[str] = Header(default=None),
+    x_tenant_id: Optional[str] = Header(default=None)
+):
+    """
+    Body: JSONL, one DecisionInput per line.
+    Response: NDJSON, one {"index", "status", "report" | "error"} line per record
+    in completion order. Pass start_index to resume an interrupted run, and
+    fields= or compact=true to trim each report.
+    """
+    check_mode(mode)
+    include = report_fields(fields, compact)
+    apply_cache_policy(no_cache, cache_control)
+    apply_tenant(x_tenant_id)
+    # Shed the batch up front like any audit; its records then take admission
+    # slots one by one, waiting rather than failing (at most `concurrency` wait)
+    try:
+        admission.check()
+    except Overloaded as e:
+        raise overloaded_error(e)
+    # Read the body up front: the streaming response listens on the same
+    # ASGI receive channel for disconnects while it is being sent.
+    lines = (await request.body()).decode("utf-8").splitlines()
+
+    async def results():
+        async for result in iter_batch(
+            aiter_sync(lines), concurrency, start_index, mode=mode, include=include,
+            admit=lambda: admission.slot(shed=False)
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/audit/jobs", response_model=AuditJobStatus, status_code=202)
+async def submit_audit_job(
+    input_data: DecisionInput,
+    mode: str = DEFAULT_PIPELINE_MODE,
+    no_cache: bool = False,
+    cache_control: Optional[str] = Header(default=None),
+    x_tenant_id: Optional[str] = Header(default=None)
+):
+    """
+    Queues an audit and returns at once with a job_id. Poll
+    GET /audit/jobs/{job_id} for module outputs as they complete and the
+    final report.
+    """
+    if not input_data.decision_text.strip():
+        raise HTTPException(status_code=400, detail="Decision text cannot be empty.")
+
+    check_mode(mode)
+    no_cache = no_cache or "no-cache" in (cache_control or "").lower()
+    try:
+        job = await job_queue.submit(input_data, mode, no_cache, apply_tenant(x_tenant_id))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return job_queue.status(job["job_id"])
+
+@app.get("/audit/jobs/{job_id}", response_model=AuditJobStatus)
+async def get_audit_job(job_id: str):
+    job = job_queue.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+    return job
+
+@app.get("/audits", response_model=AuditHistoryPage)
+async def list_audits(
+    domain: Optional[str] = None,
+    time_horizon: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_risk: Optional[float] = None,
+    max_risk: Optional[float] = None,
+    min_bias: Optional[float] = None,
+    max_bias: Optional[float] = None,
+    min_alignment: Optional[float] = None,
+    max_alignment: Optional[float] = None,
+    bias_type: Optional[List[str]] = Query(default=None),
+    severity: Optional[str] = None,
+    audit_id: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+):
+    """
+    Past audits, newest first, from the history store; no LLM calls. Every
+    filter is optional and they combine, e.g. high-risk finance decisions
+    since a date: ?domain=finance&min_risk=70&since=2024-05-01. Repeat
+    bias_type to match any of several. Follow next_cursor for the next page.
+    """
+    try:
+        items, next_cursor = await audit_history.aquery(
+            domain=domain,
+            time_horizon=time_horizon,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            min_risk=min_risk,
+            max_risk=max_risk,
+            min_bias=min_bias,
+            max_bias=max_bias,
+            min_alignment=min_alignment,
+            max_alignment=max_alignment,
+            bias_types=bias_type,
+            severity=severity,
+            audit_id=audit_id,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return AuditHistoryPage(items=items, next_cursor=next_cursor)
+
+@app.get("/audits/{record_id}", response_model=AuditRecord)
+async def get_audit(record_id: str):
+    record = await audit_history.aget(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown audit '{record_id}'.")
+    return record
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the startup warm-up (see core.startup) has finished."""
+    state = startup.state()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    stats = {"enabled": False} if llm_cache is None else {"enabled": True, **(await asyncio.to_thread(llm_cache.stats))}
+    if cassette.active:
+        stats["cassette"] = cassette.stats()
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of stage, LLM call and cache metrics."""
+    extra = []
+    if llm_cache is not None:
+        stats = await asyncio.to_thread(llm_cache.stats)
+        extra += [
+            "# HELP secondbrain_llm_cache_lookups_total LLM cache lookups by result.",
+            "# TYPE secondbrain_llm_cache_lookups_total counter",
+            f'secondbrain_llm_cache_lookups_total{{result="memory_hit"}} {stats["memory_hits"]}',
+            f'secondbrain_llm_cache_lookups_total{{result="disk_hit"}} {stats["disk_hits"]}',
+            f'secondbrain_llm_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+            "# HELP secondbrain_llm_cache_entries Entries held in the in-memory cache tier.",
+            "# TYPE secondbrain_llm_cache_entries gauge",
+            f"secondbrain_llm_cache_entries {stats['memory_entries']}",
+        ]
+    extra += [
+        "# HELP secondbrain_llm_circuit_open Whether a provider/model circuit breaker is open.",
+        "# TYPE secondbrain_llm_circuit_open gauge",
+    ] + [
+        f'secondbrain_llm_circuit_open{{target="{target}"}} {0 if state == "closed" else 1}'
+        for target, state in breaker_states().items()
+    ]
+    limiters = scheduler_state()
+    extra += [
+        "# HELP secondbrain_llm_rate_limit_queued Calls waiting for rate-limit capacity.",
+        "# TYPE secondbrain_llm_rate_limit_queued gauge",
+    ] + [
+        f'secondbrain_llm_rate_limit_queued{{target="{target}",priority="{priority}"}} {count}'
+        for target, state in limiters.items() for priority, count in state["queued"].items()
+    ] + [
+        "# HELP secondbrain_llm_rate_limit_tokens_available Tokens left in the TPM bucket.",
+        "# TYPE secondbrain_llm_rate_limit_tokens_available gauge",
+    ] + [
+        f'secondbrain_llm_rate_limit_tokens_available{{target="{target}"}} {state["tokens_available"]}'
+        for target, state in limiters.items() if state["tokens_available"] is not None
+    ] + [
+        "# HELP secondbrain_admission_requests Audits running and waiting for admission.",
+        "# TYPE secondbrain_admission_requests gauge",
+        f'secondbrain_admission_requests{{state="active"}} {admission.active}',
+        f'secondbrain_admission_requests{{state="queued"}} {admission.queued}',
+    ]
+    routes = model_router.state()
+    extra += [
+        "# HELP secondbrain_model_success_rate Share of a routed model's responses that validated, per stage.",
+        "# TYPE secondbrain_model_success_rate gauge",
+    ] + [
+        f'secondbrain_model_success_rate{{stage="{stage}",target="{target}"}} {state["success_rate"]}'
+        for (stage, target), state in routes.items() if state["success_rate"] is not None
+    ] + [
+        "# HELP secondbrain_model_p50_seconds Median latency of a routed model, per stage.",
+        "# TYPE secondbrain_model_p50_seconds gauge",
+    ] + [
+        f'secondbrain_model_p50_seconds{{stage="{stage}",target="{target}"}} {state["p50"]}'
+        for (stage, target), state in routes.items() if state["p50"] is not None
+    ]
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,236 @@
+"""
+Regression run of the full pipeline over a golden corpus of DecisionInput
+records, in-process and without provider calls.
+
+    # once, against a live provider: records every LLM call and the expected scores
+    python -m backend.regression benchmarks/golden/decisions.jsonl --record
+    # or without a key, against benchmarks.mock_llm_server (how the committed cassette was made)
+    python -m backend.regression benchmarks/golden/decisions.jsonl --record --mock
+    # after any pipeline change: replays the cassette and compares
+    python -m backend.regression benchmarks/golden/decisions.jsonl
+    python -m backend.regression benchmarks/golden/decisions.jsonl --latency-scale 1 --repeat 10
+
+Each report must validate as ReportOutput, contain no advice phrasing, and
+match the recorded risk/bias/alignment scores and bias types. Prints
+per-stage timing and exits 1 on any failure. A call the cassette does not
+hold (e.g. after a prompt change) fails its record; re-record to accept it.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from typing import Dict, List, Optional
+
+from pydantic import ValidationError
+
+from backend.core.env import load_env
+
+# Before the other backend imports: their settings are read from the environment at import
+load_env()
+
+from backend.core.schemas import DecisionInput, ReportOutput
+from backend.core.pipeline import run_audit, PipelineError, PIPELINE_MODES, DEFAULT_PIPELINE_MODE
+from backend.core.llm_cache import cache_bypass
+from backend.core.llm_client import providers
+from backend.core.metrics import request_timings
+from backend.core.cassette import cassette
+
+# The reports reflect and question; they never advise
+BANNED_PHRASES = ("you should", "i recommend", "best option is")
+SCORES = ("risk_score", "bias_score", "alignment_score")
+
+
+def sibling_path(corpus: str, suffix: str) -> str:
+    """benchmarks/golden/decisions.jsonl -> benchmarks/golden/decisions<suffix>"""
+    return os.path.splitext(corpus)[0] + suffix
+
+
+def input_digest(input_data: DecisionInput) -> str:
+    return hashlib.sha256(input_data.model_dump_json().encode("utf-8")).hexdigest()[:16]
+
+
+def load_corpus(path: str) -> List[DecisionInput]:
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    corpus.append(DecisionInput.model_validate_json(line))
+                except ValidationError as e:
+                    raise SystemExit(f"{path}:{number}: invalid DecisionInput: {e}")
+    return corpus
+
+
+def load_expected(path: str) -> Dict[int, dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {entry["index"]: entry for entry in map(json.loads, filter(str.strip, f))}
+
+
+def snapshot(index: int, input_data: DecisionInput, report: ReportOutput) -> dict:
+    biases = report.bias_analysis.biases if report.bias_analysis else []
+    return {
+        "index": index,
+        "input": input_digest(input_data),
+        **{name: getattr(report, name) for name in SCORES},
+        "bias_types": sorted({bias.bias_type.strip().lower() for bias in biases}),
+    }
+
+
+def check(result: dict, expected: Optional[dict], tolerance: float) -> List[str]:
+    """Problems with one audit result; empty when it passes."""
+    if "error" in result:
+        return [f"error: {result['error']}"]
+    report: ReportOutput = result["report"]
+    problems = []
+    body = report.model_dump_json()
+    try:
+        ReportOutput.model_validate_json(body)
+    except ValidationError as e:
+        problems.append(f"schema: {e.error_count()} validation error(s)")
+    banned = [phrase for phrase in BANNED_PHRASES if phrase in body.lower()]
+    if banned:
+        problems.append(f"banned phrases: {banned}")
+    if expected is not None:
+        actual = result["snapshot"]
+        if expected["input"] != actual["input"]:
+            problems.append("expected snapshot is for a different input; re-record")
+            return problems
+        for name in SCORES:
+            if abs(actual[name] - expected[name]) > tolerance:
+                problems.append(f"{name}: {actual[name]} != expected {expected[name]}")
+        if actual["bias_types"] != expected["bias_types"]:
+            problems.append(f"bias types: {actual['bias_types']} != expected {expected['bias_types']}")
+    return problems
+
+
+async def audit_one(index: int, input_data: DecisionInput, mode: str, slots: asyncio.Semaphore) -> dict:
+    async with slots:
+        # Each audit runs in its own task, so these only apply to it and its stages
+        cache_bypass.set(True)
+        timings: Dict[str, float] = {}
+        request_timings.set(timings)
+        try:
+            report = await run_audit(input_data, mode)
+        except PipelineError as e:
+            return {"index": index, "error": "; ".join(f"{name}: {err.message}" for name, err in e.errors.items())}
+        except Exception as e:
+            return {"index": index, "error": f"{type(e).__name__}: {e}"}
+        return {"index": index, "report": report, "snapshot": snapshot(index, input_data, report), "timings": timings}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def print_timings(results: List[dict]) -> None:
+    stages: Dict[str, List[float]] = {}
+    for result in results:
+        for name, seconds in result.get("timings", {}).items():
+            stages.setdefault(name, []).append(seconds)
+    print(f"{'stage':<20} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, samples in stages.items():
+        print(
+            f"{name:<20} {len(samples):>6} {percentile(samples, 0.5) * 1000:>9.1f}"
+            f" {percentile(samples, 0.95) * 1000:>9.1f} {max(samples) * 1000:>9.1f}"
+        )
+
+
+async def start_mock(port: int):
+    """
+    Starts benchmarks.mock_llm_server and makes it the only provider. Its
+    answers are schema-valid samples, not real analysis, so a cassette made
+    this way pins the pipeline's plumbing and scoring rather than any model.
+    """
+    from benchmarks.load_test import start_process, wait_until_up
+
+    process = start_process(
+        ["-m", "benchmarks.mock_llm_server", "--port", str(port), "--latency-ms", "20", "--latency-dist", "fixed"],
+        dict(os.environ)
+    )
+    try:
+        await wait_until_up(f"http://127.0.0.1:{port}/docs")
+    except Exception:
+        process.terminate()
+        raise
+    os.environ.update({"OPENAI_API_KEY": "sk-mock", "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1"})
+    os.environ.pop("GROQ_API_KEY", None)
+    # No client has been built yet, so re-reading the keys is enough
+    providers.configure()
+    return process
+
+
+async def run(args) -> int:
+    corpus = load_corpus(args.corpus)
+    cassette_path = args.cassette or sibling_path(args.corpus, ".cassette.jsonl.gz")
+    expected_path = args.expected or sibling_path(args.corpus, ".expected.jsonl")
+    cassette.configure("record" if args.record else "replay", cassette_path, args.latency_scale)
+    expected = {} if args.record else load_expected(expected_path)
+    if not args.record and not expected:
+        print(f"No expected snapshot at {expected_path}; checking schema and phrasing only.", file=sys.stderr)
+
+    mock = await start_mock(args.mock_port) if args.mock else None
+    slots = asyncio.Semaphore(max(1, args.concurrency))
+    results: List[dict] = []
+    started = time.perf_counter()
+    try:
+        # Rounds run one after another so repeats are audited, not coalesced
+        for _ in range(1 if args.record else args.repeat):
+            results += await asyncio.gather(*(
+                audit_one(index, input_data, args.mode, slots) for index, input_data in enumerate(corpus)
+            ))
+    finally:
+        cassette.close()
+        if mock is not None:
+            mock.terminate()
+            mock.wait()
+    elapsed = time.perf_counter() - started
+
+    failed = 0
+    for result in results:
+        problems = check(result, expected.get(result["index"]), args.score_tolerance)
+        if problems:
+            failed += 1
+            print(f"[FAIL] #{result['index']}: " + "; ".join(problems))
+
+    if args.record:
+        with open(expected_path, "w", encoding="utf-8") as f:
+            for result in sorted(results, key=lambda result: result["index"]):
+                if "snapshot" in result:
+                    f.write(json.dumps(result["snapshot"]) + "\n")
+        print(f"Recorded {cassette.recorded} new LLM calls to {cassette_path}, expected scores to {expected_path}")
+
+    print_timings(results)
+    print(
+        f"{len(results) - failed}/{len(results)} passed in {elapsed:.2f}s"
+        f" ({len(results) / elapsed:.0f} audits/s, {cassette.hits} replayed calls)"
+    )
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a golden corpus through the pipeline and compare.")
+    parser.add_argument("corpus", help="JSONL file with one DecisionInput per line")
+    parser.add_argument("--record", action="store_true", help="Call the provider, record the cassette and expected scores")
+    parser.add_argument("--mock", action="store_true", help="With --record: record from the local mock LLM server")
+    parser.add_argument("--mock-port", type=int, default=9102)
+    parser.add_argument("--cassette", help="Cassette file (default: <corpus>.cassette.jsonl.gz)")
+    parser.add_argument("--expected", help="Expected snapshot (default: <corpus>.expected.jsonl)")
+    parser.add_argument("--mode", choices=PIPELINE_MODES, default=DEFAULT_PIPELINE_MODE, help="Pipeline mode")
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the corpus this many times")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="Wait this fraction of each recorded latency")
+    parser.add_argument("--score-tolerance", type=float, default=0.0, help="Allowed absolute score difference")
+    args = parser.parse_args()
+    if args.mock and not args.record:
+        parser.error("--mock only applies to --record")
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
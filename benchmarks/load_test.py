@@ -0,0 +1,260 @@
+"""
+Offline load test of /audit against the mock LLM server.
+
+Starts the mock provider and the backend as local subprocesses (unless
+--backend-url is given), drives /audit at each concurrency level and reports
+throughput plus p50/p95/p99 latency end to end and per stage (from the
+Server-Timing header).
+
+    python -m benchmarks.load_test --concurrency 1 4 16 --requests 48
+    python -m benchmarks.load_test --save-baseline       # refresh benchmarks/baselines.json
+    python -m benchmarks.load_test --compare             # exit 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+from typing import Dict, List, Optional
+
+import httpx
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_DECISIONS = [
+    {
+        "decision_text": "I want to invest my entire savings into a new crypto coin because my friend said it will go up 100x next week.",
+        "domain": "finance",
+        "time_horizon": "short",
+        "values": ["security", "long-term growth"],
+    },
+    {
+        "decision_text": "Should I move to a new city for a job?",
+        "domain": "career",
+        "time_horizon": "long",
+        "values": ["career growth", "family", "adventure"],
+    },
+    {
+        "decision_text": "I am considering quitting my stable job to start a bakery with my savings.",
+        "domain": "career",
+        "time_horizon": "medium",
+        "values": [],
+    },
+]
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(samples: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50_ms": _ms(percentile(samples, 0.50)),
+        "p95_ms": _ms(percentile(samples, 0.95)),
+        "p99_ms": _ms(percentile(samples, 0.99)),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'decomposition;dur=812.3, report;dur=640.0' -> {name: seconds}"""
+    timings = {}
+    for part in filter(None, (p.strip() for p in header.split(","))):
+        name, _, duration = part.partition(";dur=")
+        try:
+            timings[name] = float(duration) / 1000.0
+        except ValueError:
+            continue
+    return timings
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int, total: int, mode: str) -> dict:
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            payload = dict(SAMPLE_DECISIONS[i % len(SAMPLE_DECISIONS)])
+            # Unique text per request so no cache or coalescing layer can shortcut it
+            payload["decision_text"] += f" (run {i})"
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    url, json=payload, params={"mode": mode, "timings": "true", "no_cache": "true"}
+                )
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+            latencies.append(elapsed)
+            for name, seconds in parse_server_timing(response.headers.get("server-timing", "")).items():
+                stages.setdefault(name, []).append(seconds)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "end_to_end": summarize(latencies),
+        "stages": {name: summarize(samples) for name, samples in sorted(stages.items())},
+    }
+
+
+def print_level(result: dict) -> None:
+    e2e = result["end_to_end"]
+    print(f"\nconcurrency={result['concurrency']}  ok={result['ok']}/{result['requests']}  "
+          f"errors={result['errors'] or 0}  throughput={result['throughput_rps']} req/s")
+    print(f"  {'stage':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print(f"  {'end_to_end':<20}{e2e['p50_ms']!s:>10}{e2e['p95_ms']!s:>10}{e2e['p99_ms']!s:>10}")
+    for name, stats in result["stages"].items():
+        print(f"  {name:<20}{stats['p50_ms']!s:>10}{stats['p95_ms']!s:>10}{stats['p99_ms']!s:>10}")
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance` (fraction) in throughput or end-to-end p50/p95."""
+    problems = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            problems.append(f"{key}: throughput {current['throughput_rps']} < baseline {previous['throughput_rps']}")
+        for metric in ("p50_ms", "p95_ms"):
+            now, then = current["end_to_end"][metric], previous["end_to_end"][metric]
+            if now is not None and then is not None and now > then * (1 + tolerance):
+                problems.append(f"{key}: end-to-end {metric} {now} > baseline {then}")
+    return problems
+
+
+def start_process(args: List[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable] + args, cwd=ROOT, env=env)
+
+
+async def wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Service at {url} did not come up within {timeout:.0f}s")
+
+
+async def run(args) -> int:
+    processes = []
+    backend_url = args.backend_url
+    try:
+        if backend_url is None:
+            env = dict(os.environ)
+            env.update({
+                "OPENAI_API_KEY": "sk-mock",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{args.mock_port}/v1",
+                "LLM_CACHE_ENABLED": "false",
+            })
+            env.pop("GROQ_API_KEY", None)
+            processes.append(start_process([
+                "-m", "benchmarks.mock_llm_server", "--port", str(args.mock_port),
+                "--latency-ms", str(args.latency_ms), "--latency-dist", args.latency_dist,
+                "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+                "--seed", "7",
+            ], env))
+            processes.append(start_process([
+                "-m", "uvicorn", "backend.main:app", "--port", str(args.backend_port), "--log-level", "warning",
+            ], env))
+            backend_url = f"http://127.0.0.1:{args.backend_port}"
+            await wait_until_up(f"http://127.0.0.1:{args.mock_port}/docs")
+
+        await wait_until_up(f"{backend_url}/metrics")
+
+        results = {}
+        limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            for concurrency in args.concurrency:
+                result = await run_level(client, f"{backend_url}/audit", concurrency, args.requests, args.mode)
+                results[f"{args.mode}@c{concurrency}"] = result
+                print_level(result)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines.update(results)
+        baselines["_meta"] = {
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "latency_ms": args.latency_ms,
+            "latency_dist": args.latency_dist,
+            "requests": args.requests,
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+
+    if args.compare:
+        problems = compare(results, baselines, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS:")
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against the baseline.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /audit load test against the mock LLM server.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=48, help="Requests per concurrency level")
+    parser.add_argument("--mode", default="staged", help="Pipeline mode to exercise")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean mock LLM latency")
+    parser.add_argument("--latency-dist", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--backend-url", default=None, help="Use an already running backend instead of starting one")
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--backend-port", type=int, default=8100)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="Compare against the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Local stand-in for an OpenAI-compatible chat-completions API, for offline
+benchmarks. It recognises each pipeline module by its system prompt and
+answers with schema-valid JSON for that module's response_model, after an
+injected latency. It can also inject errors and 429s. Requests with
+"stream": true get server-sent chunks, with the latency spread over them.
+
+    python -m benchmarks.mock_llm_server --port 9100 --latency-ms 800 --rate-limit-rate 0.02
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1.
+"""
+import time
+import uuid
+import json
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, Type
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from backend.core.schemas import (
+    DecompositionOutput, BiasOutput, SimulationOutput, IntegrityOutput,
+    ReportNarrative, FusedAnalysisOutput, FusedReportOutput
+)
+
+# First line of each module's system prompt -> the model it must return
+PROMPT_MODELS: Dict[str, Type[BaseModel]] = {
+    "You are a Cognitive Decision Decomposer.": DecompositionOutput,
+    "You are a Cognitive Bias Detection Engine.": BiasOutput,
+    "You are a Cognitive Bias Verification Engine.": BiasOutput,
+    "You are a Counterfactual Simulation Engine.": SimulationOutput,
+    "You are a defined \"Integrity & Value Alignment Engine\".": IntegrityOutput,
+    "You are a Decision Integrity Report Generator.": ReportNarrative,
+    "You are a Decision Integrity Analysis Engine.": FusedAnalysisOutput,
+    "You are a Decision Integrity Audit Engine.": FusedReportOutput,
+}
+
+
+class MockConfig:
+    latency_ms: float = 500.0
+    latency_dist: str = "lognormal"
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    list_items: int = 3
+
+
+config = MockConfig()
+app = FastAPI(title="Mock LLM API")
+
+
+def sample_value(schema: Dict[str, Any], defs: Dict[str, Any], name: str = "") -> Any:
+    """Builds a plausible value for a JSON-schema node."""
+    if "$ref" in schema:
+        return sample_value(defs[schema["$ref"].split("/")[-1]], defs, name)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return sample_value(options[0], defs, name) if options else None
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {key: sample_value(sub, defs, key) for key, sub in properties.items()}
+    if kind == "array":
+        if "prefixItems" in schema:
+            return [sample_value(sub, defs, name) for sub in schema["prefixItems"]]
+        return [sample_value(schema.get("items", {}), defs, name) for _ in range(config.list_items)]
+    if kind in ("number", "integer"):
+        low = schema.get("minimum", 0)
+        high = schema.get("maximum", 100)
+        value = round(random.uniform(low, high), 1)
+        return int(value) if kind == "integer" else value
+    if kind == "boolean":
+        return False
+
+    # Strings: honour "a|b|c" style descriptions, otherwise plausible prose
+    description = schema.get("description", "")
+    if "|" in description and " " not in description.strip():
+        return random.choice(description.split("|"))
+    if name == "reflection_questions":
+        return "Have you considered what would change if this assumption turned out to be wrong?"
+    return f"This {name.replace('_', ' ') or 'item'} could lead to several outcomes depending on circumstances."
+
+
+def sample_payload(model: Type[BaseModel]) -> Dict[str, Any]:
+    schema = model.model_json_schema()
+    return sample_value(schema, schema.get("$defs", {}))
+
+
+def sample_latency() -> float:
+    mean = config.latency_ms / 1000.0
+    if config.latency_dist == "fixed":
+        return mean
+    if config.latency_dist == "uniform":
+        return random.uniform(0, 2 * mean)
+    # lognormal with the configured mean
+    mu = -0.5 * config.latency_sigma ** 2
+    return mean * random.lognormvariate(mu, config.latency_sigma)
+
+
+def error_response(status: int, message: str, headers: Dict[str, str] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": "mock_error", "code": status}},
+        headers=headers
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    system_prompt = messages[0]["content"].strip() if messages else ""
+    first_line = system_prompt.splitlines()[0] if system_prompt else ""
+
+    latency = sample_latency()
+    stream = bool(body.get("stream"))
+    # Streamed answers start after a fifth of the latency; the rest is spread over the chunks
+    await asyncio.sleep(latency * 0.2 if stream else latency)
+
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        return error_response(429, "Rate limit reached (mock).", {"retry-after": "1"})
+    if roll < config.rate_limit_rate + config.error_rate:
+        return error_response(500, "Internal error (mock).")
+
+    model = PROMPT_MODELS.get(first_line)
+    if model is None:
+        return error_response(400, f"Mock server does not recognise system prompt: {first_line!r}")
+
+    content = json.dumps(sample_payload(model))
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    completion_tokens = len(content) // 4
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+    if stream:
+        return StreamingResponse(stream_chunks(body, content, usage, latency * 0.8), media_type="text/event-stream")
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": usage,
+    }
+
+
+async def stream_chunks(body: Dict[str, Any], content: str, usage: Dict[str, int], duration: float):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+
+    def chunk(choices, extra=None):
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": choices,
+            **(extra or {}),
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    for piece in pieces:
+        await asyncio.sleep(duration / len(pieces))
+        yield chunk([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+    yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+    if body.get("stream_options", {}).get("include_usage"):
+        yield chunk([], {"usage": usage})
+    yield "data: [DONE]\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat-completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms, help="Mean response latency")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default=config.latency_dist)
+    parser.add_argument("--latency-sigma", type=float, default=config.latency_sigma, help="Lognormal shape (tail heaviness)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.latency_dist = args.latency_dist
+    config.latency_sigma = args.latency_sigma
+    config.error_rate = args.error_rate
+    config.rate_limit_rate = args.rate_limit_rate
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Near-duplicate lookup latency (audit_history.find_similar) against a large
+audit history. The history is filled in bulk: most rows are filler with
+random MinHash signatures, which is what distinct decision texts look like
+to the LSH index, plus real audits recorded through AuditHistory.record.
+Then it times lookups that miss, that hit an edited copy of a real audit,
+and that land in a bucket crowded by a templated batch.
+
+    python -m benchmarks.near_duplicate_bench
+    python -m benchmarks.near_duplicate_bench --audits 100000 --lookups 500 --path /tmp/audits.sqlite3
+
+Numbers are for a warm page cache on the machine it runs on. A history
+larger than memory adds disk reads to every lookup.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+from typing import Callable, Dict, List
+
+from backend.core.audit_history import AuditHistory
+from backend.core.near_duplicates import (
+    BANDS, NEAR_DUPLICATE_MAX_CANDIDATES, NEAR_DUPLICATE_THRESHOLD, NUM_PERM, band_keys, pack
+)
+from backend.core.schemas import DecisionInput, ReportOutput
+from benchmarks.mock_llm_server import sample_payload
+
+DOMAINS = ("career", "finance", "health", "relationships", "education")
+HORIZONS = ("short", "medium", "long")
+WORDS = (
+    "job quit move city savings loan house rent partner family school degree startup salary risk "
+    "invest stocks retire health doctor surgery friend offer contract abroad visa business bakery "
+    "course years months because want need think maybe stable new old career money time"
+).split()
+
+
+def random_text(rng: random.Random, words: int = 40) -> str:
+    return "I " + " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def edit(rng: random.Random, text: str) -> str:
+    """A typo: one character dropped."""
+    i = rng.randrange(2, len(text) - 1)
+    return text[:i] + text[i + 1:]
+
+
+def decision(rng: random.Random, text: str) -> DecisionInput:
+    return DecisionInput(
+        decision_text=text, domain=rng.choice(DOMAINS), time_horizon=rng.choice(HORIZONS), values=["security"]
+    )
+
+
+def fill(history: AuditHistory, rng: random.Random, count: int, batch: int) -> None:
+    """Filler audits written straight to the tables, `batch` rows per transaction."""
+    db = history.open()
+    inserted = 0
+    while inserted < count:
+        rows = min(batch, count - inserted)
+        seq_base = db.execute("SELECT COALESCE(MAX(seq), 0) FROM audits").fetchone()[0]
+        audits, signatures, bands = [], [], []
+        for offset in range(1, rows + 1):
+            seq = seq_base + offset
+            domain, horizon = rng.choice(DOMAINS), rng.choice(HORIZONS)
+            sig = tuple(rng.getrandbits(64) for _ in range(NUM_PERM))
+            # Placeholder payloads: a random signature never passes the threshold, so these are never read back
+            audits.append((seq, f"filler-{seq}", time.time(), domain, horizon))
+            signatures.append((seq, pack(sig)))
+            bands.extend((key, seq) for key in band_keys(f"{domain}|{horizon}|security", sig))
+        db.executemany(
+            "INSERT INTO audits (seq, id, created_at, mode, domain, time_horizon, risk_score, bias_score,"
+            " alignment_score, input, report) VALUES (?, ?, ?, 'staged', ?, ?, 0, 0, 0, '{}', '{}')",
+            audits
+        )
+        db.executemany("INSERT INTO audit_signatures (audit_seq, signature) VALUES (?, ?)", signatures)
+        db.executemany("INSERT INTO audit_bands (band_key, audit_seq) VALUES (?, ?)", bands)
+        db.commit()
+        inserted += rows
+        print(f"\r  {inserted:,} / {count:,} audits", end="", flush=True)
+    print()
+
+
+def time_lookups(lookup: Callable[[DecisionInput], object], decisions: List[DecisionInput]) -> Dict[str, float]:
+    times, hits = [], 0
+    for input_data in decisions:
+        started = time.perf_counter()
+        hits += lookup(input_data) is not None
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return {
+        "p50": statistics.median(times) * 1000,
+        "p95": times[int(0.95 * (len(times) - 1))] * 1000,
+        "p99": times[int(0.99 * (len(times) - 1))] * 1000,
+        "hit_rate": hits / len(times),
+    }
+
+
+def run(args) -> int:
+    rng = random.Random(args.seed)
+    path = args.path or os.path.join(tempfile.mkdtemp(prefix="near_dup_bench_"), "audits.sqlite3")
+    history = AuditHistory(path)
+    report = ReportOutput(**{**sample_payload(ReportOutput), "near_duplicate_of": None})
+
+    existing = history.open().execute("SELECT COUNT(*) FROM audits").fetchone()[0]
+    print(f"history: {path} ({existing:,} audits)")
+    started = time.perf_counter()
+    if existing < args.audits:
+        fill(history, rng, args.audits - existing, args.batch)
+    seeds = [decision(rng, random_text(rng)) for _ in range(args.lookups)]
+    for input_data in seeds:
+        history.record(input_data, report, "staged")
+    # A templated batch: texts that differ in a single number, all in one partition
+    template = random_text(rng)
+    crowd = [DecisionInput(decision_text=f"{template} Option {i}.", domain="career", time_horizon="long")
+             for i in range(args.crowd)]
+    for input_data in crowd:
+        history.record(input_data, report, "staged")
+    total = history.open().execute("SELECT COUNT(*) FROM audits").fetchone()[0]
+    print(f"filled in {time.perf_counter() - started:.1f}s; {total:,} audits, {os.path.getsize(path) / 1e6:.0f} MB")
+
+    def lookup(input_data: DecisionInput):
+        return history.find_similar(input_data, NEAR_DUPLICATE_THRESHOLD)
+
+    cases = {
+        "miss (new text)": [decision(rng, random_text(rng)) for _ in range(args.lookups)],
+        "hit (one typo)": [s.model_copy(update={"decision_text": edit(rng, s.decision_text)}) for s in seeds],
+        f"crowded bucket ({args.crowd:,})": [
+            DecisionInput(decision_text=f"{template} Option {args.crowd + i}.", domain="career", time_horizon="long")
+            for i in range(min(args.lookups, 200))
+        ],
+    }
+    # Warm the page cache and the statement cache first (with other texts: signatures are memoized)
+    time_lookups(lookup, [decision(rng, random_text(rng)) for _ in range(50)])
+
+    print(f"\nfind_similar, {BANDS} bands, <= {NEAR_DUPLICATE_MAX_CANDIDATES} candidates, "
+          f"threshold {NEAR_DUPLICATE_THRESHOLD}")
+    print(f"{'case':<26}{'p50':>9}{'p95':>9}{'p99':>9}{'hits':>8}   (ms)")
+    for name, decisions in cases.items():
+        result = time_lookups(lookup, decisions)
+        print(f"{name:<26}{result['p50']:>9.3f}{result['p95']:>9.3f}{result['p99']:>9.3f}{result['hit_rate']:>8.0%}")
+    print("\nEvery lookup includes the MinHash of the query text; hits also load and validate the stored report.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate lookup latency against a large audit history.")
+    parser.add_argument("--audits", type=int, default=1_000_000, help="Filler audits in the history")
+    parser.add_argument("--lookups", type=int, default=1000, help="Lookups per case")
+    parser.add_argument("--crowd", type=int, default=2000, help="Templated audits sharing one LSH bucket")
+    parser.add_argument("--batch", type=int, default=20000, help="Filler rows per transaction")
+    parser.add_argument("--path", help="History database; reused (and topped up) if it exists. Default: a temp file")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark of the response path: parsing a cached LLM payload,
+serializing a full report, and the wire size of the full, compact and
+field-selected report with and without compression. The report is a
+schema-valid sample built the same way as the mock LLM server's answers.
+
+    python -m benchmarks.serialization_bench
+    python -m benchmarks.serialization_bench --list-items 10 --number 2000
+"""
+import gzip
+import json
+import timeit
+import argparse
+from typing import Callable, Dict, Optional
+
+from backend.core.schemas import ReportOutput, BiasOutput
+from backend.core.pipeline import STAGES
+from backend.core.compression import GZIP_LEVEL, BROTLI_QUALITY
+from benchmarks.mock_llm_server import config, sample_payload
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def per_call_us(fn: Callable[[], object], number: int) -> float:
+    # Best of 5 repeats; the minimum is the least disturbed by other processes
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def print_timings(title: str, timings: Dict[str, Optional[float]]) -> None:
+    print(title)
+    baseline = next(iter(timings.values()))
+    for name, us in timings.items():
+        if us is None:
+            print(f"  {name:<34} (not installed)")
+        else:
+            print(f"  {name:<34} {us:9.1f} us  x{baseline / us:4.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization and compression micro-benchmark.")
+    parser.add_argument("--list-items", type=int, default=5, help="items per list in the sample report")
+    parser.add_argument("--number", type=int, default=1000, help="calls per timing repeat")
+    args = parser.parse_args()
+
+    config.list_items = args.list_items
+    report = ReportOutput(**sample_payload(ReportOutput))
+    cached = json.dumps(sample_payload(BiasOutput))
+
+    print_timings("Parse a cached LLM response (BiasOutput):", {
+        "Model(**json.loads(...))": per_call_us(lambda: BiasOutput(**json.loads(cached)), args.number),
+        "Model.model_validate_json(...)": per_call_us(lambda: BiasOutput.model_validate_json(cached), args.number),
+    })
+
+    print_timings("Serialize a full ReportOutput:", {
+        "json.dumps(model_dump())": per_call_us(lambda: json.dumps(report.model_dump()), args.number),
+        "model_dump_json()": per_call_us(report.model_dump_json, args.number),
+        "orjson.dumps(model_dump())": (
+            per_call_us(lambda: orjson.dumps(report.model_dump()), args.number) if orjson else None
+        ),
+    })
+
+    compact = set(ReportOutput.model_fields) - set(STAGES)
+    payloads = {
+        "full": report.model_dump_json(),
+        "compact=true": report.model_dump_json(include=compact),
+        "fields=risk_score,bias_score": report.model_dump_json(include={"risk_score", "bias_score"}),
+    }
+    print("Response bytes:")
+    print(f"  {'':<30} {'identity':>9} {'gzip':>9} {'br':>9}")
+    for name, body in payloads.items():
+        data = body.encode("utf-8")
+        gzipped = len(gzip.compress(data, compresslevel=GZIP_LEVEL))
+        brotlied = len(brotli.compress(data, quality=BROTLI_QUALITY)) if brotli else None
+        print(f"  {name:<30} {len(data):>9} {gzipped:>9} {brotlied if brotlied is not None else '-':>9}")
+
+
+if __name__ == "__main__":
+    main()
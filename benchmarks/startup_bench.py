@@ -0,0 +1,120 @@
+"""
+Cold-start benchmark of the backend against the mock LLM server.
+
+Measures, in fresh processes: the import time of backend.main, then for a
+uvicorn worker the time until it accepts connections, until GET /ready
+answers 200, and the latency of its first and second /audit. Each worker
+runs once with connection pre-opening disabled and once with it enabled.
+
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --imports 10 --latency-ms 50
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.load_test import ROOT, SAMPLE_DECISIONS, start_process, wait_until_up
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)"
+
+
+def import_times(runs: int, env: dict) -> List[float]:
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return times
+
+
+async def wait_for(client: httpx.AsyncClient, url: str, ready: bool, timeout: float = 60.0) -> None:
+    """Until `url` answers at all, or with 200 when `ready`."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get(url)
+            if not ready or response.status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.01)
+    raise RuntimeError(f"{url} did not {'become ready' if ready else 'answer'} within {timeout:.0f}s")
+
+
+async def measure_worker(port: int, env: dict) -> Dict[str, float]:
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = start_process(["-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"], env)
+    result = {}
+    try:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            await wait_for(client, f"{base}/ready", ready=False)
+            result["listening"] = time.perf_counter() - started
+            await wait_for(client, f"{base}/ready", ready=True)
+            result["ready"] = time.perf_counter() - started
+            for name, decision in zip(("first_audit", "second_audit"), SAMPLE_DECISIONS):
+                call_started = time.perf_counter()
+                response = await client.post(f"{base}/audit", json=decision, params={"no_cache": "true"})
+                response.raise_for_status()
+                result[name] = time.perf_counter() - call_started
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+
+async def run(args) -> int:
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "sk-mock",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.mock_port}/v1",
+        "LLM_CACHE_ENABLED": "false",
+        "AUDIT_HISTORY_PATH": "",
+        "JOB_STORE_PATH": "",
+    })
+    env.pop("GROQ_API_KEY", None)
+
+    times = import_times(args.imports, env)
+    print(f"import backend.main: median {statistics.median(times) * 1000:.0f} ms, "
+          f"min {min(times) * 1000:.0f} ms over {len(times)} runs")
+
+    mock = start_process([
+        "-m", "benchmarks.mock_llm_server", "--port", str(args.mock_port),
+        "--latency-ms", str(args.latency_ms), "--latency-dist", "fixed",
+    ], env)
+    try:
+        await wait_until_up(f"http://127.0.0.1:{args.mock_port}/docs")
+        print(f"\n{'worker':<22}{'listening':>11}{'ready':>9}{'1st audit':>11}{'2nd audit':>11}   (ms)")
+        for label, preopen in (("no pre-open", "0"), (f"pre-open {args.preopen}", str(args.preopen))):
+            result = await measure_worker(args.backend_port, {**env, "STARTUP_PREOPEN_CONNECTIONS": preopen})
+            print(f"{label:<22}" + "".join(
+                f"{result[name] * 1000:>{width}.0f}"
+                for name, width in (("listening", 11), ("ready", 9), ("first_audit", 11), ("second_audit", 11))
+            ))
+    finally:
+        mock.terminate()
+        mock.wait()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend cold-start benchmark against the mock LLM server.")
+    parser.add_argument("--imports", type=int, default=5, help="Fresh-process import measurements")
+    parser.add_argument("--preopen", type=int, default=2, help="STARTUP_PREOPEN_CONNECTIONS for the warm worker")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock LLM latency")
+    parser.add_argument("--mock-port", type=int, default=9101)
+    parser.add_argument("--backend-port", type=int, default=8101)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
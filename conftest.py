@@ -0,0 +1,52 @@
+"""Fixtures shared by the unit tests (test_system.py needs a running server instead)."""
+import json
+import types
+import asyncio
+
+import pytest
+
+from backend.core import llm_client, resilience
+from benchmarks.mock_llm_server import PROMPT_MODELS, sample_payload
+
+
+class FakeCompletions:
+    """Answers every chat completion with `{}` (or `answer(messages)`) after `delay` seconds."""
+
+    def __init__(self, delay: float, answer=None):
+        self.delay = delay
+        self.answer = answer
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        content = self.answer(kwargs["messages"]) if self.answer is not None else "{}"
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    """One 'openai' provider whose client answers after 300ms, with fresh breakers and semaphores."""
+    completions = FakeCompletions(0.3)
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm_client.providers, "keys", {"openai": "sk-test"})
+    monkeypatch.setattr(llm_client.providers, "primary", "openai")
+    monkeypatch.setattr(llm_client.providers, "_clients", {"openai": client})
+    monkeypatch.setattr(llm_client, "_semaphores", {})
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_latencies", {})
+    return completions
+
+
+def sample_answer(messages) -> str:
+    """What the mock LLM server answers: a schema-valid sample for the module's system prompt."""
+    return json.dumps(sample_payload(PROMPT_MODELS[messages[0]["content"].strip().splitlines()[0]]))
+
+
+@pytest.fixture
+def mock_provider(fake_provider, monkeypatch):
+    """fake_provider answering like benchmarks.mock_llm_server, after 10ms."""
+    monkeypatch.setattr(fake_provider, "delay", 0.01)
+    monkeypatch.setattr(fake_provider, "answer", sample_answer)
+    return fake_provider
@@ -4,6 +4,10 @@ import json
 
 # Configuration
 API_URL = "http://localhost:8000/audit"
+STREAM_URL = f"{API_URL}/stream"
+HISTORY_URL = "http://localhost:8000/audits"
+# (connect, read) seconds; the read timeout applies between streamed events
+REQUEST_TIMEOUT = (5, 120)
 
 st.set_page_config(
     page_title="SecondBrain OS",
@@ -46,6 +50,9 @@ st.subheader("Decision Integrity & Cognitive Bias Auditing System")
 # storage for report (session state)
 if 'report' not in st.session_state:
     st.session_state['report'] = None
+# id of the last audit, so re-auditing after small edits reuses unaffected stages
+if 'audit_id' not in st.session_state:
+    st.session_state['audit_id'] = None
 
 # --- SIDEBAR INPUTS ---
 with st.sidebar:
@@ -67,6 +74,25 @@ with st.sidebar:
         help="List your top values to check alignment."
     )
 
+    # Past audits load from the backend's history store without re-running the LLM
+    with st.expander("Past Audits"):
+        try:
+            history = requests.get(HISTORY_URL, params={"limit": 20}, timeout=REQUEST_TIMEOUT).json()["items"]
+        except Exception:
+            history = []
+        if history:
+            labels = {
+                f"{item['input']['domain']} · risk {item['risk_score']:.0f} · {item['input']['decision_text'][:40]}": item["id"]
+                for item in history
+            }
+            choice = st.selectbox("Recent", list(labels))
+            if st.button("Load", use_container_width=True):
+                record = requests.get(f"{HISTORY_URL}/{labels[choice]}", timeout=REQUEST_TIMEOUT).json()
+                st.session_state['report'] = record["report"]
+                st.session_state['audit_id'] = record["report"].get("audit_id")
+        else:
+            st.caption("No past audits yet.")
+
 # --- MAIN INPUT ---
 decision_text = st.text_area(
     "What decision are you facing?",
@@ -74,39 +100,8 @@ decision_text = st.text_area(
     height=150
 )
 
-# --- AUDIT BUTTON ---
-if st.button("Audit Decision", type="primary", use_container_width=True):
-    if not decision_text:
-        st.error("Please enter a decision to audit.")
-    else:
-        values_list = [v.strip() for v in values_input.split(",") if v.strip()]
-        
-        payload = {
-            "decision_text": decision_text,
-            "domain": domain,
-            "time_horizon": time_horizon,
-            "values": values_list
-        }
-        
-        with st.spinner("Auditing decision... Analyzing biases... Simulating futures..."):
-            try:
-                response = requests.post(API_URL, json=payload)
-                if response.status_code == 200:
-                    st.session_state['report'] = response.json()
-                    st.success("Audit Complete.")
-                else:
-                    st.error(f"Error: {response.text}")
-            except Exception as e:
-                st.error(f"Connection Error: {e}")
-
-# --- REPORT DISPLAY ---
-report = st.session_state['report']
-
-if report:
-    st.markdown("---")
-    st.header("Decision Audit Report")
-    
-    # 1. SCORES
+# --- REPORT SECTIONS ---
+def render_scores(report):
     col1, col2, col3 = st.columns(3)
     with col1:
         st.markdown(f"""
@@ -133,9 +128,9 @@ if report:
         </div>
         """, unsafe_allow_html=True)
 
-    # 2. BIASES
+def render_biases(bias_analysis):
     st.markdown("### 🔍 Detected Biases")
-    biases = report.get('bias_analysis', {}).get('biases', [])
+    biases = (bias_analysis or {}).get('biases', [])
     if not biases:
         st.info("No significant biases detected.")
     else:
@@ -143,9 +138,9 @@ if report:
             with st.expander(f"{b['bias_type']} ({b['severity'].upper()})"):
                 st.write(f"**Evidence:** \"{b['evidence']}\"")
 
-    # 3. DECOMPOSITION
+def render_decomposition(decomp):
     st.markdown("### 🧩 Decision Components")
-    decomp = report.get('decomposition', {})
+    decomp = decomp or {}
     c1, c2 = st.columns(2)
     with c1:
         st.write("**Objective:**", decomp.get('objective'))
@@ -162,9 +157,9 @@ if report:
         for e in decomp.get('emotional_signals', []):
             st.markdown(f"- {e}")
 
-    # 4. SIMULATION
+def render_simulation(simulation):
     st.markdown("### 🔮 Future Scenarios")
-    sim = report.get('simulation', {}).get('scenarios', {})
+    sim = (simulation or {}).get('scenarios', {})
     
     tab1, tab2, tab3, tab4 = st.tabs(["Most Likely", "Best Case", "Worst Case", "Long Term"])
     
@@ -177,22 +172,128 @@ if report:
     with tab4:
         st.warning(sim.get('long_term'))
 
-    # 5. INTEGRITY & REFLECTION
+def render_integrity(integrity):
     st.markdown("### ⚖️ Value Alignment & Reflection")
     
     # Conflicts
-    conflicts = report.get('integrity_analysis', {}).get('conflicts', [])
+    conflicts = (integrity or {}).get('conflicts', [])
     if conflicts:
         st.markdown("#### Conflicts Detected:")
         for c in conflicts:
             st.warning(f"**{c['value']}**: {c['conflict_reason']}")
     else:
         st.success("No direct value conflicts detected.")
-        
-    # Reflection Questions
+
+def render_reflection(report):
     st.markdown("#### 🤔 Reflection Questions")
     for q in report.get('reflection_questions', []):
         st.markdown(f"> *{q}*")
 
+# Page order of the report; stage sections fill in as their events arrive
+SECTIONS = [
+    ("scores", render_scores),
+    ("bias_analysis", render_biases),
+    ("decomposition", render_decomposition),
+    ("simulation", render_simulation),
+    ("integrity_analysis", render_integrity),
+    ("reflection", render_reflection),
+]
+RENDERERS = dict(SECTIONS)
+
+def create_report_layout():
+    st.markdown("---")
+    st.header("Decision Audit Report")
+    return {name: st.empty() for name, _ in SECTIONS}
+
+def fill_section(layout, name, data):
+    with layout[name].container():
+        RENDERERS[name](data)
+
+def set_path(data, path, value):
+    """Places a streamed field, e.g. ["scenarios", "best_case"] or ["biases", 0], into a partial section."""
+    for key, next_key in zip(path[:-1], path[1:]):
+        data = data.setdefault(key, [] if isinstance(next_key, int) else {})
+    last = path[-1]
+    if isinstance(last, int):
+        data.extend([None] * (last + 1 - len(data)))
+    data[last] = value
+
+def render_report(report):
+    layout = create_report_layout()
+    fill_section(layout, "scores", report)
+    for name in ["bias_analysis", "decomposition", "simulation", "integrity_analysis"]:
+        fill_section(layout, name, report.get(name))
+    fill_section(layout, "reflection", report)
     st.markdown("---")
     st.caption("SecondBrain OS - Non-Prescriptive AI Decision Support System")
+
+# --- AUDIT BUTTON ---
+streamed_this_run = False
+
+if st.button("Audit Decision", type="primary", use_container_width=True):
+    if not decision_text:
+        st.error("Please enter a decision to audit.")
+    else:
+        values_list = [v.strip() for v in values_input.split(",") if v.strip()]
+        
+        payload = {
+            "decision_text": decision_text,
+            "domain": domain,
+            "time_horizon": time_horizon,
+            "values": values_list
+        }
+        
+        # partial=true streams each field as soon as the model has written it
+        params = {"partial": "true"}
+        if st.session_state['audit_id']:
+            params["audit_id"] = st.session_state['audit_id']
+        st.session_state['report'] = None
+        layout = create_report_layout()
+        partials = {}
+        with st.spinner("Auditing decision... Analyzing biases... Simulating futures..."):
+            try:
+                # Sections render as each module finishes instead of after the whole pipeline
+                with requests.post(STREAM_URL, json=payload, params=params, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                    if response.status_code != 200:
+                        st.error(f"Error: {response.text}")
+                    else:
+                        for line in response.iter_lines():
+                            if not line:
+                                continue
+                            event = json.loads(line)
+                            if event["event"] == "partial":
+                                section = "reflection" if event["stage"] == "report" else event["stage"]
+                                if section in RENDERERS and event["path"]:
+                                    set_path(partials.setdefault(section, {}), event["path"], event["data"])
+                                    fill_section(layout, section, partials[section])
+                            elif event["event"] == "partial_reset":
+                                # A stage is being retried: drop the fields of the discarded attempt
+                                for stage in event["stages"]:
+                                    section = "reflection" if stage == "report" else stage
+                                    partials.pop(section, None)
+                                    if section in layout:
+                                        layout[section].empty()
+                            elif event["event"] == "stage":
+                                fill_section(layout, event["stage"], event["data"])
+                            elif event["event"] == "report":
+                                report = event["data"]
+                                fill_section(layout, "scores", report)
+                                fill_section(layout, "reflection", report)
+                                st.session_state['report'] = report
+                                st.session_state['audit_id'] = report.get('audit_id')
+                                streamed_this_run = True
+                                st.success("Audit Complete.")
+                            elif event["event"] == "error":
+                                st.error(f"Error: {event.get('stages') or event.get('detail')}")
+            except Exception as e:
+                st.error(f"Connection Error: {e}")
+
+        if streamed_this_run:
+            st.markdown("---")
+            st.caption("SecondBrain OS - Non-Prescriptive AI Decision Support System")
+
+# --- REPORT DISPLAY ---
+report = st.session_state['report']
+
+if report and not streamed_this_run:
+    render_report(report)
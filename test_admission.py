@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from backend.core.admission import (
+    AdmissionController, DeadlineExceeded, Overloaded, bounded_timeout, remaining_time, set_deadline, within_deadline
+)
+
+
+def test_bounded_timeout_without_and_with_a_deadline():
+    async def run():
+        assert remaining_time() is None
+        assert bounded_timeout(30) == 30
+        set_deadline(1.0)
+        assert bounded_timeout(30) <= 1.0
+        set_deadline(-1)  # non-positive clears the deadline
+        assert bounded_timeout(30) == 30
+
+    asyncio.run(run())
+
+
+def test_within_deadline_raises_deadline_exceeded():
+    async def run():
+        set_deadline(0.05)
+        await within_deadline(asyncio.sleep(1))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+
+
+def test_sheds_when_slots_and_queue_are_full():
+    controller = AdmissionController(max_active=1, max_queued=1)
+
+    async def run():
+        ticket = await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire()
+        assert shed.value.retry_after >= 1
+        with pytest.raises(Overloaded):
+            controller.check()
+
+        # Batch records wait instead of being shed
+        batch_record = asyncio.ensure_future(controller.acquire(shed=False))
+        ticket.release()
+        ticket.release()  # idempotent
+        (await waiter).release()
+        (await batch_record).release()
+        assert controller.active == 0 and controller.queued == 0
+
+    asyncio.run(run())
+
+
+def test_queued_request_is_shed_at_its_deadline():
+    controller = AdmissionController(max_active=1, max_queued=4)
+
+    async def run():
+        ticket = await controller.acquire()
+        set_deadline(0.05)
+        with pytest.raises(DeadlineExceeded):
+            await controller.acquire()
+        ticket.release()
+        assert controller.queued == 0
+
+    asyncio.run(run())
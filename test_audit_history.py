@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+from backend.core.audit_history import AuditHistory
+from backend.core.schemas import DecisionInput, ReportOutput
+from benchmarks.mock_llm_server import sample_payload
+
+TEXT = (
+    "I want to quit my stable job to open a bakery with my savings, because everyone "
+    "says the neighbourhood needs one and I have always loved baking bread."
+)
+
+
+def decision(text: str = TEXT, domain: str = "career") -> DecisionInput:
+    return DecisionInput(decision_text=text, domain=domain, time_horizon="long", values=["security"])
+
+
+def report(risk: float) -> ReportOutput:
+    return ReportOutput(**{**sample_payload(ReportOutput), "risk_score": risk, "near_duplicate_of": None})
+
+
+def test_record_query_and_get(tmp_path):
+    history = AuditHistory(str(tmp_path / "audits.sqlite3"))
+    ids = [history.record(decision(domain=domain), report(risk), "staged")
+           for domain, risk in (("career", 80), ("finance", 20), ("career", 40))]
+
+    items, cursor = history.query(domain="career", limit=1)
+    assert [item.id for item in items] == [ids[2]] and cursor is not None
+    items, cursor = history.query(domain="career", limit=1, cursor=cursor)
+    assert [item.id for item in items] == [ids[0]] and cursor is None
+    assert [item.id for item in history.query(min_risk=50)[0]] == [ids[0]]
+
+    record = history.get(ids[1])
+    assert record.input.domain == "finance" and record.report.risk_score == 20
+    assert history.get("missing") is None
+
+
+def test_near_duplicate_lookup_is_partitioned(tmp_path):
+    history = AuditHistory(str(tmp_path / "audits.sqlite3"))
+    record_id = history.record(decision(), report(80), "staged")
+
+    edited = decision(TEXT.replace("bakery", "bakery,").replace("always", "allways"))
+    match = history.find_similar(edited, 0.85)
+    assert match is not None and match[0].id == record_id and match[1] >= 0.85
+    # Same text, other domain: never a candidate
+    assert history.find_similar(decision(domain="finance"), 0.5) is None
+    assert history.find_similar(decision("Should I adopt a second cat next spring?"), 0.85) is None
+
+
+def test_async_access_runs_sqlite_off_the_event_loop(tmp_path):
+    history = AuditHistory(str(tmp_path / "audits.sqlite3"))
+    threads = set()
+    # Called on the thread that runs each statement
+    history.open().set_trace_callback(lambda statement: threads.add(threading.get_ident()))
+
+    async def run():
+        record_id = await history.arecord(decision(), report(80), "staged")
+        items, _ = await history.aquery(domain="career")
+        record = await history.aget(record_id)
+        match = await history.afind_similar(decision(), 0.85)
+        return record_id, items, record, match
+
+    record_id, items, record, match = asyncio.run(run())
+    assert [item.id for item in items] == [record_id] and record.id == record_id and match[0].id == record_id
+    assert threads and threading.get_ident() not in threads
+
+
+def test_disabled_history():
+    history = AuditHistory(None)
+    assert not history.enabled
+    assert asyncio.run(history.arecord(decision(), report(80), "staged")) is None
+    assert asyncio.run(history.aquery()) == ([], None)
@@ -0,0 +1,49 @@
+import re
+
+from backend.core.bias_prescreen import LEXICON, prescreen_biases
+
+
+def types_of(text: str) -> set:
+    return {candidate.bias_type for candidate in prescreen_biases(text)}
+
+
+def test_every_pattern_compiles_without_capturing_groups():
+    # prescreen_biases maps a match to its weight by the index of its outer group
+    for patterns in LEXICON.values():
+        for pattern, weight in patterns:
+            assert re.compile(pattern).groups == 0, pattern
+            assert 0 < weight < 1
+
+
+def test_hundred_percent_is_overconfidence():
+    assert "Overconfidence" in types_of("I am 100% sure this works.")
+    assert "Overconfidence" in types_of("It is 100 % going to happen.")
+    assert "Overconfidence" not in types_of("I own 1000 shares.")
+
+
+def test_neutral_text_has_no_candidates():
+    assert prescreen_biases("We compared three suppliers on price and delivery time.") == []
+
+
+def test_hits_combine_and_evidence_is_the_strongest_sentence():
+    text = "My friend said it will go up 100x next week. It can't fail! I have to buy right now."
+    candidates = prescreen_biases(text)
+    by_type = {candidate.bias_type: candidate for candidate in candidates}
+    assert {"Overconfidence", "Herd Mentality", "Present Bias"} <= set(by_type)
+
+    overconfidence = by_type["Overconfidence"]
+    # "can't fail" (0.7), "100x" (0.5) and "will go up" (0.6) combine as 1 - 0.3 * 0.5 * 0.4
+    assert overconfidence.confidence == 0.94
+    assert overconfidence.severity == "high"
+    assert overconfidence.evidence == "It can't fail!"
+    assert text[slice(*overconfidence.span)].strip() == overconfidence.evidence
+
+    assert [candidate.confidence for candidate in candidates] == sorted(
+        (candidate.confidence for candidate in candidates), reverse=True
+    )
+
+
+def test_min_confidence_filters_weak_candidates():
+    text = "What if this goes wrong?"
+    assert types_of(text) == {"Fear-Based Reasoning"}
+    assert prescreen_biases(text, min_confidence=0.5) == []
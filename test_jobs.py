@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.core import jobs
+from backend.core.jobs import JobQueue, JobStore
+from backend.core.schemas import DecisionInput
+
+DECISION = DecisionInput(
+    decision_text="I want to quit my stable job to open a bakery with my savings.",
+    domain="career", time_horizon="long", values=["security"]
+)
+
+
+@pytest.fixture(autouse=True)
+def no_history(monkeypatch):
+    monkeypatch.setattr(jobs.audit_history, "path", None)
+
+
+def test_job_runs_and_its_updates_are_written_off_the_event_loop(tmp_path, mock_provider):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    store.open()
+    threads = set()
+    # Called on the thread that runs each statement
+    store._db.set_trace_callback(lambda statement: threads.add(threading.get_ident()))
+
+    async def run():
+        queue = JobQueue(store, workers=1)
+        await queue.start()
+        try:
+            job = await queue.submit(DECISION, "staged", no_cache=True)
+            while queue.status(job["job_id"]).status in ("queued", "running"):
+                await asyncio.sleep(0.01)
+            return queue.status(job["job_id"])
+        finally:
+            await queue.stop()
+
+    status = asyncio.run(run())
+    assert status.status == "completed" and status.report is not None
+    assert threads and threading.get_ident() not in threads
+
+    # The finished job survives a restart
+    reopened = JobStore(path)
+    reopened.open()
+    assert reopened.get(status.job_id)["status"] == "completed"
+
+
+def test_expired_jobs_are_pruned_from_memory_and_disk(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    asyncio.run(store.aput({"job_id": "old", "status": "completed", "created_at": 1.0}))
+    monkeypatch.setattr(jobs, "JOB_RETENTION_SECONDS", -1)
+    asyncio.run(store.aprune())
+    assert store.get("old") is None
+    assert store._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from backend.core.json_repair import close_truncated, load_lenient, parse_model, snake_case
+from backend.core.schemas import BiasOutput, DecompositionOutput, SimulationOutput
+
+
+def test_snake_case():
+    assert snake_case("RiskTolerance") == "risk_tolerance"
+    assert snake_case("risk-tolerance ") == "risk_tolerance"
+    assert snake_case("best_case") == "best_case"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": "unfinished', {"a": "unfinished"}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": {"b": [1,', {"a": {"b": [1]}}),
+    ('{"a": "quote \\"', {"a": 'quote "'}),
+])
+def test_close_truncated(text, expected):
+    assert json.loads(close_truncated(text)) == expected
+
+
+def test_load_lenient_strips_fences_and_prose():
+    assert load_lenient('```json\n{"a": 1}\n```') == {"a": 1}
+    assert load_lenient('Here you go: {"a": [1, 2') == {"a": [1, 2]}
+    with pytest.raises(json.JSONDecodeError):
+        load_lenient("no json here")
+
+
+def test_valid_content_is_not_repaired():
+    content = json.dumps({"biases": []})
+    result, repaired = parse_model(content, BiasOutput)
+    assert result == BiasOutput(biases=[]) and not repaired
+
+
+def test_aliases_and_bare_list():
+    content = json.dumps([{"Type": "Anchoring", "quote": "everyone says so", "severity": "low"}])
+    result, repaired = parse_model(content, BiasOutput)
+    assert repaired
+    assert result.biases[0].bias_type == "Anchoring" and result.biases[0].evidence == "everyone says so"
+
+
+def test_missing_wrapper_envelope_and_single_item_lists():
+    content = json.dumps({"analysis": {
+        "Best Case": "a", "worst": "b", "most_likely_scenario": "c", "long_term": "d",
+        "uncertainties": {"text": "market demand"},
+    }})
+    result, repaired = parse_model(content, SimulationOutput)
+    assert repaired
+    assert result.scenarios.best_case == "a" and result.scenarios.most_likely == "c"
+    assert result.uncertainties == ["market demand"]
+
+
+def test_unsalvageable_content_raises():
+    with pytest.raises(ValidationError):
+        parse_model(json.dumps({"objective": "x"}), DecompositionOutput)
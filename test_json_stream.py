@@ -0,0 +1,90 @@
+import json
+
+from backend.core.json_stream import IncrementalJSONParser, PartialStream, PartialValidator
+from backend.core.schemas import BiasOutput, SimulationOutput
+
+SIMULATION = {
+    "scenarios": {"best_case": "b", "worst_case": "w", "most_likely": "m", "long_term": "l"},
+    "uncertainties": ["u1", "u2"],
+}
+
+
+def feed_in_chunks(parser, text: str, size: int = 3) -> list:
+    completed = []
+    for start in range(0, len(text), size):
+        completed += parser.feed(text[start:start + size])
+    return completed
+
+
+def test_parser_reports_values_as_they_close():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": "x", "b": [1, tr') == [(("a",), "x"), (("b", 0), 1)]
+    assert parser.feed('ue], "c": {"d": null}}') == [
+        (("b", 1), True), (("b",), [1, True]), (("c", "d"), None), (("c",), {"d": None}), ((), {"a": "x", "b": [1, True], "c": {"d": None}})
+    ]
+
+
+def test_parser_handles_escapes_split_across_chunks_and_a_fence():
+    text = '```json\n{"quote": "say \\"hi\\"\\n", "n": -1.5e2}\n```'
+    completed = feed_in_chunks(IncrementalJSONParser(), text, size=2)
+    assert completed[-1] == ((), {"quote": 'say "hi"\n', "n": -150.0})
+
+
+def test_parser_stops_quietly_on_malformed_input():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1}}]]') == [(("a",), 1), ((), {"a": 1})]
+    broken = IncrementalJSONParser()
+    broken.feed('{"a": tru}')
+    assert broken.feed('{"b": 1}') == []
+
+
+def test_partial_validator_reports_fields_before_the_document_ends():
+    validator = PartialValidator(SimulationOutput)
+    text = json.dumps(SIMULATION)
+    cut = text.index('"worst_case"')
+    assert validator.feed(text[:cut]) == [(("scenarios", "best_case"), "b")]
+    rest = validator.feed(text[cut:])
+    assert (("scenarios", "long_term"), "l") in rest
+    assert (("uncertainties", 1), "u2") in rest
+
+
+def test_partial_validator_reports_whole_list_items_and_skips_invalid_ones():
+    validator = PartialValidator(BiasOutput)
+    text = json.dumps({"biases": [
+        {"bias_type": "Anchoring", "evidence": "first offer", "severity": "high"},
+        {"bias_type": "Missing evidence"},
+    ]})
+    updates = validator.feed(text)
+    assert [path for path, _ in updates] == [("biases", 0)]
+    assert updates[0][1]["bias_type"] == "Anchoring"
+
+
+def test_partial_stream_forwards_one_attempt_and_resets_on_takeover():
+    events = []
+    stream = PartialStream(lambda path, value: events.append((path, value)), lambda: events.append("reset"))
+
+    with stream.attempt() as first:
+        with stream.attempt() as hedge:
+            first(("a",), 1)
+            hedge(("a",), 2)  # held back: the first attempt owns the stream
+            hedge(("b",), 2)
+        # the first attempt fails here, after the hedge was cancelled
+    with stream.attempt() as retry:
+        retry(("a",), 3)
+        retry(("b",), 3)
+
+    assert events == [(("a",), 1), "reset", (("a",), 3), (("b",), 3)]
+
+
+def test_partial_stream_replays_the_held_fields_of_an_attempt_that_takes_over():
+    events = []
+    stream = PartialStream(lambda path, value: events.append((path, value)), lambda: events.append("reset"))
+
+    with stream.attempt() as hedge:
+        with stream.attempt() as first:
+            first(("a",), 1)
+            hedge(("a",), 2)
+        # the first attempt failed; the hedge is still running and takes over
+        hedge(("b",), 2)
+
+    assert events == [(("a",), 1), "reset", (("a",), 2), (("b",), 2)]
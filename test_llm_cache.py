@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from backend.core.llm_cache import LLMCache
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMCache(max_entries=1, path=path)
+    cache.set("a", "1")
+    cache.set("b", "2")  # evicts "a" from memory; it stays on disk
+    assert cache.get("b") == "2"
+    assert cache.get("a") == "1"
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["disk_entries"] == 2
+
+    # A new process sees the disk tier
+    assert LLMCache(path=path).get("b") == "2"
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = LLMCache(ttl_seconds=-1, path=str(tmp_path / "cache.sqlite3"))
+    cache.set("a", "1")
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_async_access_runs_sqlite_off_the_event_loop(tmp_path):
+    cache = LLMCache(max_entries=1, path=str(tmp_path / "cache.sqlite3"))
+    threads = set()
+    disk_get, disk_set = cache._disk_get, cache._disk_set
+    cache._disk_get = lambda *args: threads.add(threading.get_ident()) or disk_get(*args)
+    cache._disk_set = lambda *args: threads.add(threading.get_ident()) or disk_set(*args)
+
+    async def run():
+        await cache.aset("a", "1")
+        await cache.aset("b", "2")
+        return await cache.aget("b"), await cache.aget("a"), await cache.aget("missing")
+
+    assert asyncio.run(run()) == ("2", "1", None)
+    assert threads and threading.get_ident() not in threads
+
+
+def test_memory_only_cache_needs_no_thread():
+    cache = LLMCache(path=None)
+
+    async def run():
+        await cache.aset("a", "1")
+        return await cache.aget("a"), await cache.aget("b")
+
+    assert asyncio.run(run()) == ("1", None)
+    assert cache.stats()["disk_entries"] is None
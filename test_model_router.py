@@ -0,0 +1,70 @@
+import asyncio
+from typing import Optional
+
+from pydantic import BaseModel
+
+from backend.core import llm_client, model_router as router_module
+from backend.core.llm_cache import LLMCache, make_cache_key
+from backend.core.metrics import current_stage
+from backend.core.model_router import ModelRouter, parse_targets
+
+
+class Answer(BaseModel):
+    text: Optional[str] = None
+
+
+def routed(monkeypatch, *targets):
+    router = ModelRouter({"bias": list(targets)})
+    monkeypatch.setattr(llm_client, "model_router", router)
+    monkeypatch.setattr(router_module, "MODEL_ROUTER_EXPLORE", 0.0)
+    return router
+
+
+def test_parse_targets():
+    assert parse_targets("groq/llama-3.1-8b-instant, openai/gpt-4o-mini") == [
+        ("groq", "llama-3.1-8b-instant"), ("openai", "gpt-4o-mini")
+    ]
+
+
+def test_route_prefers_fast_models_above_the_quality_floor(monkeypatch):
+    monkeypatch.setattr(router_module, "MODEL_ROUTER_MIN_SAMPLES", 1)
+    router = routed(monkeypatch, ("openai", "slow"), ("openai", "fast"), ("openai", "sloppy"))
+    for target, seconds, valid in ((("openai", "slow"), 2.0, True), (("openai", "fast"), 0.5, True), (("openai", "sloppy"), 0.1, False)):
+        router.record_latency("bias", target, seconds)
+        router.record_outcome("bias", target, valid)
+    assert router.route("bias", ["openai"]) == [("openai", "fast"), ("openai", "slow"), ("openai", "sloppy")]
+    assert router.route("bias", ["groq"]) == []
+
+
+def test_routed_call_is_cached_under_the_routed_model(monkeypatch, fake_provider):
+    routed(monkeypatch, ("openai", "fast-model"))
+    cache = LLMCache(path=None)
+    monkeypatch.setattr(llm_client, "llm_cache", cache)
+
+    async def run():
+        current_stage.set("bias")
+        await llm_client.get_llm_response("system", "user", Answer)
+        await llm_client.get_llm_response("system", "user", Answer)
+
+    asyncio.run(run())
+    assert fake_provider.calls == 1
+    assert cache.get(make_cache_key("fast-model", "system", "user", Answer)) == "{}"
+    assert cache.get(make_cache_key("gpt-4o-mini", "system", "user", Answer)) is None
+
+
+def test_router_latency_excludes_queueing(monkeypatch, fake_provider):
+    router = routed(monkeypatch, ("openai", "fast-model"))
+    monkeypatch.setitem(llm_client.PROVIDER_CONCURRENCY, "openai", 1)
+    messages = [{"role": "user", "content": "x"}]
+
+    async def call():
+        current_stage.set("bias")
+        return await llm_client.create_completion("openai", "fast-model", messages)
+
+    async def run():
+        return await asyncio.gather(*(call() for _ in range(3)))
+
+    asyncio.run(run())
+    latencies = list(router.stats("bias", ("openai", "fast-model")).latencies)
+    # Each call takes 300ms at the provider; the later ones queued for up to 600ms more
+    assert len(latencies) == 3 and max(latencies) < 0.45
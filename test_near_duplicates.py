@@ -0,0 +1,49 @@
+from backend.core.near_duplicates import (
+    BANDS, NUM_PERM, band_keys, normalize_text, pack, partition_key, signature, similarity, unpack
+)
+from backend.core.schemas import DecisionInput
+
+TEXT = (
+    "I want to quit my stable job to open a bakery with my savings, because everyone "
+    "says the neighbourhood needs one and I have always loved baking bread."
+)
+
+
+def decision(text: str = TEXT, **fields) -> DecisionInput:
+    return DecisionInput(**{"decision_text": text, "domain": "career", "time_horizon": "long", **fields})
+
+
+def test_normalization_ignores_case_and_punctuation():
+    assert normalize_text("  Quit, my JOB!  now ") == "quit my job now"
+    assert signature(decision("Quit my job.")) == signature(decision("quit   MY job"))
+
+
+def test_small_edits_stay_similar_and_other_texts_do_not():
+    sig = signature(decision())
+    typo = signature(decision(TEXT.replace("bakery", "bakry")))
+    other = signature(decision("Should I move abroad for a two-year research contract in Lisbon next spring?"))
+    assert len(sig) == NUM_PERM
+    assert similarity(sig, sig) == 1.0
+    assert similarity(sig, typo) >= 0.85
+    assert similarity(sig, other) < 0.3
+
+
+def test_near_duplicates_share_a_band_only_within_a_partition():
+    sig = signature(decision())
+    typo = signature(decision(TEXT.replace("bakery", "bakry")))
+    keys = band_keys(partition_key(decision()), sig)
+    assert len(keys) == BANDS and all(0 <= key < 2 ** 63 for key in keys)
+    assert set(keys) & set(band_keys(partition_key(decision()), typo))
+    assert not set(keys) & set(band_keys(partition_key(decision(domain="finance")), sig))
+
+
+def test_partition_key_normalizes_values():
+    assert partition_key(decision(values=["Security ", "family", ""])) == partition_key(
+        decision(values=["family", "security"])
+    )
+
+
+def test_short_texts_and_packing():
+    sig = signature(decision("Move?"))
+    assert len(sig) == NUM_PERM
+    assert unpack(pack(sig)) == sig
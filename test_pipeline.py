@@ -0,0 +1,87 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.core import llm_client, pipeline
+from backend.core.resilience import LatencyTracker
+from backend.core.scheduler import current_tenant
+
+DECISION = {
+    "decision_text": "I want to quit my stable job to open a bakery with my savings.",
+    "domain": "career",
+    "time_horizon": "long",
+    "values": ["security"],
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Nothing is written to the audit history; the app lifespan (startup, job queue) is not run
+    monkeypatch.setattr(main.audit_history, "path", None)
+    return TestClient(main.app)
+
+
+def test_coalesced_calls_are_charged_to_the_callers_tenant(client, mock_provider, monkeypatch):
+    tenants = set()
+    admit = llm_client.admit
+
+    async def recording_admit(*args):
+        tenants.add(current_tenant.get())
+        await admit(*args)
+
+    monkeypatch.setattr(llm_client, "admit", recording_admit)
+    response = client.post("/audit", json=DECISION, params={"no_cache": "true"}, headers={"X-Tenant-ID": "acme"})
+    assert response.status_code == 200
+    assert tenants == {"acme"}
+
+
+def test_timings_include_every_stage(client, mock_provider):
+    response = client.post("/audit", json=DECISION, params={"no_cache": "true", "timings": "true"})
+    assert response.status_code == 200
+    names = {part.split(";")[0].strip() for part in response.headers["Server-Timing"].split(",")}
+    assert {"total", *pipeline.STAGES, "report"} <= names
+
+
+def test_short_request_timeout_fails_the_stage_fast(client, mock_provider, monkeypatch):
+    # Every stage usually takes 5s; a 1s deadline cannot be met
+    slow = LatencyTracker()
+    for _ in range(50):
+        slow.record(5.0)
+    monkeypatch.setattr(pipeline, "_stage_latencies", {name: slow for name in pipeline.STAGES})
+
+    started = time.perf_counter()
+    response = client.post(
+        "/audit", json=DECISION, params={"no_cache": "true"}, headers={"X-Request-Timeout": "1"}
+    )
+    assert time.perf_counter() - started < 0.5
+    assert response.status_code == 504
+    assert all("deadline cannot be met" in message for message in response.json()["detail"]["stages"].values())
+    assert mock_provider.calls == 0
+
+
+def follow_up(client, provider, mode: str, **changes):
+    """The report of a follow-up audit (same audit_id), and the LLM calls it made."""
+    first = client.post("/audit", json=DECISION, params={"mode": mode, "no_cache": "true"})
+    assert first.status_code == 200
+    calls = provider.calls
+    response = client.post(
+        "/audit", json={**DECISION, **changes}, params={"mode": mode, "no_cache": "true", "audit_id": first.json()["audit_id"]}
+    )
+    assert response.status_code == 200
+    return response.json(), provider.calls - calls
+
+
+def test_staged_follow_up_reuses_unchanged_stages(client, mock_provider):
+    report, calls = follow_up(client, mock_provider, "staged")
+    assert report["reused_stages"] == sorted(pipeline.STAGES)
+    assert calls == 1  # only the report
+
+
+@pytest.mark.parametrize("mode", ["fused", "single"])
+def test_follow_up_only_reports_stages_it_did_not_recompute(client, mock_provider, mode):
+    # The changed time horizon invalidates some stages; fused and single mode then recompute all of them
+    report, calls = follow_up(client, mock_provider, mode, time_horizon="short")
+    assert calls >= 1
+    assert report["reused_stages"] == []
@@ -0,0 +1,51 @@
+import asyncio
+
+from backend.core import llm_client, resilience, scheduler
+from backend.core.audit_history import AuditHistory
+from backend.core.jobs import JobStore
+from backend.core.llm_cache import LLMCache
+from backend.core.resilience import get_breaker
+from backend.core.scheduler import get_rate_limiter
+
+
+def test_stores_open_on_first_use(tmp_path):
+    stores = (
+        LLMCache(path=str(tmp_path / "cache" / "llm.sqlite3")),
+        AuditHistory(str(tmp_path / "history" / "audits.sqlite3")),
+        JobStore(str(tmp_path / "jobs" / "jobs.sqlite3")),
+    )
+    # Nothing touches the filesystem on construction
+    assert list(tmp_path.iterdir()) == []
+    for store in stores:
+        store.open()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "history", "jobs"]
+
+
+def test_job_store_reloads_unfinished_jobs(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    JobStore(path).put({"job_id": "a", "status": "running", "created_at": 1.0})
+    store = JobStore(path)
+    assert store.get("a") is None
+    store.open()
+    assert [job["job_id"] for job in store.unfinished()] == ["a"]
+
+
+def test_reload_resets_limits_breakers_and_semaphores(monkeypatch):
+    monkeypatch.setattr(llm_client, "PROVIDER_CONCURRENCY", {"groq": 4, "openai": 8})
+    monkeypatch.setattr(llm_client, "_semaphores", {"openai": asyncio.Semaphore(8)})
+    monkeypatch.setattr(scheduler, "DEFAULT_LIMITS", {"openai": (0, 0)})
+    monkeypatch.setattr(scheduler, "MODEL_LIMITS", {})
+    monkeypatch.setattr(scheduler, "_limiters", {})
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_latencies", {})
+    monkeypatch.setenv("OPENAI_MAX_CONCURRENCY", "3")
+    monkeypatch.setenv("OPENAI_RPM", "60")
+
+    get_breaker("openai", "gpt-test").record_failure()
+    assert get_rate_limiter("openai", "gpt-test").requests.per_minute == 0
+    asyncio.run(llm_client.providers.reload())
+
+    assert llm_client.PROVIDER_CONCURRENCY["openai"] == 3
+    assert llm_client._semaphores == {}
+    assert get_breaker("openai", "gpt-test").failures == 0
+    assert get_rate_limiter("openai", "gpt-test").requests.per_minute == 60
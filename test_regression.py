@@ -0,0 +1,17 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_golden_corpus_replays_from_the_committed_cassette():
+    # No key and no network: every LLM call must come from the cassette
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "GROQ_API_KEY")}
+    env.update({"LLM_CACHE_PATH": "", "AUDIT_HISTORY_PATH": "", "JOB_STORE_PATH": ""})
+    result = subprocess.run(
+        [sys.executable, "-m", "backend.regression", "benchmarks/golden/decisions.jsonl"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "8/8 passed" in result.stdout
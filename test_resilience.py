@@ -0,0 +1,80 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from backend.core import llm_client, resilience
+from backend.core.admission import DeadlineExceeded, set_deadline
+from backend.core.resilience import CircuitBreaker, LatencyTracker, get_breaker, with_retries
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_capacity_wait_is_not_part_of_the_attempt_timeout(monkeypatch):
+    monkeypatch.setattr(resilience, "LLM_ATTEMPT_TIMEOUT", 0.2)
+    tracker = LatencyTracker()
+
+    @asynccontextmanager
+    async def slow_slot():
+        await asyncio.sleep(0.4)
+        yield
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    assert asyncio.run(with_retries(call, tracker, slot=slow_slot)) == "ok"
+    assert len(tracker.samples) == 1 and tracker.samples[0] < 0.2
+
+
+def test_queueing_behind_the_concurrency_limit_does_not_trip_the_breaker(monkeypatch, fake_provider):
+    monkeypatch.setitem(llm_client.PROVIDER_CONCURRENCY, "openai", 1)
+    monkeypatch.setattr(resilience, "LLM_ATTEMPT_TIMEOUT", 1.0)
+    messages = [{"role": "user", "content": "x"}]
+
+    async def run():
+        return await asyncio.gather(
+            *(llm_client.create_completion("openai", "gpt-test", messages) for _ in range(12)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert results == ["{}"] * 12
+    assert fake_provider.calls == 12
+    assert get_breaker("openai", "gpt-test").state == "closed"
+
+
+def test_client_deadline_is_not_retried_or_counted_against_the_breaker(monkeypatch, fake_provider):
+    monkeypatch.setattr(resilience, "LLM_ATTEMPT_TIMEOUT", 5.0)
+    messages = [{"role": "user", "content": "x"}]
+
+    async def run():
+        # The provider takes 300ms; the client only allows 100ms (set in this task's context only)
+        set_deadline(0.1)
+        await llm_client.create_completion("openai", "gpt-test", messages)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert fake_provider.calls == 1
+    breaker = get_breaker("openai", "gpt-test")
+    assert breaker.failures == 0 and breaker.state == "closed"
+
+
+def test_attempt_timeout_still_counts_as_a_failure(monkeypatch, fake_provider):
+    monkeypatch.setattr(resilience, "LLM_ATTEMPT_TIMEOUT", 0.1)
+    monkeypatch.setattr(resilience, "LLM_MAX_RETRIES", 0)
+    messages = [{"role": "user", "content": "x"}]
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(llm_client.create_completion("openai", "gpt-test", messages))
+    assert get_breaker("openai", "gpt-test").failures == 1
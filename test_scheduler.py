@@ -0,0 +1,65 @@
+import asyncio
+
+from backend.core import scheduler
+from backend.core.scheduler import RateLimiter, TokenBucket
+
+
+def test_token_bucket_waits_and_goes_into_debt():
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(90)
+    assert bucket.level < 0
+    # Refills one unit per second; a request above capacity only needs a full bucket
+    assert 89 < bucket.wait_time(1000) <= 90
+    bucket.give_back(1000)
+    assert bucket.level == bucket.capacity
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(0)
+    bucket.take(10 ** 6)
+    assert bucket.unlimited and bucket.wait_time(10 ** 6) == 0
+
+
+def test_waiters_are_admitted_in_priority_order(monkeypatch):
+    monkeypatch.setattr(scheduler, "TENANT_TPM", 0)
+    order = []
+
+    async def run():
+        limiter = RateLimiter(rpm=600, tpm=0)  # one request per 100ms once drained
+        limiter.requests.level = 0
+
+        async def call(priority):
+            await limiter.acquire(1, priority, "default")
+            order.append(priority)
+
+        await asyncio.gather(*(call(p) for p in ("background", "batch", "interactive", "batch")))
+
+    asyncio.run(run())
+    assert order == ["interactive", "batch", "batch", "background"]
+
+
+def test_tenant_over_budget_does_not_block_others(monkeypatch):
+    monkeypatch.setattr(scheduler, "TENANT_TPM", 1000)
+    monkeypatch.setattr(scheduler, "_tenant_buckets", {})
+    scheduler.tenant_bucket("heavy").take(2000)
+
+    async def run():
+        limiter = RateLimiter(rpm=600, tpm=0)
+        heavy = asyncio.ensure_future(limiter.acquire(100, "interactive", "heavy"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(limiter.acquire(100, "background", "light"), timeout=1)
+        assert not heavy.done()
+        heavy.cancel()
+        return limiter.queued()
+
+    assert asyncio.run(run()) == {"interactive": 0, "batch": 0, "background": 0}
+
+
+def test_settle_replaces_the_estimate(monkeypatch):
+    monkeypatch.setattr(scheduler, "TENANT_TPM", 0)
+    limiter = RateLimiter(rpm=0, tpm=6000)
+    asyncio.run(limiter.acquire(1000, "interactive", "default"))
+    assert 4999 < limiter.tokens.level <= 5000.1
+    limiter.settle(1000, 200, "default")
+    assert 5799 < limiter.tokens.level <= 5800.1
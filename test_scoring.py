@@ -0,0 +1,48 @@
+import pytest
+
+from backend.core.schemas import (
+    BiasEvidence, BiasOutput, DecompositionOutput, IntegrityOutput, Scenarios, SimulationOutput
+)
+from backend.core.scoring import compute_bias_score, compute_risk_score, compute_scores
+
+
+def decomposition(irreversible: int = 0, tolerance: str = "medium") -> DecompositionOutput:
+    return DecompositionOutput(
+        objective="open a bakery", constraints=[], assumptions=[], emotional_signals=[],
+        risk_tolerance=tolerance, irreversible_factors=[f"factor {i}" for i in range(irreversible)]
+    )
+
+
+def biases(*severities: str) -> BiasOutput:
+    return BiasOutput(biases=[BiasEvidence(bias_type="anchoring", evidence="x", severity=s) for s in severities])
+
+
+def simulation(uncertainties: int = 0) -> SimulationOutput:
+    return SimulationOutput(
+        scenarios=Scenarios(best_case="a", worst_case="b", most_likely="c", long_term="d"),
+        uncertainties=[f"u{i}" for i in range(uncertainties)]
+    )
+
+
+@pytest.mark.parametrize("severities, expected", [
+    ((), 100.0),
+    (("low", "Medium ", "high"), 35.0),
+    (("unknown",), 80.0),  # unknown severity counts as medium
+    (("high",) * 4, 0.0),
+])
+def test_bias_score(severities, expected):
+    assert compute_bias_score(biases(*severities)) == expected
+
+
+def test_risk_score_parts_are_capped():
+    assert compute_risk_score(decomposition(), simulation(), 100.0) == 10.0
+    # irreversibility 40 (capped) + distortion 25 + tolerance 20 + uncertainty 15 (capped)
+    assert compute_risk_score(decomposition(9, "HIGH"), simulation(9), 0.0) == 100.0
+    assert compute_risk_score(decomposition(1, "low"), simulation(2), 60.0) == 31.0
+
+
+def test_scores_are_deterministic_and_clamped():
+    scores = compute_scores(
+        decomposition(2, "high"), biases("medium"), simulation(1), IntegrityOutput(alignment_score=72.25, conflicts=[])
+    )
+    assert scores == {"risk_score": 48.0, "bias_score": 80.0, "alignment_score": 72.2}
@@ -0,0 +1,153 @@
+import asyncio
+from contextvars import ContextVar
+
+from backend.core.admission import DeadlineExceeded, remaining_time, set_deadline
+from backend.core.metrics import record_timing, request_timings
+from backend.core.singleflight import SingleFlight
+
+tenant: ContextVar[str] = ContextVar("tenant", default="none")
+stage: ContextVar[str] = ContextVar("stage", default="none")
+listener: ContextVar[str] = ContextVar("listener", default="none")
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_shared_call_gets_the_inherited_vars_and_the_latest_deadline():
+    flight = SingleFlight("test", inherit=(tenant, stage))
+    seen = {}
+
+    async def work():
+        await asyncio.sleep(0.05)
+        seen.update(tenant=tenant.get(), stage=stage.get(), listener=listener.get(), deadline=remaining_time())
+        return "result"
+
+    async def caller(name: str, timeout: float):
+        tenant.set("acme")
+        stage.set("bias_analysis")
+        listener.set(name)
+        set_deadline(timeout)
+        return await flight.do("key", work)
+
+    async def run():
+        return await asyncio.gather(caller("first", 10), caller("second", 20))
+
+    assert asyncio.run(run()) == ["result", "result"]
+    # Only the inherited vars are carried; the deadline is the later waiter's
+    assert (seen["tenant"], seen["stage"], seen["listener"]) == ("acme", "bias_analysis", "none")
+    assert 19 < seen["deadline"] <= 20
+
+
+def test_shared_call_has_no_deadline_while_a_waiter_has_none():
+    flight = SingleFlight("test")
+    seen = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        seen.append(remaining_time())
+        return "result"
+
+    async def bounded():
+        set_deadline(10)
+        return await flight.do("key", work)
+
+    async def run():
+        return await asyncio.gather(bounded(), flight.do("key", work))
+
+    asyncio.run(run())
+    assert seen == [None]
+
+
+def test_each_waiter_gets_the_shared_timings():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        record_timing("decomposition", 0.5)
+        return "result"
+
+    async def caller():
+        timings = {"queue": 0.1}
+        request_timings.set(timings)
+        await flight.do("key", work)
+        return timings
+
+    async def run():
+        return await asyncio.gather(caller(), caller())
+
+    assert asyncio.run(run()) == [{"queue": 0.1, "decomposition": 0.5}] * 2
+
+
+def test_each_caller_keeps_its_own_deadline():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.2)
+        return "result"
+
+    async def impatient():
+        set_deadline(0.05)
+        return await flight.do("key", work)
+
+    async def run():
+        return await asyncio.gather(impatient(), flight.do("key", work), return_exceptions=True)
+
+    short, patient = asyncio.run(run())
+    assert isinstance(short, DeadlineExceeded)
+    # The first caller's deadline did not cut the shared call short for the other
+    assert patient == "result"
+
+
+def test_shared_call_is_cancelled_only_when_the_last_waiter_leaves():
+    flight = SingleFlight("test")
+
+    async def run():
+        started = asyncio.Event()
+        stopped = []
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                stopped.append(True)
+                raise
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not stopped and flight.in_flight() == 1
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert stopped and flight.in_flight() == 0
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(flight.do("key", work), flight.do("key", work), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))